@@ -0,0 +1,10 @@
+"""
+Замеры производительности на синтетических данных
+
+    python -m benchmarks.datagen --scale 100k     # создать базу замеров
+    python -m benchmarks.run --scale 100k         # выполнить замеры
+    python -m benchmarks.compare old.json new.json
+
+База замеров (BENCHMARK_CONFIG['database']) пересоздается генератором,
+рабочая база не затрагивается.
+"""
@@ -0,0 +1,95 @@
+"""
+Сравнение результатов замеров
+
+    python -m benchmarks.compare базовые.json новые.json [--threshold 0.2]
+
+Регрессия - медиана замера хуже базовой больше чем на threshold (доля).
+При регрессиях команда завершается с кодом 1.
+"""
+import argparse
+import json
+import sys
+from config import BENCHMARK_CONFIG
+
+
+def load_results(path):
+    """Прочитать JSON с результатами замеров"""
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def compare(baseline, current, threshold):
+    """
+    Сравнить медианы замеров
+
+    Args:
+        baseline: Базовые результаты (словарь из JSON)
+        current: Новые результаты
+        threshold: Допустимое ухудшение (доля, 0.2 - на 20%)
+
+    Returns:
+        Список строк сравнения (name, базовая медиана, новая медиана,
+        отношение, регрессия) для замеров, которые есть в обоих результатах
+    """
+    rows = []
+    for name, result in current['results'].items():
+        base = baseline['results'].get(name)
+        if base is None:
+            continue
+        before, after = base['median_ms'], result['median_ms']
+        ratio = after / before if before else float('inf') if after else 1.0
+        rows.append((name, before, after, ratio, ratio > 1 + threshold))
+    return rows
+
+
+def format_comparison(rows):
+    """Текстовая таблица сравнения"""
+    lines = [f"{'Замер':<55} {'было мс':>10} {'стало мс':>10} {'изм.':>8}"]
+    for name, before, after, ratio, regression in rows:
+        mark = '  РЕГРЕССИЯ' if regression else ''
+        lines.append(f"{name[:55]:<55} {before:>10.2f} {after:>10.2f} {ratio - 1:>+8.0%}{mark}")
+    return '\n'.join(lines)
+
+
+def report(baseline, current, threshold):
+    """
+    Вывести сравнение
+
+    Returns:
+        Число регрессий
+    """
+    if baseline.get('meta', {}).get('counts') != current.get('meta', {}).get('counts'):
+        print("ВНИМАНИЕ: результаты получены на данных разного размера")
+
+    rows = compare(baseline, current, threshold)
+    print(format_comparison(rows))
+    regressions = sum(1 for row in rows if row[4])
+    if regressions:
+        print(f"\nРегрессий (хуже более чем на {threshold:.0%}): {regressions}")
+    else:
+        print(f"\nРегрессий нет (порог {threshold:.0%})")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Сравнение результатов замеров')
+    parser.add_argument('baseline', help='базовые результаты (JSON)')
+    parser.add_argument('current', help='новые результаты (JSON)')
+    parser.add_argument('--threshold', type=float,
+                        default=BENCHMARK_CONFIG.get('regression_threshold', 0.2),
+                        help='допустимое ухудшение медианы (доля)')
+    args = parser.parse_args()
+
+    try:
+        baseline = load_results(args.baseline)
+        current = load_results(args.current)
+    except (OSError, ValueError) as e:
+        print(f"Не удалось прочитать результаты: {e}")
+        sys.exit(2)
+
+    if report(baseline, current, args.threshold):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
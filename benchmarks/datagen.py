@@ -0,0 +1,254 @@
+"""
+Генератор синтетических данных для замеров
+
+База BENCHMARK_CONFIG['database'] пересоздается, таблицы заполняются
+через COPY, затем применяются миграции приложения (индексы, триггеры,
+итоги заказов):
+
+    python -m benchmarks.datagen --scale 1k|100k|1m [--seed 1]
+"""
+import argparse
+import random
+import time
+from datetime import date, timedelta
+
+import psycopg2
+from config import BENCHMARK_CONFIG, DB_CONFIG
+from database.connection import db
+from database.migrations import apply_migrations
+from importer.bulk import copy_rows
+
+
+# Число товаров и заказов для каждого масштаба
+SCALES = {
+    '1k': 1000,
+    '100k': 100000,
+    '1m': 1000000,
+}
+
+# Строк в одном COPY (ограничивает память под буфер)
+COPY_CHUNK = 50000
+
+# Таблицы приложения в том виде, в котором их ожидают запросы и миграции
+SCHEMA = """
+    CREATE TABLE pickup_points (
+        id SERIAL PRIMARY KEY,
+        full_address TEXT NOT NULL UNIQUE
+    );
+
+    CREATE TABLE users (
+        id SERIAL PRIMARY KEY,
+        role TEXT NOT NULL,
+        full_name TEXT NOT NULL,
+        login TEXT NOT NULL UNIQUE,
+        password TEXT NOT NULL
+    );
+
+    CREATE TABLE products (
+        id SERIAL PRIMARY KEY,
+        article TEXT NOT NULL UNIQUE,
+        name TEXT NOT NULL,
+        unit_of_measurement TEXT,
+        price NUMERIC(10, 2) NOT NULL DEFAULT 0,
+        provider TEXT,
+        category TEXT,
+        discount INTEGER NOT NULL DEFAULT 0,
+        count INTEGER NOT NULL DEFAULT 0,
+        description TEXT,
+        image TEXT
+    );
+
+    CREATE TABLE "order" (
+        id SERIAL PRIMARY KEY,
+        user_id INTEGER NOT NULL REFERENCES users (id),
+        pick_up_id INTEGER NOT NULL REFERENCES pickup_points (id),
+        created_at DATE NOT NULL,
+        delivered_at DATE,
+        full_name TEXT,
+        recipient_code TEXT,
+        status TEXT NOT NULL DEFAULT 'Новый'
+    );
+
+    CREATE TABLE order_items (
+        order_id INTEGER NOT NULL REFERENCES "order" (id) ON DELETE CASCADE,
+        goods_id INTEGER NOT NULL REFERENCES products (id),
+        count INTEGER NOT NULL,
+        total_price NUMERIC(12, 2) NOT NULL
+    );
+"""
+
+NAMES = ['Ботинки', 'Туфли', 'Кроссовки', 'Сапоги', 'Кеды', 'Сандалии', 'Мокасины', 'Полусапоги']
+ADJECTIVES = ['женские', 'мужские', 'детские', 'зимние', 'летние', 'кожаные', 'замшевые']
+SUPPLIERS = ['Kari', 'Обувь для вас', 'Zenden', 'Ralf Ringer', 'Rieker', 'Marco Tozzi', 'CROSBY', 'Alessio Nesca']
+CATEGORIES = ['Женская обувь', 'Мужская обувь', 'Детская обувь', 'Спортивная обувь']
+STREETS = ['Ленина', 'Гагарина', 'Мира', 'Садовая', 'Лесная', 'Школьная', 'Новая', 'Победы']
+CITIES = ['Москва', 'Казань', 'Самара', 'Пермь', 'Омск', 'Тула']
+LAST_NAMES = ['Иванов', 'Петров', 'Смирнов', 'Кузнецов', 'Попов', 'Соколов', 'Лебедев', 'Козлов']
+FIRST_NAMES = ['Иван', 'Петр', 'Алексей', 'Сергей', 'Дмитрий', 'Андрей', 'Михаил', 'Николай']
+STATUSES = ['Новый', 'Завершен']
+ROLES = ['Авторизированный клиент', 'Менеджер', 'Администратор']
+
+# Пользователь для замеров аутентификации
+BENCH_LOGIN = 'bench_admin'
+BENCH_PASSWORD = 'bench'
+
+
+def sizes(scale):
+    """Размеры таблиц для масштаба: товары, заказы, пользователи, пункты выдачи"""
+    count = SCALES[scale]
+    return {
+        'products': count,
+        'orders': count,
+        'users': max(count // 10, 10),
+        'pickup_points': max(count // 100, 10),
+    }
+
+
+def article(i):
+    """Артикул товара по номеру"""
+    return f'B{i:07d}'
+
+
+def pickup_point_rows(count):
+    for i in range(count):
+        yield (f'{100000 + i}, г. {CITIES[i % len(CITIES)]}, ул. {STREETS[i % len(STREETS)]}, {i + 1}',)
+
+
+def user_rows(rng, count):
+    yield ('Администратор', 'Замеров Администратор Тестович', BENCH_LOGIN, BENCH_PASSWORD)
+    for i in range(1, count):
+        full_name = f'{rng.choice(LAST_NAMES)} {rng.choice(FIRST_NAMES)} {i}'
+        yield (ROLES[i % len(ROLES)], full_name, f'user{i}@bench.local', f'pass{i}')
+
+
+def product_rows(rng, count):
+    for i in range(count):
+        name = f'{rng.choice(NAMES)} {rng.choice(ADJECTIVES)} {i}'
+        description = f'{name}, модель {rng.randint(1, 999)}, размерный ряд {rng.randint(35, 40)}-{rng.randint(41, 46)}'
+        yield (article(i), name, 'шт.', round(rng.uniform(500, 15000), 2),
+               rng.choice(SUPPLIERS), rng.choice(CATEGORIES), rng.choice((0, 0, 5, 10, 20, 30)),
+               rng.randint(0, 50), description, '')
+
+
+def order_rows(rng, count, users, pickup_points):
+    start = date(2020, 1, 1)
+    for i in range(count):
+        created = start + timedelta(days=rng.randint(0, 2000))
+        yield (rng.randint(1, users), rng.randint(1, pickup_points), created,
+               created + timedelta(days=rng.randint(1, 14)),
+               f'{rng.choice(LAST_NAMES)} {rng.choice(FIRST_NAMES)}',
+               str(rng.randint(100, 999)), rng.choice(STATUSES))
+
+
+def order_item_rows(rng, orders, products):
+    for order_id in range(1, orders + 1):
+        for goods_id in rng.sample(range(1, products + 1), min(rng.randint(1, 4), products)):
+            count = rng.randint(1, 3)
+            yield (order_id, goods_id, count, round(rng.uniform(500, 15000) * count, 2))
+
+
+def copy_chunked(cursor, table, columns, rows):
+    """COPY строк частями по COPY_CHUNK (генератор не материализуется целиком)"""
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= COPY_CHUNK:
+            copy_rows(cursor, table, columns, chunk)
+            chunk = []
+    if chunk:
+        copy_rows(cursor, table, columns, chunk)
+
+
+def recreate_database(name):
+    """Удалить и заново создать базу замеров"""
+    if name == DB_CONFIG['database']:
+        raise ValueError(f"База замеров совпадает с рабочей базой ({name})")
+
+    conn = psycopg2.connect(host=DB_CONFIG['host'], port=DB_CONFIG['port'], database='postgres',
+                            user=DB_CONFIG['user'], password=DB_CONFIG['password'])
+    conn.autocommit = True
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute(f'DROP DATABASE IF EXISTS "{name}"')
+            cursor.execute(f'CREATE DATABASE "{name}"')
+    finally:
+        conn.close()
+
+
+def use_benchmark_database():
+    """Направить подключения приложения (DB_CONFIG) в базу замеров"""
+    DB_CONFIG['database'] = BENCHMARK_CONFIG['database']
+
+
+def generate(scale, seed=1):
+    """
+    Пересоздать базу замеров и заполнить ее данными
+
+    Args:
+        scale: Ключ SCALES
+        seed: Начальное значение генератора случайных чисел
+
+    Returns:
+        Словарь размеров таблиц
+    """
+    name = BENCHMARK_CONFIG['database']
+    counts = sizes(scale)
+    rng = random.Random(seed)
+
+    recreate_database(name)
+    conn = psycopg2.connect(host=DB_CONFIG['host'], port=DB_CONFIG['port'], database=name,
+                            user=DB_CONFIG['user'], password=DB_CONFIG['password'])
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute(SCHEMA)
+
+            tables = [
+                ('pickup_points', ['full_address'], pickup_point_rows(counts['pickup_points'])),
+                ('users', ['role', 'full_name', 'login', 'password'], user_rows(rng, counts['users'])),
+                ('products', ['article', 'name', 'unit_of_measurement', 'price', 'provider',
+                              'category', 'discount', 'count', 'description', 'image'],
+                 product_rows(rng, counts['products'])),
+                ('"order"', ['user_id', 'pick_up_id', 'created_at', 'delivered_at', 'full_name',
+                             'recipient_code', 'status'],
+                 order_rows(rng, counts['orders'], counts['users'], counts['pickup_points'])),
+                ('order_items', ['order_id', 'goods_id', 'count', 'total_price'],
+                 order_item_rows(rng, counts['orders'], counts['products'])),
+            ]
+            for table, columns, rows in tables:
+                started = time.perf_counter()
+                copy_chunked(cursor, table, columns, rows)
+                print(f"  {table}: {time.perf_counter() - started:.1f} с")
+
+            cursor.execute("ANALYZE")
+        conn.commit()
+    finally:
+        conn.close()
+
+    # Миграции после загрузки: индексы строятся один раз, итоги заказов
+    # заполняются одним UPDATE, а не триггером на каждую позицию
+    use_benchmark_database()
+    db.connect()
+    try:
+        apply_migrations()
+        db.execute_query("ANALYZE", fetch=False)
+    finally:
+        db.disconnect()
+
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Генерация данных для замеров производительности')
+    parser.add_argument('--scale', choices=SCALES, default='1k', help='размер данных')
+    parser.add_argument('--seed', type=int, default=1, help='начальное значение генератора')
+    args = parser.parse_args()
+
+    print(f"Генерация данных ({args.scale}) в базу {BENCHMARK_CONFIG['database']}...")
+    started = time.perf_counter()
+    counts = generate(args.scale, args.seed)
+    print(f"Готово за {time.perf_counter() - started:.1f} с: " +
+          ', '.join(f'{table} {count}' for table, count in counts.items()))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,154 @@
+"""
+Запуск замеров производительности
+
+    python -m benchmarks.run [--generate --scale 100k] [--groups queries,catalog,import]
+                             [--repeat 5] [--output результаты.json]
+                             [--baseline базовые.json] [--threshold 0.2]
+
+Замеры выполняются на базе BENCHMARK_CONFIG['database'] (создается
+python -m benchmarks.datagen или флагом --generate). Окно каталога
+создается без экрана (QT_QPA_PLATFORM=offscreen). Результаты сохраняются
+в JSON; с --baseline результаты сравниваются с базовыми, и при регрессиях
+команда завершается с кодом 1.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+from config import BENCHMARK_CONFIG
+from database.connection import db
+from benchmarks import compare, datagen, suite
+
+
+GROUPS = ('queries', 'catalog', 'import')
+
+
+def table_counts():
+    """Фактические размеры таблиц базы замеров"""
+    row = db.execute_one("""
+        SELECT
+            (SELECT COUNT(*) FROM products) AS products,
+            (SELECT COUNT(*) FROM "order") AS orders,
+            (SELECT COUNT(*) FROM users) AS users,
+            (SELECT COUNT(*) FROM pickup_points) AS pickup_points
+    """)
+    return dict(row)
+
+
+def git_revision():
+    """Текущий коммит (для сопоставления результатов) или None"""
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_group(group, counts, repeat, import_rows):
+    """
+    Выполнить замеры группы
+
+    Returns:
+        Словарь имя замера -> результат measure()
+    """
+    if group == 'queries':
+        benchmarks = suite.query_benchmarks(counts)
+    elif group == 'catalog':
+        from PyQt6.QtWidgets import QApplication
+        app = QApplication.instance() or QApplication(sys.argv)
+        benchmarks = suite.catalog_benchmarks(app)
+    else:
+        benchmarks = suite.import_benchmarks(import_rows)
+
+    results = {}
+    for benchmark in benchmarks:
+        try:
+            results[benchmark.name] = suite.measure(benchmark, repeat)
+        except Exception as e:
+            print(f"  {benchmark.name}: ошибка {e}")
+            continue
+        print(f"  {benchmark.name:<55} {results[benchmark.name]['median_ms']:>10.2f} мс")
+
+    if group == 'catalog':
+        app.closeAllWindows()
+        app.processEvents()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Замеры производительности')
+    parser.add_argument('--generate', action='store_true', help='пересоздать базу замеров')
+    parser.add_argument('--scale', choices=datagen.SCALES, default='1k',
+                        help='размер данных для --generate')
+    parser.add_argument('--groups', default=','.join(GROUPS),
+                        help=f"группы замеров через запятую ({', '.join(GROUPS)})")
+    parser.add_argument('--repeat', type=int, default=BENCHMARK_CONFIG.get('repeat', 5),
+                        help='число измерений каждого замера')
+    parser.add_argument('--import-rows', type=int, default=BENCHMARK_CONFIG.get('import_rows', 10000),
+                        help='строк в файлах для замеров импорта')
+    parser.add_argument('--output', help='файл результатов (JSON)')
+    parser.add_argument('--baseline', help='базовые результаты для сравнения (JSON)')
+    parser.add_argument('--threshold', type=float,
+                        default=BENCHMARK_CONFIG.get('regression_threshold', 0.2),
+                        help='допустимое ухудшение медианы (доля)')
+    args = parser.parse_args()
+
+    groups = [group.strip() for group in args.groups.split(',') if group.strip()]
+    unknown = set(groups) - set(GROUPS)
+    if unknown:
+        parser.error(f"неизвестные группы: {', '.join(sorted(unknown))}")
+
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+    if args.generate:
+        print(f"Генерация данных ({args.scale}) в базу {BENCHMARK_CONFIG['database']}...")
+        datagen.generate(args.scale)
+
+    datagen.use_benchmark_database()
+    db.connect()
+    try:
+        counts = table_counts()
+        print("База замеров: " + ', '.join(f'{table} {count}' for table, count in counts.items()))
+
+        results = {}
+        # Импорт изменяет данные и выполняется последним
+        for group in sorted(groups, key=GROUPS.index):
+            print(f"\n[{group}]")
+            results.update(run_group(group, counts, args.repeat, args.import_rows))
+    finally:
+        db.disconnect()
+
+    current = {
+        'meta': {
+            'at': time.strftime('%Y-%m-%d %H:%M:%S'),
+            'revision': git_revision(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'counts': counts,
+            'repeat': args.repeat,
+            'import_rows': args.import_rows,
+        },
+        'results': results,
+    }
+
+    output = args.output or os.path.join(BENCHMARK_CONFIG.get('results_dir', 'benchmarks/results'),
+                                         time.strftime('%Y%m%d-%H%M%S') + '.json')
+    directory = os.path.dirname(output)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(current, f, ensure_ascii=False, indent=2)
+    print(f"\nРезультаты сохранены в {output}")
+
+    if args.baseline:
+        print()
+        if compare.report(compare.load_results(args.baseline), current, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
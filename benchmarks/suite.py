@@ -0,0 +1,374 @@
+"""
+Замеры горячих путей приложения
+
+Каждый замер - функция без аргументов; перед замером выполняется один
+прогрев (подготовка запросов на сервере, заполнение кэшей ОС), затем
+repeat измерений. Замеры групп 'queries', 'catalog' и 'import' работают
+с базой замеров (см. benchmarks/datagen.py); замеры импорта изменяют
+данные, поэтому выполняются последними.
+"""
+import contextlib
+import io
+import itertools
+import os
+import statistics
+import tempfile
+import time
+from datetime import date, timedelta
+
+from database.cache import query_cache
+from database.connection import db
+from database.queries import UserQueries, ProductQueries, OrderQueries
+from benchmarks.datagen import BENCH_LOGIN, BENCH_PASSWORD, SUPPLIERS, article
+
+
+class Benchmark:
+    """Один замер"""
+
+    def __init__(self, name, func, setup=None, check=None):
+        """
+        Args:
+            name: Имя замера (ключ в JSON с результатами)
+            func: Измеряемая функция без аргументов
+            setup: Функция, выполняемая перед каждым измерением (не измеряется)
+            check: Проверка результата после каждого измерения (не измеряется);
+                   исключение в ней - ошибка замера, время не записывается
+        """
+        self.name = name
+        self.func = func
+        self.setup = setup
+        self.check = check
+
+
+def measure(benchmark, repeat=5, warmup=1):
+    """
+    Выполнить замер
+
+    Returns:
+        Словарь с числом измерений и временем (мс): min, median, mean, max
+    """
+    timings = []
+    for run in range(warmup + repeat):
+        if benchmark.setup is not None:
+            benchmark.setup()
+        started = time.perf_counter()
+        benchmark.func()
+        elapsed = time.perf_counter() - started
+        if benchmark.check is not None:
+            benchmark.check()
+        if run >= warmup:
+            timings.append(elapsed * 1000)
+
+    return {
+        'repeat': repeat,
+        'min_ms': round(min(timings), 3),
+        'median_ms': round(statistics.median(timings), 3),
+        'mean_ms': round(statistics.mean(timings), 3),
+        'max_ms': round(max(timings), 3),
+    }
+
+
+def query_benchmarks(counts):
+    """
+    Замеры методов UserQueries, ProductQueries и OrderQueries
+
+    Args:
+        counts: Размеры таблиц базы замеров (datagen.sizes)
+    """
+    product_id = counts['products'] // 2 or 1
+    order_id = counts['orders'] // 2 or 1
+    product_ids = list(range(1, counts['products'] + 1, max(counts['products'] // 40, 1)))[:40]
+    order_ids = list(range(1, counts['orders'] + 1, max(counts['orders'] // 100, 1)))[:100]
+    _, first_key = OrderQueries.get_orders_page(limit=100)
+    _, product_key = ProductQueries.get_products_page(limit=40)
+
+    # Справочники кэшируются в памяти: замеряется запрос к серверу
+    uncached = query_cache.clear
+
+    # Добавленные замером строки удаляются замерами delete_*
+    serial = itertools.count(1)
+    added_products = []
+    added_orders = []
+
+    def add_product():
+        n = next(serial)
+        row = ProductQueries.add_product(f'BENCH-{os.getpid()}-{n}', f'Замер {n}', 'шт.', 1000,
+                                         SUPPLIERS[0], 'Мужская обувь', 5, 10, 'Товар замера', '')
+        added_products.append(row['product_id'])
+
+    def update_product():
+        ProductQueries.update_product(added_products[-1], f'BENCH-{os.getpid()}-u{added_products[-1]}',
+                                      'Замер (изменен)', 'шт.', 1200, SUPPLIERS[1], 'Мужская обувь',
+                                      10, 5, 'Товар замера', '')
+
+    def delete_product():
+        ProductQueries.delete_product(added_products.pop())
+
+    def add_order():
+        created = date(2024, 1, 1)
+        added_orders.append(OrderQueries.add_order(1, 1, created, created + timedelta(days=3),
+                                                   'Замеров Клиент', '999', 'Новый'))
+
+    def update_order():
+        created = date(2024, 2, 1)
+        OrderQueries.update_order(added_orders[-1], 1, created, created + timedelta(days=5),
+                                  'Замеров Клиент', '998', 'Завершен')
+
+    def delete_order():
+        OrderQueries.delete_order(added_orders.pop())
+
+    return [
+        Benchmark('UserQueries.authenticate', lambda: UserQueries.authenticate(BENCH_LOGIN, BENCH_PASSWORD)),
+        Benchmark('UserQueries.get_all_users', UserQueries.get_all_users, uncached),
+
+        Benchmark('ProductQueries.get_all_products', ProductQueries.get_all_products),
+        Benchmark('ProductQueries.get_products_by_ids', lambda: ProductQueries.get_products_by_ids(product_ids)),
+        Benchmark('ProductQueries.search_products[substring]',
+                  lambda: ProductQueries.search_products('ботинки', limit=500)),
+        Benchmark('ProductQueries.search_products[fulltext]',
+                  lambda: ProductQueries.search_products('ботинки', limit=500, mode='fulltext')),
+        Benchmark('ProductQueries.get_products_page[first]', lambda: ProductQueries.get_products_page(limit=40)),
+        Benchmark('ProductQueries.get_products_page[next]',
+                  lambda: ProductQueries.get_products_page(product_key, limit=40)),
+        Benchmark('ProductQueries.get_products_page[quantity_desc]',
+                  lambda: ProductQueries.get_products_page(limit=40, sort='quantity_desc')),
+        Benchmark('ProductQueries.get_products_page[search]',
+                  lambda: ProductQueries.get_products_page(limit=40, search_text='кожаные')),
+        Benchmark('ProductQueries.estimate_products_count',
+                  lambda: ProductQueries.estimate_products_count('кожаные', SUPPLIERS[0])),
+        Benchmark('ProductQueries.filter_by_supplier', lambda: ProductQueries.filter_by_supplier(SUPPLIERS[0])),
+        Benchmark('ProductQueries.get_product_by_id', lambda: ProductQueries.get_product_by_id(product_id)),
+        Benchmark('ProductQueries.add_product', add_product),
+        Benchmark('ProductQueries.update_product', update_product),
+        Benchmark('ProductQueries.delete_product', delete_product),
+        Benchmark('ProductQueries.get_all_suppliers', ProductQueries.get_all_suppliers, uncached),
+        Benchmark('ProductQueries.get_all_categories', ProductQueries.get_all_categories, uncached),
+        Benchmark('ProductQueries.get_all_units', ProductQueries.get_all_units, uncached),
+
+        Benchmark('OrderQueries.get_all_orders', OrderQueries.get_all_orders),
+        Benchmark('OrderQueries.get_orders_page[first]', lambda: OrderQueries.get_orders_page(limit=100)),
+        Benchmark('OrderQueries.get_orders_page[next]',
+                  lambda: OrderQueries.get_orders_page(first_key, limit=100)),
+        Benchmark('OrderQueries.get_orders_page[client]',
+                  lambda: OrderQueries.get_orders_page(limit=100, sort='client_name', descending=False,
+                                                       filters={'status': 'Новый', 'client': 'иван'})),
+        Benchmark('OrderQueries.get_orders_by_ids', lambda: OrderQueries.get_orders_by_ids(order_ids)),
+        Benchmark('OrderQueries.get_order_by_id', lambda: OrderQueries.get_order_by_id(order_id)),
+        Benchmark('OrderQueries.add_order', add_order),
+        Benchmark('OrderQueries.update_order', update_order),
+        Benchmark('OrderQueries.delete_order', delete_order),
+        Benchmark('OrderQueries.get_all_pickup_points', OrderQueries.get_all_pickup_points, uncached),
+        Benchmark('OrderQueries.get_all_statuses', OrderQueries.get_all_statuses, uncached),
+    ]
+
+
+def wait_until(app, condition, timeout=120):
+    """Обрабатывать события Qt, пока condition() не станет истинным"""
+    from PyQt6.QtCore import QEventLoop
+
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise TimeoutError('Превышено время ожидания фоновой загрузки')
+        app.processEvents(QEventLoop.ProcessEventsFlag.AllEvents, 50)
+
+
+def catalog_benchmarks(app):
+    """
+    Замеры окна каталога без экрана (QT_QPA_PLATFORM=offscreen): создание
+    окна с первой отрисовкой сетки карточек и ProductsWindow.apply_filters
+
+    Args:
+        app: QApplication (создается вызывающим кодом до импорта окон)
+    """
+    from views.products_window import ProductsWindow
+
+    user = UserQueries.authenticate(BENCH_LOGIN, BENCH_PASSWORD)
+    windows = []
+
+    def idle(window):
+        # Фильтрация замеряется после построения триграммного индекса
+        index = window.search_index
+        return (window.catalog_mode is not None and window.filter_task is None
+                and not window.runner.is_busy() and not window.products_model.loading
+                and (index is None or index.postings is not None))
+
+    def open_window():
+        window = ProductsWindow(user, None)
+        window.show()
+        wait_until(app, lambda: idle(window))
+        # Отрисовка видимых карточек
+        window.products_view.viewport().grab()
+        windows.append(window)
+
+    def close_windows():
+        while windows:
+            window = windows.pop()
+            window.close()
+            window.deleteLater()
+        app.processEvents()
+
+    open_window()
+    window = windows[0]
+
+    def apply_filters(text):
+        def run():
+            window.search_input.blockSignals(True)
+            window.search_input.setText(text)
+            window.search_input.blockSignals(False)
+            window.apply_filters()
+            wait_until(app, lambda: idle(window))
+        return run
+
+    benchmarks = []
+    for label, text in (('empty', ''), ('short', 'бо'), ('word', 'ботинки'), ('article', article(42))):
+        benchmarks.append(Benchmark(f'ProductsWindow.apply_filters[{label}]', apply_filters(text)))
+    # Перед каждым созданием окна закрываются предыдущие
+    benchmarks.append(Benchmark('ProductsWindow.init[grid]', open_window, close_windows))
+    return benchmarks
+
+
+def write_import_files(directory, rows):
+    """
+    Excel-файлы в формате excel_data/ для замеров импорта
+    (товары - также в CSV и, если установлен pyarrow, в Parquet;
+    заказы - также в CSV с датами ISO)
+
+    Returns:
+        (словарь путей в формате import_from_excel.input_files()
+        и пути products_csv, products_parquet (если файл записан), orders_csv,
+        словарь ключей строк каждого файла для проверки загрузки:
+        адреса, логины, артикулы, номера заказов)
+    """
+    import random
+    import pandas as pd
+    from benchmarks.datagen import (pickup_point_rows, user_rows, product_rows,
+                                    LAST_NAMES, FIRST_NAMES, STATUSES)
+
+    rng = random.Random(2)
+    paths = {name: os.path.join(directory, f'{name}.xlsx')
+             for name in ('pickup_points', 'users', 'products', 'orders')}
+
+    keys = {}
+
+    pickup_points = list(pickup_point_rows(rows))
+    keys['pickup_points'] = [address for address, in pickup_points]
+    pd.DataFrame(pickup_points).to_excel(paths['pickup_points'], header=False, index=False)
+
+    users = list(user_rows(rng, rows))
+    keys['users'] = [row[2] for row in users]
+    pd.DataFrame(users, columns=['Роль', 'ФИО', 'Логин', 'Пароль']).to_excel(paths['users'], index=False)
+
+    products = []
+    for row in product_rows(rng, rows):
+        article_, name, unit, price, provider, category, discount, count, description, image = row
+        products.append((article_, name, unit, price, provider, provider, category,
+                         discount, count, description, image))
+    keys['products'] = [row[0] for row in products]
+    products = pd.DataFrame(products, columns=['Артикул', 'Наименование', 'Единица измерения', 'Цена',
+                                               'Поставщик', 'Производитель', 'Категория', 'Скидка',
+                                               'Количество', 'Описание', 'Фото'])
+    products.to_excel(paths['products'], index=False)
+    paths['products_csv'] = os.path.join(directory, 'products.csv')
+    products.to_csv(paths['products_csv'], index=False)
+    try:
+        import pyarrow  # noqa: F401 - нужен pandas для записи Parquet
+    except ImportError:
+        print("  pyarrow не установлен: замер импорта из Parquet пропущен")
+    else:
+        paths['products_parquet'] = os.path.join(directory, 'products.parquet')
+        products.to_parquet(paths['products_parquet'], index=False)
+
+    orders = []
+    start = date(2023, 1, 1)
+    for i in range(rows):
+        created = start + timedelta(days=rng.randint(0, 700))
+        items = ', '.join(f'{article(rng.randrange(rows))}, {rng.randint(1, 3)}'
+                          for _ in range(rng.randint(1, 4)))
+        orders.append((i + 1, items, created, created + timedelta(days=rng.randint(1, 14)),
+                       rng.randint(1, 10), f'{rng.choice(LAST_NAMES)} {rng.choice(FIRST_NAMES)}',
+                       rng.randint(100, 999), rng.choice(STATUSES)))
+    orders = pd.DataFrame(orders, columns=['Номер заказа', 'Артикул заказа', 'Дата заказа', 'Дата доставки',
+                                           'Адрес пункта выдачи', 'ФИО', 'Код для получения',
+                                           'Статус заказа'])
+    dates = ['Дата заказа', 'Дата доставки']
+    # В Excel даты - строками "дд.мм.гггг", в CSV - в ISO "гггг-мм-дд"
+    orders.assign(**{column: orders[column].map(lambda d: d.strftime('%d.%m.%Y')) for column in dates}) \
+        .to_excel(paths['orders'], index=False)
+    paths['orders_csv'] = os.path.join(directory, 'orders.csv')
+    orders.assign(**{column: orders[column].map(date.isoformat) for column in dates}) \
+        .to_csv(paths['orders_csv'], index=False)
+    keys['orders'] = orders['Номер заказа'].tolist()
+    return paths, keys
+
+
+def import_benchmarks(rows):
+    """
+    Замеры функций import_from_excel на сгенерированных файлах
+
+    Args:
+        rows: Строк в каждом файле
+    """
+    import import_from_excel
+    from importer.readers import CHUNK_ROWS
+
+    directory = tempfile.mkdtemp(prefix='shop_bench_')
+    paths, keys = write_import_files(directory, rows)
+
+    def quiet(func, *args):
+        # Вывод импорта (отклоненные строки, итоги) не нужен в замерах
+        def run():
+            with contextlib.redirect_stdout(io.StringIO()):
+                func(*args)
+        return run
+
+    def loaded(table, column, name):
+        # Без проверки сбой импорта был бы записан как быстрый успешный замер
+        def check():
+            expected = set(keys[name])
+            with db.connection() as conn:
+                with conn.cursor() as cursor:
+                    cursor.execute(f"SELECT COUNT(DISTINCT {column}) FROM {table} WHERE {column} = ANY(%s)",
+                                   (list(expected),))
+                    found = cursor.fetchone()[0]
+            if found != len(expected):
+                raise RuntimeError(f"в {table} загружено {found} строк из {len(expected)}")
+        return check
+
+    def forget_imported_orders():
+        # Иначе повторный запуск пропустит файл по контрольной точке
+        # и заказы по номерам
+        with db.connection() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute('DELETE FROM "order" WHERE order_number IS NOT NULL')
+                cursor.execute("DELETE FROM import_checkpoints")
+            conn.commit()
+
+    pickup_points_loaded = loaded('pickup_points', 'full_address', 'pickup_points')
+    users_loaded = loaded('users', 'login', 'users')
+    products_loaded = loaded('products', 'article', 'products')
+    orders_loaded = loaded('"order"', 'order_number', 'orders')
+
+    benchmarks = [
+        Benchmark('import_pickup_points', quiet(import_from_excel.import_pickup_points, paths['pickup_points']),
+                  check=pickup_points_loaded),
+        Benchmark('import_users', quiet(import_from_excel.import_users, paths['users']), check=users_loaded),
+        Benchmark('import_products', quiet(import_from_excel.import_products, paths['products']),
+                  check=products_loaded),
+        Benchmark('import_products[row_by_row]',
+                  quiet(import_from_excel.import_products, paths['products'], False), check=products_loaded),
+        Benchmark('import_products[stream]',
+                  quiet(import_from_excel.import_products, paths['products'], True, CHUNK_ROWS),
+                  check=products_loaded),
+        Benchmark('import_products[csv]', quiet(import_from_excel.import_products, paths['products_csv']),
+                  check=products_loaded),
+        Benchmark('import_orders', quiet(import_from_excel.import_orders, paths['orders']),
+                  forget_imported_orders, orders_loaded),
+        Benchmark('import_orders[csv]', quiet(import_from_excel.import_orders, paths['orders_csv']),
+                  forget_imported_orders, orders_loaded),
+    ]
+    if 'products_parquet' in paths:
+        benchmarks.insert(-2, Benchmark('import_products[parquet]',
+                                        quiet(import_from_excel.import_products, paths['products_parquet']),
+                                        check=products_loaded))
+    return benchmarks
@@ -1,10 +1,56 @@
 
 DB_CONFIG = {
+    # СУБД: 'postgresql' или 'sqlite' - встроенная база в локальном файле
+    # sqlite_path (без сервера; уведомления об изменениях не работают)
+    'backend': 'postgresql',
+    'sqlite_path': 'data/shop.db',
     'host': 'localhost',
     'port': 5432,
     'database': 'shop',
     'user': 'postgres',
-    'password': '123'
+    'password': '123',
+    # Пул подключений: минимальное и максимальное число соединений.
+    # Пул держит открытыми не больше pool_min_size свободных соединений
+    # (остальные закрываются при возврате), а подготовленные запросы
+    # живут, пока открыто соединение
+    'pool_min_size': 4,
+    'pool_max_size': 10,
+    # Сколько секунд ждать свободное подключение из пула
+    'pool_timeout': 30,
+    # Проверять подключение (SELECT 1), если оно простаивало дольше N секунд
+    'pool_check_idle': 30,
+    # Подготовленные запросы (PREPARE/EXECUTE, см. database/prepared.py):
+    # запрос подготавливается на соединении с prepare_threshold-го выполнения
+    'prepare_statements': True,
+    'prepare_threshold': 2,
+    'prepared_per_connection': 100,
+}
+
+# Кэш результатов справочных запросов (см. database/cache.py)
+CACHE_CONFIG = {
+    'enabled': True,
+    # Максимальное число запомненных результатов
+    'max_entries': 256,
+    # Срок жизни результата (секунды): изменения с других рабочих мест
+    # становятся видны не позже, чем через это время
+    'ttl': 60,
+    # Как часто сверять версии таблиц, измененных другими процессами
+    # (импорт, обслуживание базы), секунды
+    'sync_interval': 5,
+}
+
+# Статистика запросов и журнал медленных запросов (см. database/instrumentation.py)
+INSTRUMENTATION_CONFIG = {
+    'enabled': False,
+    # Порог медленного запроса (мс)
+    'slow_query_ms': 200,
+    # План EXPLAIN (ANALYZE, BUFFERS) для медленных SELECT: не чаще раза
+    # в explain_interval секунд на запрос (запрос выполняется повторно)
+    'explain_slow': True,
+    'explain_interval': 60,
+    'slow_log_size': 100,
+    # Куда сохранять отчет при выходе из приложения
+    'report_path': 'cache/query_stats.json',
 }
 
 APP_CONFIG = {
@@ -13,6 +59,25 @@ APP_CONFIG = {
     'window_height': 800,
     'image_max_width': 300,
     'image_max_height': 200,
+    # Сколько товаров загружать за один запрос при прокрутке каталога
+    'products_page_size': 40,
+    # Сколько заказов загружать за один запрос при прокрутке списка
+    'orders_page_size': 100,
+    # До какого размера каталог загружается целиком и фильтруется в памяти
+    'in_memory_catalog_limit': 100000,
+    # Задержка поиска после последнего нажатия клавиши (мс)
+    'search_debounce_ms': 200,
+    # Поиск на сервере для большого каталога: 'substring' или 'fulltext'
+    'server_search_mode': 'substring',
+    'search_result_limit': 500,
+    # Если по уведомлениям изменилось больше строк, список перезагружается целиком
+    'change_reload_limit': 500,
+    # Миниатюры фото товаров: папка дискового кэша и лимит кэша в памяти (КБ)
+    'thumbnail_cache_dir': 'cache/thumbnails',
+    'thumbnail_memory_kb': 20480,
+    # Локальная копия каталога для быстрого входа (только PostgreSQL)
+    'catalog_snapshot': True,
+    'catalog_snapshot_path': 'cache/catalog_snapshot.db',
 }
 
 # Цвета для подсветки товаров
@@ -28,3 +93,16 @@ RESOURCES = {
     'placeholder_image': 'resources/images/picture.png',
     'logo': 'resources/images/icon.ico',
 }
+
+# Замеры производительности (см. benchmarks/): отдельная одноразовая база
+# на том же сервере, что и DB_CONFIG (пересоздается при генерации данных)
+BENCHMARK_CONFIG = {
+    'database': 'shop_bench',
+    # Сколько раз выполнять каждый замер (в отчет идут медиана и минимум)
+    'repeat': 5,
+    # Регрессия - медиана хуже базовой больше чем на эту долю
+    'regression_threshold': 0.2,
+    # Строк в сгенерированных Excel-файлах для замеров импорта
+    'import_rows': 10000,
+    'results_dir': 'benchmarks/results',
+}
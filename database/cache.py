@@ -0,0 +1,199 @@
+"""
+Кэш результатов запросов к базе данных
+
+Результаты запросов, выполненных с cached=True (см.
+DatabaseConnection.execute_query), хранятся по ключу (запрос, параметры)
+ограниченное время и в ограниченном количестве (вытесняются давно не
+использованные). Каждая запись помечена таблицами, из которых читает
+запрос; запись в любую из этих таблиц через execute_query/execute_one
+удаляет помеченные записи.
+
+Запись в обход execute_query (импорт, python -m database.maintenance,
+перенос в SQLite) увеличивает версии таблиц в cache_versions
+(bump_versions) в той же транзакции. Процессы приложения сверяют эти
+версии не чаще раза в CACHE_CONFIG['sync_interval'] секунд (sync) и
+удаляют результаты таблиц с новой версией - в том числе для встроенной
+базы, где нет уведомлений об изменениях (utils/change_listener.py).
+"""
+import re
+import threading
+import time
+from collections import OrderedDict
+from config import CACHE_CONFIG
+
+
+# Таблицы, из которых читает запрос
+READ_TABLES = re.compile(r'\b(?:FROM|JOIN)\s+("?\w+"?)', re.IGNORECASE)
+
+# Таблицы, в которые пишет запрос (DO UPDATE в ON CONFLICT не считается)
+WRITE_TABLES = re.compile(r'\b(?:INSERT\s+INTO|(?<!DO )UPDATE|DELETE\s+FROM)\s+("?\w+"?)',
+                          re.IGNORECASE)
+
+# Значение отсутствует в кэше
+MISSING = object()
+
+# Общие версии таблиц (миграция 010_cache_versions)
+SHARED_VERSIONS = "SELECT table_name, version FROM cache_versions"
+
+BUMP_VERSION = """
+    INSERT INTO cache_versions (table_name, version) VALUES (%s, 1)
+    ON CONFLICT (table_name) DO UPDATE SET version = cache_versions.version + 1
+"""
+
+
+def table_names(pattern, query):
+    """Имена таблиц запроса (без кавычек, в нижнем регистре)"""
+    return frozenset(name.strip('"').lower() for name in pattern.findall(query))
+
+
+def tables_read(query):
+    return table_names(READ_TABLES, query)
+
+
+def tables_written(query):
+    return table_names(WRITE_TABLES, query)
+
+
+def make_key(query, params):
+    """Ключ кэша для запроса с параметрами (None, если параметры не хэшируются)"""
+    if isinstance(params, dict):
+        params = tuple(sorted(params.items()))
+    elif isinstance(params, list):
+        params = tuple(params)
+
+    key = (query, params)
+    try:
+        hash(key)
+    except TypeError:
+        return None
+    return key
+
+
+def bump_versions(cursor, tables):
+    """
+    Отметить запись в таблицы, выполненную в обход execute_query
+
+    Версии увеличиваются в транзакции курсора (фиксирует вызывающий код),
+    результаты этих таблиц в кэше текущего процесса удаляются сразу.
+
+    Args:
+        cursor: Курсор psycopg2 или встроенной базы
+        tables: Имена таблиц (без кавычек)
+    """
+    tables = frozenset(tables)
+    for table in sorted(tables):
+        cursor.execute(BUMP_VERSION, (table,))
+    query_cache.invalidate(tables)
+
+
+class QueryCache:
+    """Кэш результатов запросов: срок жизни, LRU-вытеснение и метки таблиц"""
+
+    def __init__(self, max_entries=256, ttl=60, enabled=True, sync_interval=5):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.enabled = enabled
+        self.sync_interval = sync_interval
+        # Версии cache_versions при последней сверке и ее время
+        self.shared_versions = {}
+        self.synced_at = None
+        # ключ -> (время устаревания, таблицы, строки)
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        # Увеличивается при каждой инвалидации: результат запроса, начатого
+        # до записи в таблицы, не должен попасть в кэш после нее
+        self.version = 0
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get(self, key):
+        """
+        Найти результат в кэше
+
+        Returns:
+            (строки или MISSING, версия кэша для последующего put)
+        """
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                expires, _, rows = entry
+                if expires > time.monotonic():
+                    self.entries.move_to_end(key)
+                    self.hits += 1
+                    return list(rows), self.version
+                del self.entries[key]
+
+            self.misses += 1
+            return MISSING, self.version
+
+    def put(self, key, rows, tables, version):
+        """Сохранить результат запроса, если с момента get не было записи"""
+        with self.lock:
+            if version != self.version:
+                return
+            self.entries[key] = (time.monotonic() + self.ttl, tables, tuple(rows))
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def invalidate(self, tables):
+        """Удалить результаты запросов, читающих указанные таблицы"""
+        if not tables:
+            return
+
+        with self.lock:
+            self.version += 1
+            stale = [key for key, (_, tags, _) in self.entries.items() if tags & tables]
+            for key in stale:
+                del self.entries[key]
+            self.invalidations += len(stale)
+
+    def sync_due(self):
+        """Пора ли сверить общие версии таблиц (отмечает начало сверки)"""
+        with self.lock:
+            now = time.monotonic()
+            if self.synced_at is not None and now - self.synced_at < self.sync_interval:
+                return False
+            self.synced_at = now
+            return True
+
+    def sync(self, versions):
+        """
+        Удалить результаты таблиц, версии которых изменились с прошлой сверки
+
+        Args:
+            versions: Словарь таблица -> версия из cache_versions
+        """
+        with self.lock:
+            known, self.shared_versions = self.shared_versions, versions
+        self.invalidate(frozenset(table for table, version in versions.items()
+                                  if known.get(table) != version))
+
+    def clear(self):
+        """Очистить кэш (версии таблиц сверяются заново при следующем чтении)"""
+        with self.lock:
+            self.version += 1
+            self.entries.clear()
+            self.shared_versions = {}
+            self.synced_at = None
+
+    def stats(self):
+        """Счетчики кэша"""
+        with self.lock:
+            requests = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / requests if requests else 0.0,
+                'invalidations': self.invalidations,
+                'size': len(self.entries),
+            }
+
+
+query_cache = QueryCache(
+    max_entries=CACHE_CONFIG.get('max_entries', 256),
+    ttl=CACHE_CONFIG.get('ttl', 60),
+    enabled=CACHE_CONFIG.get('enabled', True),
+    sync_interval=CACHE_CONFIG.get('sync_interval', 5),
+)
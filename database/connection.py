@@ -1,45 +1,130 @@
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
 import psycopg2
+from psycopg2 import pool
+from psycopg2.extensions import TRANSACTION_STATUS_IDLE
 from psycopg2.extras import RealDictCursor
-from config import DB_CONFIG
+from config import DB_CONFIG, INSTRUMENTATION_CONFIG
+from database import sqlite
+from database.cache import (MISSING, SHARED_VERSIONS, make_key, query_cache, tables_read,
+                            tables_written)
+from database.instrumentation import caller_name, instrumentation
+from database.prepared import prepared_statements
 
 
 class DatabaseConnection:
-    """Класс для управления подключением к базе данных PostgreSQL"""
+    """Класс для управления подключениями к базе данных
+
+    Каждый поток получает собственное соединение на время работы с ним
+    (см. connection()), поэтому запросы из фоновых потоков не мешают
+    потоку интерфейса. Выдачу соединений и выполнение запросов реализуют
+    подклассы для конкретной СУБД (DB_CONFIG['backend']): PostgresDatabase
+    и SQLiteDatabase.
+    """
 
     _instance = None
-    _connection = None
+    # Диалект SQL: 'postgresql' или 'sqlite'
+    dialect = None
 
     def __new__(cls):
-        """Singleton паттерн - одно подключение на все приложение"""
+        """Singleton паттерн - одно подключение к базе на все приложение"""
         if cls._instance is None:
             cls._instance = super().__new__(cls)
+            cls._instance._lock = threading.Lock()
+            cls._instance._local = threading.local()
+            cls._instance._setup()
         return cls._instance
 
+    def _setup(self):
+        """Начальное состояние экземпляра (вызывается один раз)"""
+
     def connect(self):
-        """Установить подключение к базе данных"""
-        try:
-            if self._connection is None or self._connection.closed:
-                self._connection = psycopg2.connect(
-                    host=DB_CONFIG['host'],
-                    port=DB_CONFIG['port'],
-                    database=DB_CONFIG['database'],
-                    user=DB_CONFIG['user'],
-                    password=DB_CONFIG['password'],
-                    cursor_factory=RealDictCursor
-                )
-                print("Подключение к базе данных установлено")
-            return self._connection
-        except Exception as e:
-            print(f"Ошибка подключения к БД: {e}")
-            raise
+        """Подключиться к базе данных и проверить соединение"""
+        raise NotImplementedError
 
     def disconnect(self):
-        """Закрыть подключение к базе данных"""
-        if self._connection and not self._connection.closed:
-            self._connection.close()
-            print("Подключение к базе данных закрыто")
+        """Закрыть подключения и вывести статистику запросов"""
+        stats = query_cache.stats()
+        if stats['hits'] or stats['misses']:
+            print(f"Кэш запросов: попаданий {stats['hits']}, промахов {stats['misses']} "
+                  f"({stats['hit_rate']:.0%}), инвалидировано {stats['invalidations']}")
+
+        if instrumentation.enabled and INSTRUMENTATION_CONFIG.get('report_path'):
+            try:
+                instrumentation.dump(INSTRUMENTATION_CONFIG['report_path'])
+            except OSError as e:
+                print(f"Не удалось сохранить статистику запросов: {e}")
+
+    @contextmanager
+    def connection(self):
+        """
+        Выдать соединение текущему потоку
+
+        Повторный вызов в том же потоке возвращает уже выданное соединение,
+        поэтому несколько запросов внутри одного блока with выполняются
+        на одном соединении. При выходе из внешнего блока незавершенная
+        транзакция откатывается, а соединение освобождается (для
+        PostgreSQL - возвращается в пул).
+
+        Пример:
+            with db.connection() as conn:
+                with conn.cursor() as cursor:
+                    cursor.execute(...)
+                conn.commit()
+        """
+        local = self._local
+        conn = getattr(local, 'conn', None)
+        if conn is not None:
+            local.depth += 1
+            try:
+                yield conn
+            finally:
+                local.depth -= 1
+            return
+
+        conn = self._checkout()
+        local.conn = conn
+        local.depth = 1
+        try:
+            yield conn
+        finally:
+            local.conn = None
+            local.depth = 0
+            self._release(conn)
+
+    def _checkout(self):
+        """Получить соединение для текущего потока"""
+        raise NotImplementedError
+
+    def _release(self, conn):
+        """Освободить соединение после выхода из внешнего блока connection()"""
+        raise NotImplementedError
+
+    def _execute(self, query, params, handler):
+        """Выполнить запрос и обработать результат функцией handler(conn, cursor)"""
+        raise NotImplementedError
+
+    def _explain(self, query, params):
+        """План запроса (для журнала медленных запросов)"""
+        raise NotImplementedError
+
+    def _sync_cache(self):
+        """Удалить из кэша результаты таблиц, измененных другими процессами"""
+        if not query_cache.sync_due():
+            return
+
+        try:
+            rows = self._execute(SHARED_VERSIONS, None, lambda conn, cursor: cursor.fetchall())
+        except Exception as e:
+            print(f"Ошибка чтения версий кэша: {e}")
+            return
+        query_cache.sync({row['table_name']: row['version'] for row in rows})
 
-    def execute_query(self, query, params=None, fetch=True):
+    def execute_query(self, query, params=None, fetch=True, cached=False, name=None):
         """
         Выполнить SQL запрос
 
@@ -47,48 +132,340 @@ class DatabaseConnection:
             query: SQL запрос
             params: Параметры запроса (tuple)
             fetch: Возвращать ли результат (True для SELECT)
+            cached: Брать результат из кэша запросов (для справочников,
+                    см. database/cache.py)
+            name: Имя запроса в статистике (по умолчанию - имя вызвавшей функции)
 
         Returns:
             Результат запроса или None
         """
-        try:
-            conn = self.connect()
-            with conn.cursor() as cursor:
-                cursor.execute(query, params)
+        key = None
+        if cached and fetch and query_cache.enabled:
+            key = make_key(query, params)
+        if key is not None:
+            self._sync_cache()
+            rows, version = query_cache.get(key)
+            if rows is not MISSING:
+                return rows
 
-                if fetch:
-                    result = cursor.fetchall()
-                    return result
-                else:
-                    conn.commit()
-                    return cursor.rowcount
+        def handler(conn, cursor):
+            if fetch:
+                return cursor.fetchall()
+            conn.commit()
+            query_cache.invalidate(tables_written(query))
+            return cursor.rowcount
 
+        instrumented = instrumentation.enabled
+        if instrumented:
+            name = name or caller_name()
+            started = time.perf_counter()
+
+        try:
+            rows = self._execute(query, params, handler)
         except Exception as e:
-            if self._connection:
-                self._connection.rollback()
             print(f"Ошибка выполнения запроса: {e}")
             raise
 
-    def execute_one(self, query, params=None):
+        if instrumented:
+            instrumentation.record(name, query, params, time.perf_counter() - started,
+                                   len(rows) if fetch else rows, self._explain)
+
+        if key is not None:
+            query_cache.put(key, rows, tables_read(query), version)
+        return rows
+
+    def execute_one(self, query, params=None, name=None):
         """
         Выполнить запрос и вернуть одну строку
 
         Args:
             query: SQL запрос
             params: Параметры запроса
+            name: Имя запроса в статистике (по умолчанию - имя вызвавшей функции)
 
         Returns:
             Одна строка результата или None
         """
+        written = tables_written(query)
+
+        def handler(conn, cursor):
+            result = cursor.fetchone()
+            # INSERT ... RETURNING тоже выполняется через execute_one:
+            # фиксируются только запросы с записью (чтение без COMMIT)
+            if written:
+                conn.commit()
+                query_cache.invalidate(written)
+            return result
+
+        instrumented = instrumentation.enabled
+        if instrumented:
+            name = name or caller_name()
+            started = time.perf_counter()
+
         try:
-            conn = self.connect()
-            with conn.cursor() as cursor:
-                cursor.execute(query, params)
-                return cursor.fetchone()
+            result = self._execute(query, params, handler)
         except Exception as e:
             print(f"Ошибка выполнения запроса: {e}")
             raise
 
+        if instrumented:
+            instrumentation.record(name, query, params, time.perf_counter() - started,
+                                   0 if result is None else 1, self._explain)
+        return result
+
+
+class PostgresDatabase(DatabaseConnection):
+    """Подключения к PostgreSQL
+
+    Подключения берутся из потокобезопасного пула.
+    """
+
+    dialect = 'postgresql'
+
+    def _setup(self):
+        self._pool = None
+        self._slots = None
+        self._last_used = {}
+
+    def connect(self):
+        """Создать пул подключений к базе данных и проверить соединение"""
+        with self._lock:
+            if self._pool is None or self._pool.closed:
+                try:
+                    min_size = DB_CONFIG.get('pool_min_size', 1)
+                    max_size = DB_CONFIG.get('pool_max_size', 10)
+                    self._pool = pool.ThreadedConnectionPool(
+                        min_size, max_size,
+                        host=DB_CONFIG['host'],
+                        port=DB_CONFIG['port'],
+                        database=DB_CONFIG['database'],
+                        user=DB_CONFIG['user'],
+                        password=DB_CONFIG['password'],
+                        cursor_factory=RealDictCursor
+                    )
+                    self._slots = threading.BoundedSemaphore(max_size)
+                    self._last_used = {}
+                    print("Подключение к базе данных установлено")
+                except Exception as e:
+                    print(f"Ошибка подключения к БД: {e}")
+                    raise
+
+        with self.connection():
+            pass
+        return self._pool
+
+    def disconnect(self):
+        """Закрыть все подключения пула"""
+        with self._lock:
+            if self._pool and not self._pool.closed:
+                self._pool.closeall()
+                print("Подключение к базе данных закрыто")
+
+        super().disconnect()
+
+        stats = prepared_statements.stats()
+        if stats['prepared']:
+            print(f"Подготовленные запросы: подготовлено {stats['prepared']}, "
+                  f"выполнено {stats['executed']} (повторно {stats['reused']})")
+
+    def _checkout(self):
+        """Взять соединение из пула, заменив неработающие новыми"""
+        if self._pool is None or self._pool.closed:
+            self.connect()
+
+        timeout = DB_CONFIG.get('pool_timeout', 30)
+        if not self._slots.acquire(timeout=timeout):
+            raise pool.PoolError("Нет свободных подключений к БД")
+
+        try:
+            attempts = DB_CONFIG.get('pool_max_size', 10) + 1
+            for _ in range(attempts):
+                conn = self._pool.getconn()
+                if self._is_healthy(conn):
+                    return conn
+                print("Соединение с БД потеряно, переподключение...")
+                self._pool.putconn(conn, close=True)
+            raise psycopg2.OperationalError("Не удалось восстановить подключение к БД")
+        except Exception:
+            self._slots.release()
+            raise
+
+    def _release(self, conn):
+        """Вернуть соединение в пул"""
+        try:
+            broken = bool(conn.closed)
+            if not broken and conn.info.transaction_status != TRANSACTION_STATUS_IDLE:
+                try:
+                    conn.rollback()
+                except psycopg2.Error:
+                    broken = True
+
+            if broken:
+                self._last_used.pop(id(conn), None)
+                prepared_statements.forget(conn)
+            else:
+                self._last_used[id(conn)] = time.monotonic()
+
+            if self._pool is not None and not self._pool.closed:
+                self._pool.putconn(conn, close=broken)
+        finally:
+            self._slots.release()
+
+    def _is_healthy(self, conn):
+        """Проверить соединение перед выдачей (SELECT 1 после простоя)"""
+        if conn.closed:
+            return False
+
+        idle_limit = DB_CONFIG.get('pool_check_idle', 30)
+        last_used = self._last_used.get(id(conn))
+        if last_used is not None and time.monotonic() - last_used < idle_limit:
+            return True
+
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute("SELECT 1")
+            conn.rollback()
+            return True
+        except psycopg2.Error:
+            return False
+
+    def _execute(self, query, params, handler):
+        """
+        Выполнить запрос и обработать результат функцией handler(conn, cursor)
+
+        Если соединение оборвалось во время выполнения запроса, запрос
+        повторяется один раз на новом соединении. Повтор не выполняется
+        внутри внешнего блока connection(), так как транзакция уже потеряна.
+        """
+        retries = 0 if getattr(self._local, 'conn', None) is not None else 1
+
+        while True:
+            with self.connection() as conn:
+                try:
+                    with conn.cursor() as cursor:
+                        try:
+                            prepared_statements.execute(cursor, query, params)
+                        except (psycopg2.OperationalError, psycopg2.InterfaceError):
+                            if retries and conn.closed:
+                                retries -= 1
+                                print("Соединение с БД потеряно, повтор запроса...")
+                                continue
+                            raise
+                        return handler(conn, cursor)
+                except Exception:
+                    if not conn.closed:
+                        conn.rollback()
+                    raise
+
+    def _explain(self, query, params):
+        """План запроса с фактическим выполнением (для журнала медленных запросов)"""
+        with self.connection() as conn:
+            with conn.cursor() as cursor:
+                # Точка сохранения: ошибка не прерывает транзакцию внешнего блока
+                cursor.execute("SAVEPOINT explain_query")
+                try:
+                    cursor.execute(f"EXPLAIN (ANALYZE, BUFFERS) {query}", params)
+                    return '\n'.join(row['QUERY PLAN'] for row in cursor.fetchall())
+                finally:
+                    cursor.execute("ROLLBACK TO SAVEPOINT explain_query")
+
+
+class SQLiteDatabase(DatabaseConnection):
+    """Встроенная база SQLite в локальном файле (DB_CONFIG['sqlite_path'])
+
+    Запросы в формате PostgreSQL переводятся на диалект SQLite (см.
+    database/sqlite.py). Каждый поток работает на собственном соединении
+    с файлом: соединение открывается при первом обращении потока и
+    закрывается в disconnect().
+    """
+
+    dialect = 'sqlite'
+
+    def _setup(self):
+        self._path = None
+        self._connections = []
+
+    def connect(self):
+        """Открыть файл базы (создав схему) и проверить соединение"""
+        with self._lock:
+            if self._path is None:
+                path = DB_CONFIG.get('sqlite_path', 'data/shop.db')
+                try:
+                    directory = os.path.dirname(path)
+                    if directory:
+                        os.makedirs(directory, exist_ok=True)
+                    conn = sqlite.connect(path, DB_CONFIG.get('pool_timeout', 30))
+                    try:
+                        sqlite.create_schema(conn)
+                    finally:
+                        conn.close()
+                    self._path = path
+                    print(f"Подключение к базе данных {path} установлено")
+                except (OSError, sqlite3.Error) as e:
+                    print(f"Ошибка подключения к БД: {e}")
+                    raise
+
+        with self.connection():
+            pass
+
+    def disconnect(self):
+        """Закрыть соединения всех потоков"""
+        with self._lock:
+            connections, self._connections = self._connections, []
+            opened, self._path = self._path is not None, None
+
+        for conn in connections:
+            if not conn.closed:
+                conn.close()
+        if opened:
+            print("Подключение к базе данных закрыто")
+
+        super().disconnect()
+
+    def _checkout(self):
+        """Соединение текущего потока (открывается при первом обращении)"""
+        if self._path is None:
+            self.connect()
+
+        conn = getattr(self._local, 'sqlite_conn', None)
+        if conn is None or conn.closed:
+            conn = sqlite.connect(self._path, DB_CONFIG.get('pool_timeout', 30),
+                                  DB_CONFIG.get('prepared_per_connection', 100))
+            self._local.sqlite_conn = conn
+            with self._lock:
+                self._connections.append(conn)
+        return conn
+
+    def _release(self, conn):
+        """Откатить незавершенную транзакцию (соединение остается у потока)"""
+        if not conn.closed and conn.in_transaction:
+            conn.rollback()
+
+    def _execute(self, query, params, handler):
+        """Выполнить запрос и обработать результат функцией handler(conn, cursor)"""
+        with self.connection() as conn:
+            try:
+                with conn.cursor() as cursor:
+                    cursor.execute(query, params)
+                    return handler(conn, cursor)
+            except Exception:
+                if not conn.closed:
+                    conn.rollback()
+                raise
+
+    def _explain(self, query, params):
+        """План запроса (EXPLAIN QUERY PLAN, без выполнения)"""
+        with self.connection() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute(f"EXPLAIN QUERY PLAN {query}", params)
+                return '\n'.join(row['detail'] for row in cursor.fetchall())
+
+
+# Реализации подключения для DB_CONFIG['backend']
+BACKENDS = {
+    'postgresql': PostgresDatabase,
+    'sqlite': SQLiteDatabase,
+}
 
 # Создаем глобальный экземпляр подключения
-db = DatabaseConnection()
+db = BACKENDS[DB_CONFIG.get('backend', 'postgresql')]()
@@ -0,0 +1,231 @@
+"""
+Статистика выполнения запросов
+
+При включенной статистике (INSTRUMENTATION_CONFIG['enabled']) для каждого
+именованного запроса учитываются число вызовов, строки, время и
+гистограмма задержек. Медленные запросы попадают в журнал вместе с
+параметрами и планом EXPLAIN (ANALYZE, BUFFERS) (только для SELECT).
+При выходе из приложения отчет сохраняется в файл, просмотр отчета:
+
+    python -m database.instrumentation [путь к отчету]
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import threading
+import time
+from collections import deque
+from config import INSTRUMENTATION_CONFIG
+
+
+# Верхние границы интервалов гистограммы задержек (мс)
+LATENCY_BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+# Запросы, для которых можно получить план с ANALYZE (без изменения данных)
+EXPLAINABLE = re.compile(r'^\s*SELECT\b', re.IGNORECASE)
+
+
+def caller_name(depth=2):
+    """Имя функции, вызвавшей execute_* (например, ProductQueries.get_products_page)"""
+    code = sys._getframe(depth).f_code
+    return getattr(code, 'co_qualname', code.co_name)
+
+
+class QueryStats:
+    """Статистика одного именованного запроса"""
+
+    def __init__(self):
+        self.calls = 0
+        self.rows = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.buckets = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+
+    def add(self, duration, rows):
+        self.calls += 1
+        self.rows += rows
+        self.total += duration
+        self.max = max(self.max, duration)
+
+        duration_ms = duration * 1000
+        for i, bound in enumerate(LATENCY_BUCKETS_MS):
+            if duration_ms <= bound:
+                self.buckets[i] += 1
+                break
+        else:
+            self.buckets[-1] += 1
+
+    def percentile(self, fraction):
+        """Оценка перцентиля по гистограмме (верхняя граница интервала, мс)"""
+        target = self.calls * fraction
+        seen = 0
+        for i, count in enumerate(self.buckets):
+            seen += count
+            if count and seen >= target:
+                return LATENCY_BUCKETS_MS[i] if i < len(LATENCY_BUCKETS_MS) else self.max * 1000
+        return 0.0
+
+    def as_dict(self):
+        return {
+            'calls': self.calls,
+            'rows': self.rows,
+            'total_ms': round(self.total * 1000, 3),
+            'avg_ms': round(self.total * 1000 / self.calls, 3) if self.calls else 0.0,
+            'max_ms': round(self.max * 1000, 3),
+            'p50_ms': self.percentile(0.5),
+            'p95_ms': self.percentile(0.95),
+            'histogram': dict(zip([f'<={bound}ms' for bound in LATENCY_BUCKETS_MS] + ['more'],
+                                  self.buckets)),
+        }
+
+
+class Instrumentation:
+    """Сбор статистики запросов и журнал медленных запросов"""
+
+    def __init__(self, enabled=False, slow_query_ms=200, explain_slow=True,
+                 explain_interval=60, slow_log_size=100):
+        """
+        Args:
+            enabled: Собирать ли статистику
+            slow_query_ms: Порог медленного запроса (мс)
+            explain_slow: Получать ли план медленных SELECT
+            explain_interval: Не чаще одного плана на запрос за столько секунд
+                              (EXPLAIN ANALYZE выполняет запрос повторно)
+            slow_log_size: Сколько последних медленных запросов хранить
+        """
+        self.enabled = enabled
+        self.slow_query = slow_query_ms / 1000
+        self.explain_slow = explain_slow
+        self.explain_interval = explain_interval
+        self.stats = {}
+        self.slow_log = deque(maxlen=slow_log_size)
+        self.last_explained = {}
+        self.lock = threading.Lock()
+
+    def record(self, name, query, params, duration, rows, explain=None):
+        """
+        Учесть выполнение запроса
+
+        Args:
+            name: Имя запроса
+            query: Текст запроса
+            params: Параметры запроса
+            duration: Время выполнения (секунды)
+            rows: Число строк результата (или измененных строк)
+            explain: Функция explain(query, params) -> текст плана (для медленных SELECT)
+        """
+        with self.lock:
+            stats = self.stats.get(name)
+            if stats is None:
+                stats = self.stats[name] = QueryStats()
+            stats.add(duration, rows)
+
+        if duration < self.slow_query:
+            return
+
+        plan = None
+        if explain is not None and self.explain_slow and EXPLAINABLE.match(query):
+            now = time.monotonic()
+            with self.lock:
+                last = self.last_explained.get(name)
+                due = last is None or now - last >= self.explain_interval
+                if due:
+                    self.last_explained[name] = now
+            if due:
+                try:
+                    plan = explain(query, params)
+                except Exception as e:
+                    plan = f"Не удалось получить план: {e}"
+
+        entry = {
+            'name': name,
+            'at': time.strftime('%Y-%m-%d %H:%M:%S'),
+            'duration_ms': round(duration * 1000, 3),
+            'rows': rows,
+            'query': ' '.join(query.split()),
+            'params': repr(params),
+            'plan': plan,
+        }
+        with self.lock:
+            self.slow_log.append(entry)
+        print(f"Медленный запрос {name}: {entry['duration_ms']} мс")
+
+    def report(self):
+        """Отчет: статистика запросов (по убыванию общего времени) и медленные запросы"""
+        with self.lock:
+            queries = {name: stats.as_dict() for name, stats in self.stats.items()}
+            slow = list(self.slow_log)
+        ordered = dict(sorted(queries.items(), key=lambda item: item[1]['total_ms'], reverse=True))
+        return {'queries': ordered, 'slow_queries': slow}
+
+    def reset(self):
+        """Очистить статистику"""
+        with self.lock:
+            self.stats.clear()
+            self.slow_log.clear()
+            self.last_explained.clear()
+
+    def dump(self, path):
+        """Сохранить отчет в JSON-файл"""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.report(), f, ensure_ascii=False, indent=2)
+
+
+def format_report(report):
+    """Текстовое представление отчета"""
+    lines = [f"{'Запрос':<50} {'вызовов':>8} {'строк':>9} {'всего мс':>10} "
+             f"{'сред.':>8} {'p95':>8} {'макс.':>9}"]
+    for name, stats in report['queries'].items():
+        lines.append(f"{name[:50]:<50} {stats['calls']:>8} {stats['rows']:>9} "
+                     f"{stats['total_ms']:>10.1f} {stats['avg_ms']:>8.2f} "
+                     f"{stats['p95_ms']:>8} {stats['max_ms']:>9.1f}")
+
+    if report['slow_queries']:
+        lines.append('')
+        lines.append(f"Медленные запросы ({len(report['slow_queries'])}):")
+        for entry in report['slow_queries']:
+            lines.append(f"  [{entry['at']}] {entry['name']}: {entry['duration_ms']} мс, "
+                         f"строк {entry['rows']}")
+            lines.append(f"    {entry['query']}")
+            lines.append(f"    параметры: {entry['params']}")
+            if entry['plan']:
+                lines.extend(f"    | {line}" for line in entry['plan'].splitlines())
+    return '\n'.join(lines)
+
+
+instrumentation = Instrumentation(
+    enabled=INSTRUMENTATION_CONFIG.get('enabled', False),
+    slow_query_ms=INSTRUMENTATION_CONFIG.get('slow_query_ms', 200),
+    explain_slow=INSTRUMENTATION_CONFIG.get('explain_slow', True),
+    explain_interval=INSTRUMENTATION_CONFIG.get('explain_interval', 60),
+    slow_log_size=INSTRUMENTATION_CONFIG.get('slow_log_size', 100),
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Отчет о выполнении запросов')
+    parser.add_argument('path', nargs='?', default=INSTRUMENTATION_CONFIG.get('report_path'),
+                        help='файл отчета (сохраняется при выходе из приложения)')
+    parser.add_argument('--json', action='store_true', help='вывести отчет в JSON')
+    args = parser.parse_args()
+
+    try:
+        with open(args.path, encoding='utf-8') as f:
+            report = json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"Не удалось прочитать отчет {args.path}: {e}")
+        sys.exit(1)
+
+    if args.json:
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+    else:
+        print(format_report(report))
+
+
+if __name__ == '__main__':
+    main()
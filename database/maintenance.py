@@ -0,0 +1,90 @@
+"""
+Обслуживание базы данных
+
+Проверка итогов заказов (items_count, total_amount) по составу заказов:
+
+    python -m database.maintenance check-order-totals
+    python -m database.maintenance check-order-totals --fix
+"""
+import argparse
+from database.cache import bump_versions
+from database.connection import db
+
+
+# Заказы, у которых сохраненные итоги расходятся с составом
+ORDER_TOTALS_MISMATCH = """
+    SELECT o.id as order_id,
+           o.items_count, o.total_amount,
+           COALESCE(s.items_count, 0) as actual_items_count,
+           COALESCE(s.total_amount, 0) as actual_total_amount
+    FROM "order" o
+    LEFT JOIN (
+        SELECT order_id, COUNT(goods_id) as items_count, SUM(total_price) as total_amount
+        FROM order_items
+        GROUP BY order_id
+    ) s ON s.order_id = o.id
+    WHERE o.items_count <> COALESCE(s.items_count, 0)
+       OR o.total_amount <> COALESCE(s.total_amount, 0)
+    ORDER BY o.id
+"""
+
+
+def check_order_totals(fix=False):
+    """
+    Сверить итоги заказов с составом заказов
+
+    Args:
+        fix: Исправить расхождения
+
+    Returns:
+        Список заказов с расхождениями
+    """
+    mismatches = db.execute_query(ORDER_TOTALS_MISMATCH)
+
+    if fix and mismatches:
+        with db.connection() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute(f"""
+                    UPDATE "order" AS o SET
+                        items_count = m.actual_items_count,
+                        total_amount = m.actual_total_amount
+                    FROM ({ORDER_TOTALS_MISMATCH}) m
+                    WHERE o.id = m.order_id
+                """)
+                # Приложение, запущенное на этой базе, сбросит кэш заказов
+                bump_versions(cursor, {'order'})
+            conn.commit()
+
+    return mismatches
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Обслуживание базы данных')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    totals = commands.add_parser('check-order-totals',
+                                 help='сверить количество позиций и суммы заказов с их составом')
+    totals.add_argument('--fix', action='store_true', help='исправить расхождения')
+
+    args = parser.parse_args()
+
+    db.connect()
+    try:
+        if args.command == 'check-order-totals':
+            mismatches = check_order_totals(args.fix)
+            for row in mismatches:
+                print(f"Заказ #{row['order_id']}: позиций {row['items_count']} "
+                      f"(по составу {row['actual_items_count']}), сумма {row['total_amount']} "
+                      f"(по составу {row['actual_total_amount']})")
+            if not mismatches:
+                print("Расхождений не найдено")
+            elif args.fix:
+                print(f"Исправлено заказов: {len(mismatches)}")
+            else:
+                print(f"Заказов с расхождениями: {len(mismatches)} (для исправления: --fix)")
+    finally:
+        db.disconnect()
+
+
+if __name__ == '__main__':
+    main()
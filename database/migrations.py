@@ -0,0 +1,375 @@
+"""
+Миграции схемы базы данных
+
+Миграции применяются по порядку, имя каждой примененной миграции
+записывается в таблицу schema_migrations. Запуск вручную:
+
+    python -m database.migrations
+"""
+from database.connection import db
+
+
+# (имя, SQL) - новые миграции добавляются только в конец списка
+MIGRATIONS = [
+    ('001_products_keyset_indexes', """
+        CREATE INDEX IF NOT EXISTS products_name_id_idx
+            ON products (name, id);
+        CREATE INDEX IF NOT EXISTS products_count_name_id_idx
+            ON products (count, name, id);
+        CREATE INDEX IF NOT EXISTS products_provider_name_id_idx
+            ON products (provider, name, id);
+    """),
+    ('002_products_search', r"""
+        CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+        -- Текст всех полей поиска (поля разделены переводом строки)
+        ALTER TABLE products ADD COLUMN IF NOT EXISTS search_text TEXT
+            GENERATED ALWAYS AS (
+                LOWER(
+                    COALESCE(name, '') || E'\n' ||
+                    COALESCE(article, '') || E'\n' ||
+                    COALESCE(description, '') || E'\n' ||
+                    COALESCE(provider, '') || E'\n' ||
+                    COALESCE(category, '')
+                )
+            ) STORED;
+
+        -- Полнотекстовый вектор для ранжирования результатов
+        ALTER TABLE products ADD COLUMN IF NOT EXISTS search_vector TSVECTOR
+            GENERATED ALWAYS AS (
+                setweight(to_tsvector('russian', COALESCE(name, '')), 'A') ||
+                setweight(to_tsvector('simple', COALESCE(article, '')), 'A') ||
+                setweight(to_tsvector('russian', COALESCE(category, '') || ' ' ||
+                                                 COALESCE(provider, '')), 'B') ||
+                setweight(to_tsvector('russian', COALESCE(description, '')), 'C')
+            ) STORED;
+
+        CREATE INDEX IF NOT EXISTS products_search_text_trgm_idx
+            ON products USING GIN (search_text gin_trgm_ops);
+        CREATE INDEX IF NOT EXISTS products_search_vector_idx
+            ON products USING GIN (search_vector);
+    """),
+    ('003_change_notifications', """
+        -- Уведомление об измененной строке в канал table_changes:
+        -- {"table": ..., "op": ..., "id": ...}, где id - значение столбца,
+        -- переданного аргументом триггера
+        CREATE OR REPLACE FUNCTION notify_table_change() RETURNS TRIGGER AS $$
+        DECLARE
+            row_data JSONB;
+        BEGIN
+            IF TG_OP = 'DELETE' THEN
+                row_data := to_jsonb(OLD);
+            ELSE
+                row_data := to_jsonb(NEW);
+            END IF;
+
+            PERFORM pg_notify('table_changes', json_build_object(
+                'table', TG_TABLE_NAME,
+                'op', TG_OP,
+                'id', (row_data ->> TG_ARGV[0])::BIGINT
+            )::TEXT);
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql;
+
+        DROP TRIGGER IF EXISTS products_notify_change ON products;
+        CREATE TRIGGER products_notify_change
+            AFTER INSERT OR UPDATE OR DELETE ON products
+            FOR EACH ROW EXECUTE FUNCTION notify_table_change('id');
+
+        DROP TRIGGER IF EXISTS order_notify_change ON "order";
+        CREATE TRIGGER order_notify_change
+            AFTER INSERT OR UPDATE OR DELETE ON "order"
+            FOR EACH ROW EXECUTE FUNCTION notify_table_change('id');
+
+        -- Для состава заказа передается ID заказа
+        DROP TRIGGER IF EXISTS order_items_notify_change ON order_items;
+        CREATE TRIGGER order_items_notify_change
+            AFTER INSERT OR UPDATE OR DELETE ON order_items
+            FOR EACH ROW EXECUTE FUNCTION notify_table_change('order_id');
+    """),
+    ('004_orders_list_indexes', """
+        -- Сортировки и фильтры списка заказов (ключ + id для keyset-пагинации)
+        CREATE INDEX IF NOT EXISTS order_created_at_id_idx
+            ON "order" (created_at, id);
+        CREATE INDEX IF NOT EXISTS order_delivered_at_id_idx
+            ON "order" (delivered_at, id);
+        CREATE INDEX IF NOT EXISTS order_full_name_id_idx
+            ON "order" (full_name, id);
+        CREATE INDEX IF NOT EXISTS order_status_created_at_id_idx
+            ON "order" (status, created_at, id);
+        CREATE INDEX IF NOT EXISTS order_pick_up_created_at_id_idx
+            ON "order" (pick_up_id, created_at, id);
+
+        -- Поиск по подстроке ФИО клиента (ILIKE)
+        CREATE INDEX IF NOT EXISTS order_full_name_trgm_idx
+            ON "order" USING GIN (full_name gin_trgm_ops);
+
+        -- Состав заказа для строк страницы
+        CREATE INDEX IF NOT EXISTS order_items_order_id_idx
+            ON order_items (order_id);
+    """),
+    ('005_order_summary_columns', """
+        -- Количество позиций и сумма заказа хранятся в самом заказе
+        -- и поддерживаются триггером на order_items
+        ALTER TABLE "order"
+            ADD COLUMN IF NOT EXISTS items_count INTEGER NOT NULL DEFAULT 0,
+            ADD COLUMN IF NOT EXISTS total_amount NUMERIC NOT NULL DEFAULT 0;
+
+        UPDATE "order" o SET
+            items_count = s.items_count,
+            total_amount = s.total_amount
+        FROM (
+            SELECT order_id, COUNT(goods_id) AS items_count,
+                   COALESCE(SUM(total_price), 0) AS total_amount
+            FROM order_items
+            GROUP BY order_id
+        ) s
+        WHERE o.id = s.order_id;
+
+        CREATE OR REPLACE FUNCTION order_items_update_summary() RETURNS TRIGGER AS $$
+        BEGIN
+            IF TG_OP IN ('UPDATE', 'DELETE') THEN
+                UPDATE "order" SET
+                    items_count = items_count - (OLD.goods_id IS NOT NULL)::INTEGER,
+                    total_amount = total_amount - COALESCE(OLD.total_price, 0)
+                WHERE id = OLD.order_id;
+            END IF;
+
+            IF TG_OP IN ('INSERT', 'UPDATE') THEN
+                UPDATE "order" SET
+                    items_count = items_count + (NEW.goods_id IS NOT NULL)::INTEGER,
+                    total_amount = total_amount + COALESCE(NEW.total_price, 0)
+                WHERE id = NEW.order_id;
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql;
+
+        DROP TRIGGER IF EXISTS order_items_summary ON order_items;
+        CREATE TRIGGER order_items_summary
+            AFTER INSERT OR UPDATE OR DELETE ON order_items
+            FOR EACH ROW EXECUTE FUNCTION order_items_update_summary();
+    """),
+    ('006_products_row_versions', """
+        -- Время и версия последнего изменения товара для синхронизации
+        -- локальной копии каталога. Версия - номер транзакции изменения
+        -- (см. ProductQueries.get_products_changed_since)
+        ALTER TABLE products
+            ADD COLUMN IF NOT EXISTS updated_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+            ADD COLUMN IF NOT EXISTS row_version BIGINT NOT NULL DEFAULT txid_current();
+
+        CREATE INDEX IF NOT EXISTS products_row_version_idx
+            ON products (row_version);
+
+        -- Удаленные товары (ID не используются повторно)
+        CREATE TABLE IF NOT EXISTS products_deleted (
+            id BIGINT PRIMARY KEY,
+            deleted_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+            row_version BIGINT NOT NULL DEFAULT txid_current()
+        );
+        CREATE INDEX IF NOT EXISTS products_deleted_row_version_idx
+            ON products_deleted (row_version);
+
+        CREATE OR REPLACE FUNCTION products_touch() RETURNS TRIGGER AS $$
+        BEGIN
+            -- UPDATE без изменения данных (например, повторный импорт)
+            -- не меняет версию, и строка не передается при синхронизации
+            IF TG_OP = 'UPDATE' AND
+               (NEW.article, NEW.name, NEW.unit_of_measurement, NEW.price, NEW.provider,
+                NEW.category, NEW.discount, NEW.count, NEW.description, NEW.image)
+               IS NOT DISTINCT FROM
+               (OLD.article, OLD.name, OLD.unit_of_measurement, OLD.price, OLD.provider,
+                OLD.category, OLD.discount, OLD.count, OLD.description, OLD.image) THEN
+                RETURN NEW;
+            END IF;
+
+            NEW.updated_at := now();
+            NEW.row_version := txid_current();
+            RETURN NEW;
+        END;
+        $$ LANGUAGE plpgsql;
+
+        DROP TRIGGER IF EXISTS products_touch ON products;
+        CREATE TRIGGER products_touch
+            BEFORE INSERT OR UPDATE ON products
+            FOR EACH ROW EXECUTE FUNCTION products_touch();
+
+        CREATE OR REPLACE FUNCTION products_record_delete() RETURNS TRIGGER AS $$
+        BEGIN
+            INSERT INTO products_deleted (id) VALUES (OLD.id)
+            ON CONFLICT (id) DO UPDATE SET
+                deleted_at = now(),
+                row_version = txid_current();
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql;
+
+        DROP TRIGGER IF EXISTS products_record_delete ON products;
+        CREATE TRIGGER products_record_delete
+            AFTER DELETE ON products
+            FOR EACH ROW EXECUTE FUNCTION products_record_delete();
+    """),
+    ('007_products_content_hash', """
+        -- Хэш содержимого товара: при импорте обновляются только строки,
+        -- хэш которых отличается от хэша строки файла (importer/bulk.py).
+        -- Столбец вычисляемый, поэтому изменения из приложения тоже
+        -- меняют хэш
+        CREATE OR REPLACE FUNCTION products_content_hash(
+            article TEXT, name TEXT, unit_of_measurement TEXT, price NUMERIC,
+            provider TEXT, category TEXT, discount INTEGER, count INTEGER,
+            description TEXT, image TEXT
+        ) RETURNS TEXT AS $$
+            SELECT md5(ROW(article, name, unit_of_measurement, ROUND(price, 2), provider,
+                           category, discount, count, description, image)::TEXT)
+        $$ LANGUAGE sql IMMUTABLE;
+
+        ALTER TABLE products ADD COLUMN IF NOT EXISTS content_hash TEXT
+            GENERATED ALWAYS AS (
+                products_content_hash(article, name, unit_of_measurement, price, provider,
+                                      category, discount, count, description, image)
+            ) STORED;
+    """),
+    ('008_import_checkpoints', """
+        -- Номер заказа из файла импорта - естественный ключ: повторная
+        -- загрузка того же заказа пропускается (заказы, созданные
+        -- в приложении, номера не имеют). Заказы, загруженные раньше,
+        -- получают номер при следующем импорте файла: номера известны
+        -- только из файла (см. import_from_excel.order_match_key)
+        ALTER TABLE "order" ADD COLUMN IF NOT EXISTS order_number BIGINT;
+        CREATE UNIQUE INDEX IF NOT EXISTS order_order_number_key
+            ON "order" (order_number);
+
+        -- Контрольные точки импорта (importer/checkpoints.py)
+        CREATE TABLE IF NOT EXISTS import_checkpoints (
+            target TEXT NOT NULL,
+            fingerprint TEXT NOT NULL,
+            last_line INTEGER NOT NULL DEFAULT 0,
+            completed_at TIMESTAMP,
+            updated_at TIMESTAMP NOT NULL DEFAULT NOW(),
+            PRIMARY KEY (target, fingerprint)
+        );
+    """),
+    ('009_statement_change_notifications', """
+        -- Одно уведомление на оператор вместо уведомления на строку:
+        -- массовая загрузка (COPY, INSERT ... ON CONFLICT из импорта)
+        -- изменяет сотни тысяч строк одним оператором.
+        -- {"table": ..., "op": ..., "ids": [...]}; если строк больше 500
+        -- (APP_CONFIG['change_reload_limit']), ids = null - таблицу
+        -- нужно перезагрузить (и размер уведомления ограничен 8000 байт)
+        CREATE OR REPLACE FUNCTION notify_changed_ids(table_name TEXT, op TEXT, ids BIGINT[])
+        RETURNS VOID AS $$
+        BEGIN
+            IF ids IS NULL THEN
+                RETURN;
+            END IF;
+            PERFORM pg_notify('table_changes', json_build_object(
+                'table', table_name,
+                'op', op,
+                'ids', CASE WHEN cardinality(ids) <= 500 THEN to_json(ids) END
+            )::TEXT);
+        END;
+        $$ LANGUAGE plpgsql;
+
+        -- Строки оператора - таблица переходов changed_rows
+        CREATE OR REPLACE FUNCTION notify_rows_changed() RETURNS TRIGGER AS $$
+        BEGIN
+            PERFORM notify_changed_ids(TG_TABLE_NAME, TG_OP,
+                                       (SELECT array_agg(DISTINCT id) FROM changed_rows));
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql;
+
+        -- Для состава заказа передаются ID заказов
+        CREATE OR REPLACE FUNCTION notify_order_items_changed() RETURNS TRIGGER AS $$
+        BEGIN
+            PERFORM notify_changed_ids(TG_TABLE_NAME, TG_OP,
+                                       (SELECT array_agg(DISTINCT order_id) FROM changed_rows));
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql;
+
+        -- Таблица переходов задается только для триггера на одно событие
+        DROP TRIGGER IF EXISTS products_notify_change ON products;
+        CREATE TRIGGER products_notify_insert AFTER INSERT ON products
+            REFERENCING NEW TABLE AS changed_rows
+            FOR EACH STATEMENT EXECUTE FUNCTION notify_rows_changed();
+        CREATE TRIGGER products_notify_update AFTER UPDATE ON products
+            REFERENCING NEW TABLE AS changed_rows
+            FOR EACH STATEMENT EXECUTE FUNCTION notify_rows_changed();
+        CREATE TRIGGER products_notify_delete AFTER DELETE ON products
+            REFERENCING OLD TABLE AS changed_rows
+            FOR EACH STATEMENT EXECUTE FUNCTION notify_rows_changed();
+
+        DROP TRIGGER IF EXISTS order_notify_change ON "order";
+        CREATE TRIGGER order_notify_insert AFTER INSERT ON "order"
+            REFERENCING NEW TABLE AS changed_rows
+            FOR EACH STATEMENT EXECUTE FUNCTION notify_rows_changed();
+        CREATE TRIGGER order_notify_update AFTER UPDATE ON "order"
+            REFERENCING NEW TABLE AS changed_rows
+            FOR EACH STATEMENT EXECUTE FUNCTION notify_rows_changed();
+        CREATE TRIGGER order_notify_delete AFTER DELETE ON "order"
+            REFERENCING OLD TABLE AS changed_rows
+            FOR EACH STATEMENT EXECUTE FUNCTION notify_rows_changed();
+
+        DROP TRIGGER IF EXISTS order_items_notify_change ON order_items;
+        CREATE TRIGGER order_items_notify_insert AFTER INSERT ON order_items
+            REFERENCING NEW TABLE AS changed_rows
+            FOR EACH STATEMENT EXECUTE FUNCTION notify_order_items_changed();
+        CREATE TRIGGER order_items_notify_update AFTER UPDATE ON order_items
+            REFERENCING NEW TABLE AS changed_rows
+            FOR EACH STATEMENT EXECUTE FUNCTION notify_order_items_changed();
+        CREATE TRIGGER order_items_notify_delete AFTER DELETE ON order_items
+            REFERENCING OLD TABLE AS changed_rows
+            FOR EACH STATEMENT EXECUTE FUNCTION notify_order_items_changed();
+
+        DROP FUNCTION IF EXISTS notify_table_change();
+    """),
+    ('010_cache_versions', """
+        -- Версии таблиц для кэша запросов: импорт и обслуживание базы
+        -- увеличивают версию измененной таблицы (database/cache.py)
+        CREATE TABLE IF NOT EXISTS cache_versions (
+            table_name TEXT PRIMARY KEY,
+            version BIGINT NOT NULL DEFAULT 0
+        );
+    """),
+]
+
+
+def apply_migrations():
+    """Применить все еще не примененные миграции"""
+    # Схема встроенной базы создается при подключении (database/sqlite.py)
+    if db.dialect != 'postgresql':
+        return
+
+    with db.connection() as conn:
+        with conn.cursor() as cursor:
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS schema_migrations (
+                    name TEXT PRIMARY KEY,
+                    applied_at TIMESTAMP NOT NULL DEFAULT NOW()
+                )
+            """)
+            cursor.execute("SELECT name FROM schema_migrations")
+            applied = {row['name'] for row in cursor.fetchall()}
+            conn.commit()
+
+            for name, sql in MIGRATIONS:
+                if name in applied:
+                    continue
+
+                print(f"Применение миграции {name}...")
+                try:
+                    cursor.execute(sql)
+                    cursor.execute("INSERT INTO schema_migrations (name) VALUES (%s)", (name,))
+                    conn.commit()
+                except Exception as e:
+                    conn.rollback()
+                    print(f"Ошибка применения миграции {name}: {e}")
+                    raise
+
+
+if __name__ == '__main__':
+    db.connect()
+    apply_migrations()
+    db.disconnect()
@@ -0,0 +1,194 @@
+"""
+Подготовленные запросы (PREPARE / EXECUTE)
+
+Запрос, выполненный на соединении несколько раз, подготавливается на
+сервере один раз (разбор и планирование), дальше выполняется по имени.
+Подготовленные запросы живут, пока открыто соединение, поэтому
+учитываются отдельно для каждого соединения.
+"""
+import itertools
+import re
+import threading
+import weakref
+from collections import OrderedDict
+
+import psycopg2
+from psycopg2 import errors
+from config import DB_CONFIG
+
+
+# Параметры psycopg2: %(имя)s, %s и экранированный %%
+PLACEHOLDER = re.compile(r'%\((\w+)\)s|%s|%%')
+
+# Команды, которые можно подготовить
+PREPARABLE = re.compile(r'^\s*(?:SELECT|INSERT|UPDATE|DELETE|WITH|VALUES)\b', re.IGNORECASE)
+
+# Сколько разных текстов запросов учитывать до первой подготовки
+MAX_TRACKED_QUERIES = 1000
+
+
+def to_positional(query):
+    """
+    Заменить параметры psycopg2 на параметры PREPARE ($1, $2, ...)
+
+    Returns:
+        (текст для PREPARE, ключи параметров по порядку: имена для
+         %(имя)s или индексы для %s)
+    """
+    keys = []
+    numbers = {}
+    positional = itertools.count()
+
+    def replace(match):
+        if match.group(0) == '%%':
+            return '%'
+        key = match.group(1)
+        if key is None:
+            key = next(positional)
+        if key not in numbers:
+            keys.append(key)
+            numbers[key] = len(keys)
+        return f'${numbers[key]}'
+
+    return PLACEHOLDER.sub(replace, query), keys
+
+
+class PreparedStatements:
+    """Кэш подготовленных запросов для соединений psycopg2"""
+
+    def __init__(self, threshold=2, max_per_connection=100, enabled=True):
+        """
+        Args:
+            threshold: С какого выполнения запрос подготавливается
+            max_per_connection: Сколько запросов держать подготовленными
+                                на одном соединении (давно не использованные
+                                освобождаются через DEALLOCATE)
+            enabled: False - все запросы выполняются обычным образом
+        """
+        self.threshold = threshold
+        self.max_per_connection = max_per_connection
+        self.enabled = enabled
+        # соединение -> OrderedDict(текст запроса -> (имя, ключи параметров))
+        self.statements = weakref.WeakKeyDictionary()
+        self.counts = {}
+        # Запросы, которые сервер не смог подготовить
+        self.unpreparable = set()
+        self.names = itertools.count(1)
+        self.lock = threading.Lock()
+        self.prepared = 0
+        self.executed = 0
+        self.deallocated = 0
+
+    def execute(self, cursor, query, params=None):
+        """Выполнить запрос на курсоре (подготовив его при повторах)"""
+        if not self.enabled or not PREPARABLE.match(query):
+            cursor.execute(query, params)
+            return
+
+        conn = cursor.connection
+        with self.lock:
+            statements = self.statements.get(conn)
+            if statements is None:
+                statements = self.statements[conn] = OrderedDict()
+
+            entry = statements.get(query)
+            if entry is not None:
+                statements.move_to_end(query)
+            elif query in self.unpreparable or not self.should_prepare(query):
+                entry = False
+
+        if entry is False:
+            cursor.execute(query, params)
+            return
+
+        if entry is None:
+            entry = self.prepare(cursor, query, params, statements)
+            if entry is None:
+                cursor.execute(query, params)
+                return
+
+        name, keys = entry
+        try:
+            if keys:
+                values = [params[key] for key in keys]
+                cursor.execute(f"EXECUTE {name} ({', '.join(['%s'] * len(values))})", values)
+            else:
+                cursor.execute(f"EXECUTE {name}")
+        except errors.InvalidSqlStatementName:
+            # Подготовленные запросы соединения сброшены (например, DISCARD ALL)
+            with self.lock:
+                statements.clear()
+            raise
+
+        with self.lock:
+            self.executed += 1
+
+    def should_prepare(self, query):
+        """Учесть выполнение запроса; True - пора подготовить (вызывается под lock)"""
+        if len(self.counts) > MAX_TRACKED_QUERIES:
+            self.counts.clear()
+        seen = self.counts.get(query, 0) + 1
+        self.counts[query] = seen
+        return seen >= self.threshold
+
+    def prepare(self, cursor, query, params, statements):
+        """Подготовить запрос на соединении курсора (None - не удалось)"""
+        if params is None:
+            # Без параметров psycopg2 не обрабатывает % в тексте запроса
+            sql, keys = query, []
+        else:
+            sql, keys = to_positional(query)
+        name = f"stmt_{next(self.names)}"
+
+        # Ошибка PREPARE не должна прерывать транзакцию вызывающего кода
+        in_transaction = not cursor.connection.autocommit
+        try:
+            if in_transaction:
+                cursor.execute("SAVEPOINT prepare_statement")
+            cursor.execute(f"PREPARE {name} AS {sql}")
+            if in_transaction:
+                cursor.execute("RELEASE SAVEPOINT prepare_statement")
+        except psycopg2.Error as e:
+            if in_transaction:
+                cursor.execute("ROLLBACK TO SAVEPOINT prepare_statement")
+            print(f"Запрос выполняется без подготовки: {e}")
+            with self.lock:
+                self.unpreparable.add(query)
+            return None
+
+        entry = (name, keys)
+        evicted = []
+        with self.lock:
+            statements[query] = entry
+            while len(statements) > self.max_per_connection:
+                evicted.append(statements.popitem(last=False)[1][0])
+            self.prepared += 1
+            self.deallocated += len(evicted)
+
+        for old_name in evicted:
+            cursor.execute(f"DEALLOCATE {old_name}")
+        return entry
+
+    def forget(self, conn):
+        """Забыть подготовленные запросы соединения (соединение закрыто)"""
+        with self.lock:
+            self.statements.pop(conn, None)
+
+    def stats(self):
+        """Счетчики подготовленных запросов"""
+        with self.lock:
+            return {
+                'prepared': self.prepared,
+                'executed': self.executed,
+                # Выполнения без повторной подготовки
+                'reused': self.executed - self.prepared,
+                'deallocated': self.deallocated,
+                'connections': len(self.statements),
+            }
+
+
+prepared_statements = PreparedStatements(
+    threshold=DB_CONFIG.get('prepare_threshold', 2),
+    max_per_connection=DB_CONFIG.get('prepared_per_connection', 100),
+    enabled=DB_CONFIG.get('prepare_statements', True),
+)
@@ -1,6 +1,87 @@
+from datetime import timedelta
 from database.connection import db
 
 
+# Поля товара в списке (карточки, поиск, фильтры)
+PRODUCT_COLUMNS = """
+    id as product_id,
+    article,
+    name as product_name,
+    price,
+    discount as current_discount,
+    count as quantity_in_stock,
+    description,
+    image as photo_path,
+    unit_of_measurement as unit_name,
+    category as category_name,
+    provider as supplier_name,
+    ROUND(price * (1 - discount / 100.0), 2) as price_with_discount
+"""
+
+# Условие поиска подстроки по всем текстовым полям товара
+# (столбец search_text с триграммным GIN-индексом, см. database/migrations.py)
+PRODUCT_SEARCH_CONDITION = "search_text LIKE LOWER(%(search)s)"
+
+# Условие и ранг полнотекстового поиска (столбец search_vector)
+PRODUCT_FULLTEXT_CONDITION = "search_vector @@ websearch_to_tsquery('russian', %(query)s)"
+PRODUCT_SEARCH_RANK = "ts_rank(search_vector, websearch_to_tsquery('russian', %(query)s))"
+
+def like_pattern(text):
+    """Шаблон LIKE для поиска подстроки (с экранированием % и _)"""
+    escaped = text.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+    return f'%{escaped}%'
+
+
+# Сортировки постраничного списка товаров: (ORDER BY, условие ключа)
+PRODUCT_PAGE_SORTS = {
+    None: (
+        "name, id",
+        "(name, id) > (%(key_name)s, %(key_id)s)",
+    ),
+    'quantity_asc': (
+        "count, name, id",
+        "(count, name, id) > (%(key_count)s, %(key_name)s, %(key_id)s)",
+    ),
+    'quantity_desc': (
+        "count DESC, name, id",
+        "(count < %(key_count)s OR "
+        "(count = %(key_count)s AND (name, id) > (%(key_name)s, %(key_id)s)))",
+    ),
+}
+
+
+# Заказы в списке. Количество позиций и сумма хранятся в самом заказе
+# (поддерживаются триггером, см. миграцию 005_order_summary_columns)
+ORDER_LIST_SELECT = """
+    SELECT
+        o.id as order_id,
+        o.recipient_code,
+        o.created_at as order_date,
+        o.delivered_at as delivery_date,
+        o.pick_up_id as pickup_point_id,
+        pp.full_address as pickup_address,
+        o.full_name as client_name,
+        o.status as status_name,
+        u.login as user_login,
+        o.items_count,
+        o.total_amount
+    FROM "order" o
+    JOIN pickup_points pp ON o.pick_up_id = pp.id
+    JOIN users u ON o.user_id = u.id
+"""
+
+# Столбцы сортировки списка заказов: поле строки -> выражение SQL
+ORDER_SORT_COLUMNS = {
+    'order_id': 'o.id',
+    'order_date': 'o.created_at',
+    'delivery_date': 'o.delivered_at',
+    'pickup_address': 'pp.full_address',
+    'client_name': 'o.full_name',
+    'status_name': 'o.status',
+    'recipient_code': 'o.recipient_code',
+}
+
+
 class UserQueries:
 
     @staticmethod
@@ -21,7 +102,7 @@ class UserQueries:
             FROM users
             ORDER BY full_name
         """
-        return db.execute_query(query)
+        return db.execute_query(query, cached=True)
 
 
 class ProductQueries:
@@ -29,71 +110,232 @@ class ProductQueries:
     @staticmethod
     def get_all_products():
         """Получить все товары с полной информацией"""
-        query = """
-            SELECT
-                id as product_id,
-                article,
-                name as product_name,
-                price,
-                discount as current_discount,
-                count as quantity_in_stock,
-                description,
-                image as photo_path,
-                unit_of_measurement as unit_name,
-                category as category_name,
-                provider as supplier_name,
-                ROUND(price * (1 - discount / 100.0), 2) as price_with_discount
+        query = f"""
+            SELECT {PRODUCT_COLUMNS}
             FROM products
             ORDER BY name
         """
         return db.execute_query(query)
 
     @staticmethod
-    def search_products(search_text):
-        """Поиск товаров по тексту"""
-        query = """
-            SELECT
-                id as product_id,
-                article,
-                name as product_name,
-                price,
-                discount as current_discount,
-                count as quantity_in_stock,
-                description,
-                image as photo_path,
-                unit_of_measurement as unit_name,
-                category as category_name,
-                provider as supplier_name,
-                ROUND(price * (1 - discount / 100.0), 2) as price_with_discount
+    def get_catalog_watermark():
+        """
+        Отметка синхронизации каталога (только PostgreSQL)
+
+        Все транзакции с номером меньше отметки уже завершены, поэтому
+        изменения, которые еще не видны сейчас, найдутся позже запросом
+        row_version >= отметка (см. миграцию 006_products_row_versions).
+        """
+        result = db.execute_one("SELECT txid_snapshot_xmin(txid_current_snapshot()) as watermark")
+        return result['watermark']
+
+    @staticmethod
+    def get_products_changed_since(watermark):
+        """
+        Товары, измененные и удаленные после отметки синхронизации
+
+        Args:
+            watermark: Отметка, полученная get_catalog_watermark
+
+        Returns:
+            (измененные и добавленные товары, ID удаленных товаров, новая отметка)
+            или None, если отметка получена не от этой базы (нужна полная загрузка)
+        """
+        # Новая отметка берется до чтения изменений: изменения транзакций,
+        # завершившихся между запросами, попадут и в следующую синхронизацию
+        new_watermark = ProductQueries.get_catalog_watermark()
+        if watermark > new_watermark:
+            return None
+
+        changed = db.execute_query(f"""
+            SELECT {PRODUCT_COLUMNS}
             FROM products
-            WHERE
-                LOWER(name) LIKE LOWER(%s) OR
-                LOWER(article) LIKE LOWER(%s) OR
-                LOWER(COALESCE(description, '')) LIKE LOWER(%s) OR
-                LOWER(COALESCE(provider, '')) LIKE LOWER(%s) OR
-                LOWER(COALESCE(category, '')) LIKE LOWER(%s)
-            ORDER BY name
+            WHERE row_version >= %s
+        """, (watermark,))
+        removed = db.execute_query(
+            "SELECT id FROM products_deleted WHERE row_version >= %s", (watermark,)
+        )
+        return changed, [row['id'] for row in removed], new_watermark
+
+    @staticmethod
+    def get_products_by_ids(product_ids):
+        """Получить товары по списку ID (в том же виде, что и в списке)"""
+        query = f"""
+            SELECT {PRODUCT_COLUMNS}
+            FROM products
+            WHERE id = ANY(%s)
+        """
+        return db.execute_query(query, (list(product_ids),))
+
+    @staticmethod
+    def search_products(search_text, supplier_name=None, limit=None, mode='substring'):
+        """
+        Поиск товаров по тексту с ранжированием
+
+        Args:
+            search_text: Текст поиска
+            supplier_name: Фильтр по поставщику
+            limit: Максимальное количество результатов
+            mode: 'substring' - подстрока в любом поле (триграммный индекс),
+                  'fulltext' - полнотекстовый поиск по словам с морфологией
+
+        Returns:
+            Товары, наиболее релевантные первыми
+        """
+        if mode == 'fulltext':
+            condition = PRODUCT_FULLTEXT_CONDITION
+        else:
+            condition = PRODUCT_SEARCH_CONDITION
+
+        params = {'search': like_pattern(search_text), 'query': search_text}
+        supplier_condition = ''
+        if supplier_name:
+            supplier_condition = 'AND provider = %(supplier)s'
+            params['supplier'] = supplier_name
+
+        limit_clause = ''
+        if limit:
+            limit_clause = 'LIMIT %(limit)s'
+            params['limit'] = limit
+
+        query = f"""
+            SELECT {PRODUCT_COLUMNS}
+            FROM products
+            WHERE {condition} {supplier_condition}
+            ORDER BY {PRODUCT_SEARCH_RANK} DESC, name, id
+            {limit_clause}
+        """
+        return db.execute_query(query, params)
+
+    @staticmethod
+    def get_products_page(after=None, limit=50, search_text=None,
+                          supplier_name=None, sort=None):
+        """
+        Получить страницу товаров (keyset-пагинация)
+
+        Args:
+            after: Ключ последней строки предыдущей страницы или None
+            limit: Размер страницы
+            search_text: Текст поиска по всем полям
+            supplier_name: Фильтр по поставщику
+            sort: None (по названию), 'quantity_asc' или 'quantity_desc'
+
+        Returns:
+            (товары страницы, ключ для следующей страницы или None)
+        """
+        order_by, key_condition = PRODUCT_PAGE_SORTS[sort]
+        conditions, params = ProductQueries._page_filters(search_text, supplier_name)
+
+        if after is not None:
+            conditions.append(key_condition)
+            params['key_count'], params['key_name'], params['key_id'] = after
+
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+        query = f"""
+            SELECT {PRODUCT_COLUMNS}
+            FROM products
+            {where}
+            ORDER BY {order_by}
+            LIMIT %(limit)s
+        """
+        params['limit'] = limit
+        products = db.execute_query(query, params)
+
+        next_key = None
+        if len(products) == limit:
+            last = products[-1]
+            next_key = (last['quantity_in_stock'], last['product_name'], last['product_id'])
+        return products, next_key
+
+    @staticmethod
+    def get_next_in_order(products, product_ids, sort=None):
+        """
+        Места товаров среди загруженных строк списка в порядке
+        get_products_page (строки сравнивает сервер по своим правилам
+        сортировки, а не клиент)
+
+        Args:
+            products: Товары, которые нужно вставить в список
+            product_ids: ID загруженных строк списка
+            sort: Сортировка списка (см. get_products_page)
+
+        Returns:
+            Словарь ID товара -> ID первой загруженной строки после него
+            или None, если товар идет после всех загруженных строк
+        """
+        order_by, key_condition = PRODUCT_PAGE_SORTS[sort]
+        query = f"""
+            SELECT id
+            FROM products
+            WHERE id = ANY(%(ids)s) AND id <> %(key_id)s AND {key_condition}
+            ORDER BY {order_by}
+            LIMIT 1
+        """
+        ids = list(product_ids)
+        places = {}
+        for product in products:
+            row = db.execute_one(query, {
+                'ids': ids,
+                'key_count': product['quantity_in_stock'],
+                'key_name': product['product_name'],
+                'key_id': product['product_id'],
+            })
+            places[product['product_id']] = row['id'] if row else None
+        return places
+
+    @staticmethod
+    def estimate_products_count(search_text=None, supplier_name=None):
+        """
+        Оценка количества товаров без полного подсчета
+
+        Без фильтров берется статистика таблицы (pg_class.reltuples),
+        с фильтрами - оценка планировщика по EXPLAIN.
+        """
+        conditions, params = ProductQueries._page_filters(search_text, supplier_name)
+
+        if db.dialect != 'postgresql':
+            # Во встроенной базе точный подсчет достаточно быстрый
+            where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+            result = db.execute_one(f"SELECT COUNT(*) as estimate FROM products {where}", params)
+            return result['estimate']
+
+        if not conditions:
+            result = db.execute_one(
+                "SELECT reltuples::bigint as estimate FROM pg_class WHERE oid = 'products'::regclass"
+            )
+            if result and result['estimate'] >= 0:
+                return result['estimate']
+            result = db.execute_one("SELECT COUNT(*) as estimate FROM products")
+            return result['estimate']
+
+        query = f"""
+            EXPLAIN (FORMAT JSON)
+            SELECT id FROM products WHERE {' AND '.join(conditions)}
         """
-        search_pattern = f'%{search_text}%'
-        return db.execute_query(query, (search_pattern,) * 5)
+        result = db.execute_one(query, params)
+        return int(result['QUERY PLAN'][0]['Plan']['Plan Rows'])
+
+    @staticmethod
+    def _page_filters(search_text, supplier_name):
+        """Условия WHERE и именованные параметры для фильтров списка"""
+        conditions = []
+        params = {}
+
+        if search_text:
+            conditions.append(f"({PRODUCT_SEARCH_CONDITION})")
+            params['search'] = like_pattern(search_text)
+
+        if supplier_name:
+            conditions.append("provider = %(supplier)s")
+            params['supplier'] = supplier_name
+
+        return conditions, params
 
     @staticmethod
     def filter_by_supplier(supplier_name):
         """Фильтр товаров по поставщику"""
-        query = """
-            SELECT
-                id as product_id,
-                article,
-                name as product_name,
-                price,
-                discount as current_discount,
-                count as quantity_in_stock,
-                description,
-                image as photo_path,
-                unit_of_measurement as unit_name,
-                category as category_name,
-                provider as supplier_name,
-                ROUND(price * (1 - discount / 100.0), 2) as price_with_discount
+        query = f"""
+            SELECT {PRODUCT_COLUMNS}
             FROM products
             WHERE provider = %s
             ORDER BY name
@@ -124,23 +366,33 @@ class ProductQueries:
     @staticmethod
     def add_product(article, name, unit, price, supplier, category,
                    discount, quantity, description, photo_path):
-        """Добавить новый товар"""
-        query = """
+        """
+        Добавить новый товар
+
+        Returns:
+            Строка добавленного товара (в том же виде, что и в списке)
+        """
+        query = f"""
             INSERT INTO products
             (article, name, unit_of_measurement, price, provider, category,
              discount, count, description, image)
             VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-            RETURNING id
+            RETURNING {PRODUCT_COLUMNS}
         """
-        result = db.execute_one(query, (article, name, unit, price, supplier,
-                                       category, discount, quantity, description, photo_path))
-        return result['id'] if result else None
+        return db.execute_one(query, (article, name, unit, price, supplier,
+                                     category, discount, quantity, description, photo_path))
 
     @staticmethod
     def update_product(product_id, article, name, unit, price, supplier,
                       category, discount, quantity, description, photo_path):
-        """Обновить товар"""
-        query = """
+        """
+        Обновить товар
+
+        Returns:
+            Строка обновленного товара (в том же виде, что и в списке)
+            или None, если товар не найден
+        """
+        query = f"""
             UPDATE products SET
                 article = %s,
                 name = %s,
@@ -153,11 +405,11 @@ class ProductQueries:
                 description = %s,
                 image = %s
             WHERE id = %s
+            RETURNING {PRODUCT_COLUMNS}
         """
-        return db.execute_query(query, (article, name, unit, price, supplier,
-                                       category, discount, quantity, description,
-                                       photo_path, product_id),
-                               fetch=False)
+        return db.execute_one(query, (article, name, unit, price, supplier,
+                                     category, discount, quantity, description,
+                                     photo_path, product_id))
 
     @staticmethod
     def delete_product(product_id):
@@ -183,7 +435,7 @@ class ProductQueries:
             WHERE provider IS NOT NULL
             ORDER BY provider
         """
-        return db.execute_query(query)
+        return db.execute_query(query, cached=True)
 
     @staticmethod
     def get_all_categories():
@@ -194,7 +446,7 @@ class ProductQueries:
             WHERE category IS NOT NULL
             ORDER BY category
         """
-        return db.execute_query(query)
+        return db.execute_query(query, cached=True)
 
     @staticmethod
     def get_all_units():
@@ -205,7 +457,7 @@ class ProductQueries:
             WHERE unit_of_measurement IS NOT NULL
             ORDER BY unit_of_measurement
         """
-        return db.execute_query(query)
+        return db.execute_query(query, cached=True)
 
 
 class OrderQueries:
@@ -214,27 +466,120 @@ class OrderQueries:
     @staticmethod
     def get_all_orders():
         """Получить все заказы"""
-        query = """
-            SELECT
-                o.id as order_id,
-                o.recipient_code,
-                o.created_at as order_date,
-                o.delivered_at as delivery_date,
-                pp.full_address as pickup_address,
-                o.full_name as client_name,
-                o.status as status_name,
-                u.login as user_login,
-                COUNT(oi.goods_id) as items_count,
-                SUM(oi.total_price) as total_amount
-            FROM "order" o
-            JOIN pickup_points pp ON o.pick_up_id = pp.id
-            JOIN users u ON o.user_id = u.id
-            LEFT JOIN order_items oi ON o.id = oi.order_id
-            GROUP BY o.id, pp.full_address, u.login
+        query = f"""
+            {ORDER_LIST_SELECT}
             ORDER BY o.created_at DESC
         """
         return db.execute_query(query)
 
+    @staticmethod
+    def get_orders_page(after=None, limit=100, sort='order_date', descending=True,
+                        filters=None):
+        """
+        Получить страницу заказов (keyset-пагинация)
+
+        Args:
+            after: Ключ последней строки предыдущей страницы или None
+            limit: Размер страницы
+            sort: Поле сортировки (ключ ORDER_SORT_COLUMNS)
+            descending: Сортировка по убыванию
+            filters: Словарь фильтров (см. _order_filters)
+
+        Returns:
+            (заказы страницы, ключ для следующей страницы или None)
+        """
+        column = ORDER_SORT_COLUMNS[sort]
+        direction = 'DESC' if descending else 'ASC'
+        conditions, params = OrderQueries._order_filters(**(filters or {}))
+
+        compare = '<' if descending else '>'
+        if sort == 'order_id':
+            order_by = f"o.id {direction}"
+            key_condition = f"o.id {compare} %(key_id)s"
+        else:
+            # Столбец может быть NULL (дата доставки, код получения): NULL
+            # считается больше любого значения, как в индексах PostgreSQL
+            # (ASC NULLS LAST, DESC NULLS FIRST). Сравнение строк с NULL
+            # дает NULL, поэтому NULL обрабатываются отдельными условиями
+            nulls = 'NULLS FIRST' if descending else 'NULLS LAST'
+            order_by = f"{column} {direction} {nulls}, o.id {direction}"
+            if after is not None and after[0] is None:
+                key_condition = f"({column} IS NULL AND o.id {compare} %(key_id)s)"
+                if descending:
+                    key_condition = f"({key_condition} OR {column} IS NOT NULL)"
+            else:
+                key_condition = f"({column}, o.id) {compare} (%(key_value)s, %(key_id)s)"
+                if not descending:
+                    key_condition = f"({key_condition} OR {column} IS NULL)"
+
+        if after is not None:
+            conditions.append(key_condition)
+            params['key_value'], params['key_id'] = after
+
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+        query = f"""
+            {ORDER_LIST_SELECT}
+            {where}
+            ORDER BY {order_by}
+            LIMIT %(limit)s
+        """
+        params['limit'] = limit
+        orders = db.execute_query(query, params)
+
+        next_key = None
+        if len(orders) == limit:
+            last = orders[-1]
+            next_key = (last[sort], last['order_id'])
+        return orders, next_key
+
+    @staticmethod
+    def _order_filters(status=None, date_from=None, date_to=None,
+                       pickup_point_id=None, client=None):
+        """
+        Условия WHERE и именованные параметры для фильтров списка заказов
+
+        Args:
+            status: Статус заказа
+            date_from: Дата заказа не раньше (включительно)
+            date_to: Дата заказа не позже (включительно)
+            pickup_point_id: ID пункта выдачи
+            client: Подстрока ФИО клиента (без учета регистра)
+        """
+        conditions = []
+        params = {}
+
+        if status:
+            conditions.append("o.status = %(status)s")
+            params['status'] = status
+
+        if date_from:
+            conditions.append("o.created_at >= %(date_from)s")
+            params['date_from'] = date_from
+
+        if date_to:
+            # Граница - начало следующего дня (created_at может содержать время)
+            conditions.append("o.created_at < %(date_to)s")
+            params['date_to'] = date_to + timedelta(days=1)
+
+        if pickup_point_id:
+            conditions.append("o.pick_up_id = %(pickup_point_id)s")
+            params['pickup_point_id'] = pickup_point_id
+
+        if client:
+            conditions.append("o.full_name ILIKE %(client)s")
+            params['client'] = like_pattern(client)
+
+        return conditions, params
+
+    @staticmethod
+    def get_orders_by_ids(order_ids):
+        """Получить заказы по списку ID (в том же виде, что и в списке)"""
+        query = f"""
+            {ORDER_LIST_SELECT}
+            WHERE o.id = ANY(%s)
+        """
+        return db.execute_query(query, (list(order_ids),))
+
     @staticmethod
     def get_order_by_id(order_id):
         """Получить заказ по ID"""
@@ -297,7 +642,7 @@ class OrderQueries:
     def get_all_pickup_points():
         """Получить все пункты выдачи"""
         query = "SELECT id as point_id, full_address FROM pickup_points ORDER BY full_address"
-        return db.execute_query(query)
+        return db.execute_query(query, cached=True)
 
     @staticmethod
     def get_all_statuses():
@@ -307,4 +652,4 @@ class OrderQueries:
             FROM "order"
             ORDER BY status
         """
-        return db.execute_query(query)
+        return db.execute_query(query, cached=True)
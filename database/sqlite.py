@@ -0,0 +1,429 @@
+"""
+Встроенная база SQLite (DB_CONFIG['backend'] = 'sqlite')
+
+Запросы database/queries.py написаны для PostgreSQL и переводятся на
+диалект SQLite при выполнении (translate):
+
+- параметры psycopg2 (%s, %(имя)s) заменяются на ?, список в
+  "= ANY(%s)" раскрывается в IN (?, ?, ...);
+- "x ILIKE y" выполняется как LOWER(x) LIKE LOWER(y), для LIKE
+  задается экранирование \\ (как в PostgreSQL);
+- "вектор @@ запрос" - функция ts_match, ранжирование ts_rank и
+  websearch_to_tsquery реализованы на Python;
+- приведения типов ::тип отбрасываются;
+- INSERT/UPDATE ... RETURNING для SQLite старше 3.35 выполняется
+  отдельным SELECT измененной строки.
+
+Таблица "order" в SQLite указывается в кавычках так же, как в PostgreSQL.
+Перенос данных из PostgreSQL (DB_CONFIG) в файл базы:
+
+    python -m database.sqlite export [путь к файлу]
+"""
+import argparse
+import functools
+import re
+import sqlite3
+from datetime import date, datetime
+from decimal import Decimal
+
+from config import DB_CONFIG
+from database.cache import bump_versions
+
+
+# Схема базы: таблицы приложения, столбцы поиска и итоги заказов
+# (аналог миграций database/migrations.py)
+SCHEMA = r"""
+    CREATE TABLE IF NOT EXISTS pickup_points (
+        id INTEGER PRIMARY KEY,
+        full_address TEXT NOT NULL UNIQUE
+    );
+
+    CREATE TABLE IF NOT EXISTS users (
+        id INTEGER PRIMARY KEY,
+        role TEXT NOT NULL,
+        full_name TEXT NOT NULL,
+        login TEXT NOT NULL UNIQUE,
+        password TEXT NOT NULL
+    );
+
+    CREATE TABLE IF NOT EXISTS products (
+        id INTEGER PRIMARY KEY,
+        article TEXT NOT NULL UNIQUE,
+        name TEXT NOT NULL,
+        unit_of_measurement TEXT,
+        price NUMERIC NOT NULL DEFAULT 0,
+        provider TEXT,
+        category TEXT,
+        discount INTEGER NOT NULL DEFAULT 0,
+        count INTEGER NOT NULL DEFAULT 0,
+        description TEXT,
+        image TEXT,
+        -- Текст всех полей поиска (как search_text в PostgreSQL)
+        search_text TEXT GENERATED ALWAYS AS (
+            LOWER(
+                COALESCE(name, '') || char(10) ||
+                COALESCE(article, '') || char(10) ||
+                COALESCE(description, '') || char(10) ||
+                COALESCE(provider, '') || char(10) ||
+                COALESCE(category, '')
+            )
+        ) STORED,
+        -- Поля полнотекстового поиска по весам A, A, B, C (по строкам)
+        search_vector TEXT GENERATED ALWAYS AS (
+            LOWER(
+                COALESCE(name, '') || char(10) ||
+                COALESCE(article, '') || char(10) ||
+                COALESCE(category, '') || ' ' || COALESCE(provider, '') || char(10) ||
+                COALESCE(description, '')
+            )
+        ) STORED
+    );
+
+    CREATE TABLE IF NOT EXISTS "order" (
+        id INTEGER PRIMARY KEY,
+        user_id INTEGER NOT NULL REFERENCES users (id),
+        pick_up_id INTEGER NOT NULL REFERENCES pickup_points (id),
+        created_at DATE NOT NULL,
+        delivered_at DATE,
+        full_name TEXT,
+        recipient_code TEXT,
+        status TEXT NOT NULL DEFAULT 'Новый',
+        items_count INTEGER NOT NULL DEFAULT 0,
+        total_amount NUMERIC NOT NULL DEFAULT 0
+    );
+
+    CREATE TABLE IF NOT EXISTS order_items (
+        order_id INTEGER NOT NULL REFERENCES "order" (id) ON DELETE CASCADE,
+        goods_id INTEGER NOT NULL REFERENCES products (id),
+        count INTEGER NOT NULL,
+        total_price NUMERIC NOT NULL
+    );
+
+    CREATE INDEX IF NOT EXISTS products_name_id_idx ON products (name, id);
+    CREATE INDEX IF NOT EXISTS products_count_name_id_idx ON products (count, name, id);
+    CREATE INDEX IF NOT EXISTS products_provider_name_id_idx ON products (provider, name, id);
+
+    CREATE INDEX IF NOT EXISTS order_created_at_id_idx ON "order" (created_at, id);
+    CREATE INDEX IF NOT EXISTS order_delivered_at_id_idx ON "order" (delivered_at, id);
+    CREATE INDEX IF NOT EXISTS order_full_name_id_idx ON "order" (full_name, id);
+    CREATE INDEX IF NOT EXISTS order_status_created_at_id_idx ON "order" (status, created_at, id);
+    CREATE INDEX IF NOT EXISTS order_pick_up_created_at_id_idx ON "order" (pick_up_id, created_at, id);
+    CREATE INDEX IF NOT EXISTS order_items_order_id_idx ON order_items (order_id);
+    CREATE INDEX IF NOT EXISTS order_items_goods_id_idx ON order_items (goods_id);
+
+    -- Количество позиций и сумма заказа (как триггер order_items_summary)
+    CREATE TRIGGER IF NOT EXISTS order_items_summary_insert
+    AFTER INSERT ON order_items
+    BEGIN
+        UPDATE "order" SET
+            items_count = items_count + (NEW.goods_id IS NOT NULL),
+            total_amount = total_amount + COALESCE(NEW.total_price, 0)
+        WHERE id = NEW.order_id;
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS order_items_summary_update
+    AFTER UPDATE ON order_items
+    BEGIN
+        UPDATE "order" SET
+            items_count = items_count - (OLD.goods_id IS NOT NULL),
+            total_amount = total_amount - COALESCE(OLD.total_price, 0)
+        WHERE id = OLD.order_id;
+        UPDATE "order" SET
+            items_count = items_count + (NEW.goods_id IS NOT NULL),
+            total_amount = total_amount + COALESCE(NEW.total_price, 0)
+        WHERE id = NEW.order_id;
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS order_items_summary_delete
+    AFTER DELETE ON order_items
+    BEGIN
+        UPDATE "order" SET
+            items_count = items_count - (OLD.goods_id IS NOT NULL),
+            total_amount = total_amount - COALESCE(OLD.total_price, 0)
+        WHERE id = OLD.order_id;
+    END;
+
+    -- Версии таблиц для кэша запросов (как миграция 010_cache_versions)
+    CREATE TABLE IF NOT EXISTS cache_versions (
+        table_name TEXT PRIMARY KEY,
+        version INTEGER NOT NULL DEFAULT 0
+    );
+"""
+
+# Таблицы для переноса из PostgreSQL (в порядке внешних ключей) и их столбцы
+EXPORT_TABLES = [
+    ('pickup_points', ['id', 'full_address']),
+    ('users', ['id', 'role', 'full_name', 'login', 'password']),
+    ('products', ['id', 'article', 'name', 'unit_of_measurement', 'price', 'provider',
+                  'category', 'discount', 'count', 'description', 'image']),
+    ('"order"', ['id', 'user_id', 'pick_up_id', 'created_at', 'delivered_at', 'full_name',
+                 'recipient_code', 'status']),
+    ('order_items', ['order_id', 'goods_id', 'count', 'total_price']),
+]
+
+# Параметры psycopg2: %(имя)s, %s и экранированный %%
+PLACEHOLDER = re.compile(r'%\((\w+)\)s|%s|%%')
+PARAM = r'(?:%s|%\(\w+\)s)'
+
+ANY_PARAM = re.compile(rf'=\s*ANY\s*\(\s*({PARAM})\s*\)', re.IGNORECASE)
+TS_MATCH = re.compile(rf'([\w.]+)\s*@@\s*(\w+\((?:[^()%]|{PARAM})*\))')
+ILIKE = re.compile(rf'([\w."]+)\s+ILIKE\s+({PARAM})', re.IGNORECASE)
+LIKE = re.compile(rf"\bLIKE\s+(LOWER\(\s*{PARAM}\s*\)|{PARAM})(?!\s*ESCAPE)", re.IGNORECASE)
+CAST = re.compile(r'::\w+')
+RETURNING = re.compile(r'^\s*(INSERT\s+INTO|UPDATE)\s+("\w+"|\w+)(.*?)\s+RETURNING\s+(.*)$',
+                       re.IGNORECASE | re.DOTALL)
+
+# Встроенный RETURNING появился в SQLite 3.35
+NATIVE_RETURNING = sqlite3.sqlite_version_info >= (3, 35, 0)
+
+# Веса строк search_vector для ts_rank (A, A, B, C - как в PostgreSQL)
+RANK_WEIGHTS = (1.0, 1.0, 0.4, 0.2)
+
+
+@functools.lru_cache(maxsize=512)
+def rewrite(query):
+    """Перевод текста запроса на диалект SQLite (без параметров)"""
+    query = ANY_PARAM.sub(r'IN \1', query)
+    query = TS_MATCH.sub(r'ts_match(\1, \2)', query)
+    query = ILIKE.sub(r'LOWER(\1) LIKE LOWER(\2)', query)
+    query = LIKE.sub(r"LIKE \1 ESCAPE '\\'", query)
+    return CAST.sub('', query)
+
+
+def translate(query, params=None):
+    """
+    Запрос и параметры psycopg2 в запрос и параметры sqlite3
+
+    Returns:
+        (текст запроса с ?, список значений параметров)
+    """
+    query = rewrite(query)
+    if params is None:
+        # Без параметров psycopg2 не обрабатывает % в тексте запроса
+        return query, []
+
+    values = []
+    positional = iter(params) if isinstance(params, (list, tuple)) else None
+
+    def replace(match):
+        if match.group(0) == '%%':
+            return '%'
+        value = params[match.group(1)] if match.group(1) else next(positional)
+        if isinstance(value, (list, tuple)):
+            values.extend(value)
+            return f"({', '.join('?' * len(value))})" if value else '(NULL)'
+        values.append(value)
+        return '?'
+
+    return PLACEHOLDER.sub(replace, query), values
+
+
+def search_terms(query):
+    """
+    Разбор запроса в стиле websearch_to_tsquery
+
+    Returns:
+        Группы условий, объединенные через "or": списки пар (слово, исключено)
+    """
+    groups = [[]]
+    for token in re.findall(r'-?"[^"]*"|\S+', (query or '').lower()):
+        if token == 'or':
+            groups.append([])
+            continue
+        negated = token.startswith('-')
+        term = token.lstrip('-').strip('"')
+        if term:
+            groups[-1].append((term, negated))
+    return [group for group in groups if group]
+
+
+def ts_match(vector, query):
+    """Аналог "search_vector @@ websearch_to_tsquery(...)" (подстроки слов)"""
+    text = vector or ''
+    return any(all((term in text) != negated for term, negated in group)
+               for group in search_terms(query))
+
+
+def ts_rank(vector, query):
+    """Аналог ts_rank: вхождения слов с весами строк search_vector"""
+    lines = (vector or '').split('\n')
+    rank = 0.0
+    for group in search_terms(query):
+        for term, negated in group:
+            if not negated:
+                rank += sum(weight * line.count(term) for weight, line in zip(RANK_WEIGHTS, lines))
+    return rank
+
+
+def lower(value):
+    """LOWER с учетом кириллицы (встроенный LOWER SQLite меняет только ASCII)"""
+    return value.lower() if isinstance(value, str) else value
+
+
+class SQLiteCursor(sqlite3.Cursor):
+    """Курсор с запросами в формате psycopg2 и поддержкой with"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def execute(self, query, params=None):
+        sql, values = translate(query, params)
+        if not NATIVE_RETURNING:
+            match = RETURNING.match(sql)
+            if match:
+                return self.execute_returning(match, values)
+        return super().execute(sql, values)
+
+    def execute_returning(self, match, values):
+        """INSERT/UPDATE ... RETURNING: изменение и SELECT измененной строки"""
+        command, table, body, columns = match.groups()
+        super().execute(f"{command} {table}{body}", values)
+        if command.upper().startswith('INSERT'):
+            return super().execute(f"SELECT {columns} FROM {table} WHERE rowid = ?", [self.lastrowid])
+
+        where = re.search(r'\bWHERE\b(.*)$', body, re.IGNORECASE | re.DOTALL)
+        if where is None or self.rowcount == 0:
+            return super().execute(f"SELECT {columns} FROM {table} WHERE 0")
+        # Параметры условия - последние в списке
+        where_values = values[len(values) - where.group(1).count('?'):]
+        return super().execute(f"SELECT {columns} FROM {table} WHERE {where.group(1)}", where_values)
+
+
+class SQLiteConnection(sqlite3.Connection):
+    """Соединение SQLite с интерфейсом, которым пользуется приложение (как у psycopg2)"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.closed = False
+        self.row_factory = dict_row
+        self.create_function('LOWER', 1, lower, deterministic=True)
+        self.create_function('ts_match', 2, ts_match, deterministic=True)
+        self.create_function('ts_rank', 2, ts_rank, deterministic=True)
+        self.create_function('websearch_to_tsquery', 2, lambda config, query: query, deterministic=True)
+        self.execute("PRAGMA foreign_keys = ON")
+        # LIKE с учетом регистра, как в PostgreSQL
+        self.execute("PRAGMA case_sensitive_like = ON")
+
+    def cursor(self, factory=SQLiteCursor):
+        return super().cursor(factory)
+
+    def cancel(self):
+        """Прервать выполняющийся запрос (как connection.cancel() в psycopg2)"""
+        self.interrupt()
+
+    def close(self):
+        self.closed = True
+        super().close()
+
+
+def dict_row(cursor, row):
+    """Строка результата в виде словаря (как RealDictCursor)"""
+    return {column[0]: value for column, value in zip(cursor.description, row)}
+
+
+def adapt_date(value):
+    return value.isoformat(sep=' ') if isinstance(value, datetime) else value.isoformat()
+
+
+def convert_date(value):
+    return date.fromisoformat(value.decode()[:10])
+
+
+def convert_numeric(value):
+    return Decimal(value.decode())
+
+
+sqlite3.register_adapter(date, adapt_date)
+sqlite3.register_adapter(datetime, adapt_date)
+sqlite3.register_adapter(Decimal, str)
+sqlite3.register_converter('DATE', convert_date)
+sqlite3.register_converter('NUMERIC', convert_numeric)
+
+
+def connect(path, timeout=30, cached_statements=100):
+    """
+    Открыть файл базы SQLite
+
+    Args:
+        path: Путь к файлу базы
+        timeout: Сколько секунд ждать снятия блокировки записи
+        cached_statements: Размер кэша подготовленных запросов соединения
+    """
+    return sqlite3.connect(path, timeout=timeout, detect_types=sqlite3.PARSE_DECLTYPES,
+                           check_same_thread=False, cached_statements=cached_statements,
+                           factory=SQLiteConnection)
+
+
+def create_schema(conn):
+    """Создать таблицы, индексы и триггеры (если их еще нет)"""
+    # Журнал WAL: чтение не блокируется записью из другого потока
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.executescript(SCHEMA)
+    conn.commit()
+
+
+def export_from_postgres(path):
+    """
+    Перенести данные из PostgreSQL (DB_CONFIG) в файл базы SQLite
+
+    Существующие строки файла заменяются.
+
+    Returns:
+        Словарь таблица -> число строк
+    """
+    import psycopg2
+
+    source = psycopg2.connect(host=DB_CONFIG['host'], port=DB_CONFIG['port'],
+                              database=DB_CONFIG['database'], user=DB_CONFIG['user'],
+                              password=DB_CONFIG['password'])
+    target = connect(path)
+    counts = {}
+    try:
+        create_schema(target)
+        for table, _ in reversed(EXPORT_TABLES):
+            target.execute(f"DELETE FROM {table}")
+
+        # Итоги заказов считаются триггерами при вставке состава заказов
+        with source.cursor() as cursor:
+            for table, columns in EXPORT_TABLES:
+                cursor.execute(f"SELECT {', '.join(columns)} FROM {table}")
+                insert = (f"INSERT INTO {table} ({', '.join(columns)}) "
+                          f"VALUES ({', '.join('?' * len(columns))})")
+                counts[table] = 0
+                while True:
+                    rows = cursor.fetchmany(10000)
+                    if not rows:
+                        break
+                    target.executemany(insert, rows)
+                    counts[table] += len(rows)
+        # Запущенное на этой базе приложение сбросит кэш справочников
+        with target.cursor() as cursor:
+            bump_versions(cursor, (table.strip('"') for table, _ in EXPORT_TABLES))
+        target.commit()
+        target.execute("ANALYZE")
+    finally:
+        source.close()
+        target.close()
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Встроенная база SQLite')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    export = commands.add_parser('export', help='перенести данные из PostgreSQL в файл SQLite')
+    export.add_argument('path', nargs='?', default=DB_CONFIG.get('sqlite_path'),
+                        help='файл базы SQLite')
+
+    args = parser.parse_args()
+    if args.command == 'export':
+        counts = export_from_postgres(args.path)
+        print(f"Данные перенесены в {args.path}: " +
+              ', '.join(f'{table} {count}' for table, count in counts.items()))
+
+
+if __name__ == '__main__':
+    main()
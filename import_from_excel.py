@@ -1,14 +1,29 @@
-import pandas as pd
+import argparse
+import sys
+import time
 import psycopg2
+from psycopg2.extras import execute_values
 from config import DB_CONFIG
-from datetime import datetime
+from database.cache import bump_versions
+from database.prepared import PreparedStatements
+from importer.bulk import bulk_upsert, delete_missing
+from importer.checkpoints import file_fingerprint, load_checkpoint, save_checkpoint, skip_loaded
+from importer.pipeline import Stage, run_pipeline, print_summary
+from importer.readers import CHUNK_ROWS, find_input, read_sheet
+from importer.normalize import (
+    PICKUP_POINT_COLUMNS, USER_COLUMNS, PRODUCT_COLUMNS,
+    normalize_pickup_points, normalize_users, normalize_products, normalize_orders, records
+)
 
-EXCEL_FILES = {
-    'pickup_points': 'excel_data/pickup_points.xlsx',
-    'products': 'excel_data/products.xlsx',
-    'users': 'excel_data/users.xlsx',
-    'orders': 'excel_data/orders.xlsx'
-}
+# Папка файлов импорта: формат каждого листа (.xlsx, .csv, .parquet)
+# определяется по расширению найденного файла
+INPUT_DIR = 'excel_data'
+SHEETS = ('pickup_points', 'products', 'users', 'orders')
+
+
+def input_files(directory=INPUT_DIR):
+    """Пути к файлам листов в папке directory (имя файла - имя листа)"""
+    return {name: find_input(directory, name) for name in SHEETS}
 
 
 def connect_db():
@@ -22,27 +37,104 @@ def connect_db():
     )
 
 
-def import_pickup_points(file_path):
-    """Импорт пунктов выдачи"""
+def print_bulk_stats(title, stats):
+    """Вывод итогов массовой загрузки"""
+    print(f"Импортировано {title}: добавлено {stats['inserted']}, "
+          f"обновлено {stats['updated']}, без изменений {stats['unchanged']}, "
+          f"повторов в файле {stats['skipped']}, отклонено {stats['rejected']}")
+
+
+def normalized_chunks(chunks, normalize, limit=20):
+    """
+    Нормализация листа по частям с выводом отклоненных строк с причинами
+
+    Args:
+        chunks: DataFrame листа (см. importer.readers.read_sheet)
+        normalize: Функция нормализации из importer.normalize
+        limit: Сколько отклоненных строк вывести (по всем частям)
+
+    Yields:
+        (корректные строки части, число отклоненных строк части)
+    """
+    rejected = 0
+    for df in chunks:
+        valid, rejects = normalize(df)
+        for line, reason in rejects.head(max(limit - rejected, 0)).itertuples(index=False, name=None):
+            print(f"  Пропуск строки {line}: {reason}")
+        rejected += len(rejects)
+        yield valid, len(rejects)
+
+    if rejected > limit:
+        print(f"  ... и еще {rejected - limit} отклоненных строк")
+
+
+def bulk_import(conn, target, chunks, normalize, columns, keys=None):
+    """
+    Массовая загрузка листа по частям
+
+    Каждая часть загружается и фиксируется отдельно: первые строки
+    попадают в базу, пока файл еще читается.
+
+    Args:
+        keys: Множество, в которое собираются ключи строк (или None)
+
+    Returns:
+        Сумма счетчиков bulk_upsert по всем частям
+    """
+    totals = {'inserted': 0, 'updated': 0, 'unchanged': 0, 'skipped': 0, 'rejected': 0}
+    for valid, rejected in normalized_chunks(chunks, normalize):
+        if keys is not None:
+            keys.update(valid[columns[0]])
+        stats = bulk_upsert(conn, target, records(valid, columns))
+        if stats['inserted'] or stats['updated']:
+            with conn.cursor() as cursor:
+                bump_versions(cursor, {target})
+        conn.commit()
+
+        stats['rejected'] += rejected
+        for key in totals:
+            totals[key] += stats[key]
+    return totals
+
+
+def import_pickup_points(file_path, bulk=True, chunk_rows=None):
+    """
+    Импорт пунктов выдачи
+
+    Args:
+        file_path: Путь к файлу
+        bulk: Массовая загрузка через COPY (иначе построчно)
+        chunk_rows: Читать лист потоково частями по chunk_rows строк
+                    (None - целиком)
+    """
     print(f"\nИмпорт пунктов выдачи из {file_path}...")
 
     try:
         # Читаем Excel (адреса в столбце A, индекс 0)
-        df = pd.read_excel(file_path, header=None)
+        chunks = read_sheet(file_path, header=False, chunk_rows=chunk_rows)
 
         conn = connect_db()
+
+        if bulk:
+            stats = bulk_import(conn, 'pickup_points', chunks, normalize_pickup_points,
+                                PICKUP_POINT_COLUMNS)
+            conn.close()
+            print_bulk_stats('пунктов выдачи', stats)
+            return
+
         cursor = conn.cursor()
+        # Повторяющиеся запросы подготавливаются на сервере один раз
+        statements = PreparedStatements(threshold=1)
 
         count = 0
 
-        for index, row in df.iterrows():
-            address = str(row[0]) if pd.notna(row[0]) else None
-
-            if address and address.strip() and 'г.' in address:
+        for points, _ in normalized_chunks(chunks, normalize_pickup_points):
+            for (address,) in records(points, PICKUP_POINT_COLUMNS):
                 try:
-                    cursor.execute(
+                    statements.execute(
+                        cursor,
                         "INSERT INTO pickup_points (full_address) VALUES (%s) ON CONFLICT DO NOTHING",
-                        (address.strip(),)
+                        (address,)
                     )
                     count += 1
                 except Exception as e:
@@ -50,7 +142,8 @@ def import_pickup_points(file_path):
                     conn.rollback()
                     continue
 
-        conn.commit()
+            bump_versions(cursor, {'pickup_points'})
+            conn.commit()
         cursor.close()
         conn.close()
 
@@ -60,106 +153,155 @@ def import_pickup_points(file_path):
         print(f"Ошибка импорта пунктов выдачи: {e}")
         import traceback
         traceback.print_exc()
+        raise
+
+
+def remove_missing_products(conn, articles, rejected):
+    """Удаление товаров, которых нет в файле (после загрузки всех строк)"""
+    if rejected:
+        # Артикул отклоненной строки неизвестен - товар мог бы удалиться по ошибке
+        print(f"  Удаление отсутствующих товаров пропущено: отклонено строк {rejected}")
+        return
+
+    deleted, kept = delete_missing(conn, 'products', articles)
+    if deleted:
+        with conn.cursor() as cursor:
+            bump_versions(cursor, {'products'})
+    conn.commit()
+    print(f"Удалено товаров, которых нет в файле: {deleted}")
+    if kept:
+        print(f"  Оставлено товаров, которые есть в заказах: {kept}")
+
+
+def import_products(file_path, bulk=True, chunk_rows=None, delete=False):
+    """
+    Импорт товаров (аргументы - как у import_pickup_points)
 
+    Изменяются только новые и отличающиеся от файла товары.
 
-def import_products(file_path):
-    """Импорт товаров"""
+    Args:
+        delete: Удалить товары, которых нет в файле
+    """
     print(f"\nИмпорт товаров из {file_path}...")
 
     try:
-        df = pd.read_excel(file_path)
+        chunks = read_sheet(file_path, chunk_rows=chunk_rows)
+        articles = set() if delete else None
 
         conn = connect_db()
+
+        if bulk:
+            stats = bulk_import(conn, 'products', chunks, normalize_products, PRODUCT_COLUMNS, articles)
+            print_bulk_stats('товаров', stats)
+            if delete:
+                remove_missing_products(conn, articles, stats['rejected'])
+            conn.close()
+            return
+
         cursor = conn.cursor()
+        # Повторяющиеся запросы подготавливаются на сервере один раз
+        statements = PreparedStatements(threshold=1)
 
         count = 0
-        for index, row in df.iterrows():
-            try:
-                article = str(row.iloc[0]) if pd.notna(row.iloc[0]) else ''
-                name = str(row.iloc[1]) if pd.notna(row.iloc[1]) else ''
-                unit = str(row.iloc[2]) if pd.notna(row.iloc[2]) else 'шт'
-                price = float(row.iloc[3]) if pd.notna(row.iloc[3]) else 0
-                provider = str(row.iloc[4]) if pd.notna(row.iloc[4]) else ''
-                category = str(row.iloc[6]) if pd.notna(row.iloc[6]) else ''
-                discount = int(row.iloc[7]) if pd.notna(row.iloc[7]) else 0
-                count_stock = int(row.iloc[8]) if pd.notna(row.iloc[8]) else 0
-                description = str(row.iloc[9]) if pd.notna(row.iloc[9]) else ''
-                image = str(row.iloc[10]) if pd.notna(row.iloc[10]) else ''
-                if image and image != 'nan' and not image.startswith('resources/'):
-                    image = f'resources/products/{image}'
-                elif image == 'nan' or not image:
-                    image = None
-
-                cursor.execute(
-                    """
-                    INSERT INTO products
-                    (article, name, unit_of_measurement, price, provider, category,
-                     discount, count, description, image)
-                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-                    ON CONFLICT (article) DO UPDATE SET
-                        name = EXCLUDED.name,
-                        price = EXCLUDED.price,
-                        count = EXCLUDED.count,
-                        discount = EXCLUDED.discount
-                    """,
-                    (article, name, unit, price, provider, category,
-                     discount, count_stock, description, image)
-                )
-                count += 1
-            except Exception as e:
-                print(f"  Ошибка импорта товара строка {index + 2}: {e}")
-                conn.rollback()
-                continue
+        unchanged = 0
+        rejected = 0
+        for products, chunk_rejected in normalized_chunks(chunks, normalize_products):
+            rejected += chunk_rejected
+            if delete:
+                articles.update(products['article'])
+            for line, row in zip(products['line'], records(products, PRODUCT_COLUMNS)):
+                try:
+                    statements.execute(
+                        cursor,
+                        """
+                        INSERT INTO products
+                        (article, name, unit_of_measurement, price, provider, category,
+                         discount, count, description, image)
+                        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+                        ON CONFLICT (article) DO UPDATE SET
+                            name = EXCLUDED.name,
+                            unit_of_measurement = EXCLUDED.unit_of_measurement,
+                            price = EXCLUDED.price,
+                            provider = EXCLUDED.provider,
+                            category = EXCLUDED.category,
+                            discount = EXCLUDED.discount,
+                            count = EXCLUDED.count,
+                            description = EXCLUDED.description,
+                            image = EXCLUDED.image
+                        WHERE products.content_hash IS DISTINCT FROM products_content_hash(
+                            EXCLUDED.article, EXCLUDED.name, EXCLUDED.unit_of_measurement,
+                            EXCLUDED.price, EXCLUDED.provider, EXCLUDED.category,
+                            EXCLUDED.discount, EXCLUDED.count, EXCLUDED.description,
+                            EXCLUDED.image)
+                        """,
+                        row
+                    )
+                    if cursor.rowcount:
+                        count += 1
+                    else:
+                        unchanged += 1
+                except Exception as e:
+                    print(f"  Ошибка импорта товара строка {line}: {e}")
+                    conn.rollback()
+                    continue
 
-        conn.commit()
+            bump_versions(cursor, {'products'})
+            conn.commit()
         cursor.close()
-        conn.close()
 
-        print(f"Импортировано товаров: {count}")
+        print(f"Импортировано товаров: {count}, без изменений: {unchanged}")
+        if delete:
+            remove_missing_products(conn, articles, rejected)
+        conn.close()
 
     except Exception as e:
         print(f"Ошибка импорта товаров: {e}")
+        raise
 
 
-def import_users(file_path):
-    """Импорт пользователей"""
+def import_users(file_path, bulk=True, chunk_rows=None):
+    """Импорт пользователей (аргументы - как у import_pickup_points)"""
     print(f"\nИмпорт пользователей из {file_path}...")
 
     try:
-        df = pd.read_excel(file_path)
+        chunks = read_sheet(file_path, chunk_rows=chunk_rows)
 
         conn = connect_db()
+
+        if bulk:
+            stats = bulk_import(conn, 'users', chunks, normalize_users, USER_COLUMNS)
+            conn.close()
+            print_bulk_stats('пользователей', stats)
+            return
+
         cursor = conn.cursor()
+        # Повторяющиеся запросы подготавливаются на сервере один раз
+        statements = PreparedStatements(threshold=1)
 
         count = 0
-        for index, row in df.iterrows():
-            try:
-                role = str(row.iloc[0]) if pd.notna(row.iloc[0]) else ''
-                full_name = str(row.iloc[1]) if pd.notna(row.iloc[1]) else ''
-                login = str(row.iloc[2]) if pd.notna(row.iloc[2]) else ''
-                password = str(row.iloc[3]) if pd.notna(row.iloc[3]) else ''
-
-                if not login or not full_name:
+        for users, _ in normalized_chunks(chunks, normalize_users):
+            for line, (role, full_name, login, password) in zip(users['line'], records(users, USER_COLUMNS)):
+                try:
+                    statements.execute(
+                        cursor,
+                        """
+                        INSERT INTO users (role, full_name, login, password)
+                        VALUES (%s, %s, %s, %s)
+                        ON CONFLICT (login) DO UPDATE SET
+                            full_name = EXCLUDED.full_name,
+                            role = EXCLUDED.role,
+                            password = EXCLUDED.password
+                        """,
+                        (role, full_name, login, password)
+                    )
+                    count += 1
+                except Exception as e:
+                    print(f"  Ошибка импорта пользователя строка {line}: {e}")
+                    conn.rollback()
                     continue
 
-                cursor.execute(
-                    """
-                    INSERT INTO users (role, full_name, login, password)
-                    VALUES (%s, %s, %s, %s)
-                    ON CONFLICT (login) DO UPDATE SET
-                        full_name = EXCLUDED.full_name,
-                        role = EXCLUDED.role,
-                        password = EXCLUDED.password
-                    """,
-                    (role, full_name, login, password)
-                )
-                count += 1
-            except Exception as e:
-                print(f"  Ошибка импорта пользователя строка {index + 2}: {e}")
-                conn.rollback()
-                continue
-
-        conn.commit()
+            bump_versions(cursor, {'users'})
+            conn.commit()
         cursor.close()
         conn.close()
 
@@ -167,142 +309,297 @@ def import_users(file_path):
 
     except Exception as e:
         print(f"Ошибка импорта пользователей: {e}")
-
-
-def parse_date(date_value):
-    if pd.isna(date_value):
-        return None
-
-    try:
-        if isinstance(date_value, pd.Timestamp):
-            return date_value.strftime('%Y-%m-%d')
-
-        date_str = str(date_value)
-
-        if '.' in date_str:
-            parts = date_str.split('.')
-            if len(parts) == 3:
-                day, month, year = parts
-                return f"{year}-{month.zfill(2)}-{day.zfill(2)}"
-
-        dt = pd.to_datetime(date_value, dayfirst=True)
-        return dt.strftime('%Y-%m-%d')
-
-    except Exception as e:
-        print(f"Ошибка парсинга даты '{date_value}': {e}")
-        return None
-
-
-def import_orders(file_path):
-    """Импорт заказов"""
+        raise
+
+
+def load_order_lookups(cursor):
+    """Справочники для разрешения ссылок заказов (загружаются один раз)"""
+    cursor.execute("SELECT id FROM pickup_points ORDER BY id")
+    pickup_ids = [row[0] for row in cursor.fetchall()]
+
+    cursor.execute("SELECT id, full_name FROM users ORDER BY id")
+    users = cursor.fetchall()
+    user_ids = {}
+    for user_id, full_name in users:
+        user_ids.setdefault(full_name, user_id)
+
+    cursor.execute("""
+        SELECT article, id, ROUND(price * (1 - discount / 100.0), 2)
+        FROM products
+    """)
+    products = {article: (product_id, price) for article, product_id, price in cursor.fetchall()}
+
+    # Заказы без номера: загруженные до появления номеров (миграция 008)
+    # получают номер строки файла, с которой совпадают
+    cursor.execute("""
+        SELECT id, created_at, delivered_at, full_name, recipient_code
+        FROM "order"
+        WHERE order_number IS NULL
+        ORDER BY id
+    """)
+    unnumbered = {}
+    for order_id, *values in cursor.fetchall():
+        unnumbered.setdefault(order_match_key(*values), []).append(order_id)
+
+    return {
+        'pickup_ids': pickup_ids,
+        'user_ids': user_ids,
+        'default_user_id': users[0][0] if users else None,
+        'products': products,
+        'unnumbered': unnumbered,
+    }
+
+
+def order_match_key(order_date, delivery_date, client_name, receive_code):
+    """
+    Ключ сопоставления заказа без номера со строкой файла: даты,
+    ФИО и код получения (статус мог измениться в приложении)
+    """
+    return (str(order_date), str(delivery_date) if delivery_date is not None else None,
+            client_name or '', receive_code or '')
+
+
+def resolve_order_references(orders, lookups):
+    """
+    Разрешение ссылок заказов для всех строк части сразу
+
+    Returns:
+        Число строк с неизвестным пунктом выдачи (заменен первым пунктом)
+    """
+    unknown_pickup = ~orders['pickup_point_id'].isin(lookups['pickup_ids'])
+    orders.loc[unknown_pickup, 'pickup_point_id'] = lookups['pickup_ids'][0]
+
+    orders['user_id'] = orders['client_name'].map(lookups['user_ids'])
+    orders['user_id'] = orders['user_id'].fillna(lookups['default_user_id']).astype(int)
+    return int(unknown_pickup.sum())
+
+
+def import_orders(file_path, batch_size=500, chunk_rows=None, resume=True):
+    """
+    Импорт заказов и их состава
+
+    Импорт можно прервать и запустить снова: после каждого пакета
+    записывается контрольная точка, а заказ с уже загруженным номером
+    повторно не добавляется. Заказам, загруженным до появления номеров,
+    номер присваивается по совпадающей строке файла (см. order_match_key).
+
+    Args:
+        file_path: Путь к файлу
+        batch_size: Заказов в одной транзакции
+        chunk_rows: Читать лист потоково частями по chunk_rows строк
+                    (None - целиком)
+        resume: Продолжить с контрольной точки (False - загрузить файл
+                заново; заказы с известными номерами все равно пропускаются)
+    """
     print(f"\nИмпорт заказов из {file_path}...")
 
     try:
-        df = pd.read_excel(file_path)
+        fingerprint = file_fingerprint(file_path)
+        chunks = read_sheet(file_path, chunk_rows=chunk_rows)
 
         conn = connect_db()
         cursor = conn.cursor()
+        # Повторяющиеся запросы подготавливаются на сервере один раз
+        statements = PreparedStatements(threshold=1)
 
-        cursor.execute("SELECT COUNT(*) FROM pickup_points")
-        pickup_count = cursor.fetchone()[0]
+        lookups = load_order_lookups(cursor)
+        conn.commit()
 
-        if pickup_count == 0:
-            print("  ВНИМАНИЕ: В таблице pickup_points нет записей!")
-            print("  Сначала импортируйте пункты выдачи.")
+        if not lookups['pickup_ids'] or lookups['default_user_id'] is None:
             cursor.close()
             conn.close()
-            return
+            table = 'pickup_points' if not lookups['pickup_ids'] else 'users'
+            raise RuntimeError(f"в таблице {table} нет записей, сначала импортируйте "
+                               f"{'пункты выдачи' if table == 'pickup_points' else 'пользователей'}")
+
+        last_line = 0
+        if resume:
+            last_line, completed = load_checkpoint(cursor, 'orders', fingerprint)
+            conn.commit()
+            if completed:
+                print("  Файл уже импортирован (повторная загрузка - с флагом --restart)")
+                cursor.close()
+                conn.close()
+                return
+            if last_line:
+                print(f"  Продолжение импорта после строки {last_line}")
+            chunks = skip_loaded(chunks, last_line)
 
         count = 0
+        existing = 0
+        matched = 0
+        items_count = 0
         errors = 0
-
-        for index, row in df.iterrows():
-            try:
-                order_number = int(row.iloc[0]) if pd.notna(row.iloc[0]) else None
-                order_date = parse_date(row.iloc[2])
-                delivery_date = parse_date(row.iloc[3])
-
-                if not order_date or not delivery_date:
-                    print(f"  Пропуск строки {index + 2}: некорректные даты")
-                    errors += 1
-                    continue
-
-                pickup_point_id = int(row.iloc[4]) if pd.notna(row.iloc[4]) else 1
-
-                cursor.execute("SELECT id FROM pickup_points WHERE id = %s", (pickup_point_id,))
-                if not cursor.fetchone():
-                    cursor.execute("SELECT id FROM pickup_points LIMIT 1")
-                    result = cursor.fetchone()
-                    if result:
-                        pickup_point_id = result[0]
-                        print(f"  Строка {index + 2}: использован пункт выдачи #{pickup_point_id}")
-                    else:
-                        print(f"  Пропуск строки {index + 2}: нет доступных пунктов выдачи")
+        unknown_pickup = 0
+        for orders, rejected in normalized_chunks(chunks, normalize_orders):
+            errors += rejected
+            unknown_pickup += resolve_order_references(orders, lookups)
+
+            for start in range(0, len(orders), batch_size):
+                batch = orders.iloc[start:start + batch_size]
+
+                # Каждая строка в своей точке сохранения: ошибка в строке
+                # не отменяет остальные заказы пакета
+                for order in batch.itertuples(index=False):
+                    cursor.execute("SAVEPOINT order_row")
+                    try:
+                        order_number = int(order.order_number) if order.order_number else None
+                        unnumbered = None
+                        if order_number is not None:
+                            unnumbered = lookups['unnumbered'].get(order_match_key(
+                                order.order_date, order.delivery_date, order.client_name, order.receive_code))
+                        if unnumbered:
+                            cursor.execute(
+                                """
+                                UPDATE "order" SET order_number = %s
+                                WHERE id = %s
+                                  AND NOT EXISTS (SELECT 1 FROM "order" WHERE order_number = %s)
+                                RETURNING id
+                                """,
+                                (order_number, unnumbered[0], order_number)
+                            )
+                            if cursor.fetchone() is not None:
+                                # Заказ уже загружен без номера
+                                cursor.execute("RELEASE SAVEPOINT order_row")
+                                unnumbered.pop(0)
+                                matched += 1
+                                continue
+
+                        statements.execute(
+                            cursor,
+                            """
+                            INSERT INTO "order"
+                            (user_id, pick_up_id, created_at, delivered_at, full_name, recipient_code,
+                             status, order_number)
+                            VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+                            ON CONFLICT (order_number) DO NOTHING
+                            RETURNING id
+                            """,
+                            (int(order.user_id), int(order.pickup_point_id), order.order_date,
+                             order.delivery_date, order.client_name, order.receive_code, order.status,
+                             order_number)
+                        )
+                        inserted = cursor.fetchone()
+                        if inserted is None:
+                            # Заказ с этим номером уже загружен
+                            cursor.execute("RELEASE SAVEPOINT order_row")
+                            existing += 1
+                            continue
+                        order_id = inserted[0]
+
+                        items = []
+                        for article, quantity in order.items:
+                            product = lookups['products'].get(article)
+                            if product is None:
+                                print(f"  Строка {order.line}: товар с артикулом {article} не найден")
+                                continue
+                            product_id, price = product
+                            items.append((order_id, product_id, quantity, price * quantity))
+
+                        if items:
+                            execute_values(
+                                cursor,
+                                "INSERT INTO order_items (order_id, goods_id, count, total_price) VALUES %s",
+                                items
+                            )
+
+                        cursor.execute("RELEASE SAVEPOINT order_row")
+                        count += 1
+                        items_count += len(items)
+
+                    except Exception as e:
+                        print(f"  Ошибка импорта заказа строка {order.line}: {e}")
+                        cursor.execute("ROLLBACK TO SAVEPOINT order_row")
                         errors += 1
-                        continue
 
-                client_name = str(row.iloc[5]) if pd.notna(row.iloc[5]) else ''
-
-                cursor.execute("SELECT id FROM users WHERE full_name = %s LIMIT 1", (client_name,))
-                user_result = cursor.fetchone()
-                user_id = user_result[0] if user_result else None
-
-                if not user_id:
-                    cursor.execute("SELECT id FROM users LIMIT 1")
-                    result = cursor.fetchone()
-                    if result:
-                        user_id = result[0]
-                    else:
-                        print(f"  Пропуск строки {index + 2}: нет пользователей в БД")
-                        errors += 1
-                        continue
-
-                receive_code = str(int(row.iloc[6])) if pd.notna(row.iloc[6]) else ''
-                status = str(row.iloc[7]) if pd.notna(row.iloc[7]) else 'Новый'
-
-                cursor.execute(
-                    """
-                    INSERT INTO "order"
-                    (user_id, pick_up_id, created_at, delivered_at, full_name, recipient_code, status)
-                    VALUES (%s, %s, %s, %s, %s, %s, %s)
-                    """,
-                    (user_id, pickup_point_id, order_date, delivery_date, client_name, receive_code, status)
-                )
-                conn.commit()  # Коммитим каждый заказ отдельно
-                count += 1
-
-            except Exception as e:
-                print(f"  Ошибка импорта заказа строка {index + 2}: {e}")
-                conn.rollback()
-                errors += 1
-                continue
+                last_line = int(batch['line'].iloc[-1])
+                save_checkpoint(cursor, 'orders', fingerprint, last_line)
+                bump_versions(cursor, {'order', 'order_items'})
+                conn.commit()
 
+        save_checkpoint(cursor, 'orders', fingerprint, last_line, completed=True)
+        conn.commit()
         cursor.close()
         conn.close()
 
-        print(f"Импортировано заказов: {count}")
+        if unknown_pickup:
+            print(f"  Строк с неизвестным пунктом выдачи: {unknown_pickup}, "
+                  f"использован пункт выдачи #{lookups['pickup_ids'][0]}")
+        print(f"Импортировано заказов: {count}, позиций заказов: {items_count}")
+        if existing:
+            print(f"Пропущено уже загруженных заказов: {existing}")
+        if matched:
+            print(f"Присвоены номера заказам, загруженным без номера: {matched}")
         if errors > 0:
             print(f"Ошибок при импорте: {errors}")
 
     except Exception as e:
         print(f"Ошибка импорта заказов: {e}")
+        raise
+
+
+def import_stages(files, bulk=True, chunk_rows=None, delete_missing_products=False, resume=True):
+    """
+    Этапы импорта и зависимости между ними (внешние ключи): заказы
+    ссылаются на пункты выдачи и пользователей, а цены позиций заказа
+    берутся из товаров. Остальные листы импортируются одновременно.
+
+    Args:
+        files: Пути к файлам листов (см. input_files)
+    """
+    return [
+        Stage('pickup_points', import_pickup_points, (files['pickup_points'], bulk, chunk_rows)),
+        Stage('users', import_users, (files['users'], bulk, chunk_rows)),
+        Stage('products', import_products,
+              (files['products'], bulk, chunk_rows, delete_missing_products)),
+        Stage('orders', import_orders, (files['orders'],),
+              {'chunk_rows': chunk_rows, 'resume': resume},
+              depends=('pickup_points', 'users', 'products')),
+    ]
 
 
 def main():
     """Главная функция импорта"""
+    parser = argparse.ArgumentParser(description='Импорт данных из Excel, CSV и Parquet в базу данных')
+    parser.add_argument('--input-dir', default=INPUT_DIR,
+                        help='папка с файлами листов (pickup_points, products, users, orders)')
+    for sheet in SHEETS:
+        parser.add_argument(f"--{sheet.replace('_', '-')}", dest=sheet, metavar='ФАЙЛ',
+                            help=f'файл листа {sheet} (.xlsx, .csv или .parquet) вместо файла из папки')
+    parser.add_argument('--row-by-row', action='store_true',
+                        help='загружать строки по одной (без COPY)')
+    parser.add_argument('--stream', action='store_true',
+                        help='читать листы потоково частями (память не зависит от размера файла)')
+    parser.add_argument('--chunk-rows', type=int, default=CHUNK_ROWS,
+                        help='строк в одной части при --stream')
+    parser.add_argument('--delete-missing', action='store_true',
+                        help='удалить товары, которых нет в файле')
+    parser.add_argument('--restart', action='store_true',
+                        help='импортировать заказы заново, без продолжения с контрольной точки')
+    parser.add_argument('--jobs', type=int, default=None,
+                        help='число параллельных процессов (1 - листы по очереди)')
+    args = parser.parse_args()
+    bulk = not args.row_by_row
+    chunk_rows = args.chunk_rows if args.stream else None
+
     print("=" * 60)
-    print("ИМПОРТ ДАННЫХ ИЗ EXCEL В БАЗУ ДАННЫХ")
+    print("ИМПОРТ ДАННЫХ ИЗ ФАЙЛОВ В БАЗУ ДАННЫХ")
     print("=" * 60)
 
-    # Импортируем данные в правильном порядке (с учетом внешних ключей)
-    import_pickup_points(EXCEL_FILES['pickup_points'])
-    import_users(EXCEL_FILES['users'])
-    import_products(EXCEL_FILES['products'])
-    import_orders(EXCEL_FILES['orders'])
+    started = time.perf_counter()
+    files = input_files(args.input_dir)
+    files.update({sheet: getattr(args, sheet) for sheet in SHEETS if getattr(args, sheet)})
+
+    results = run_pipeline(import_stages(files, bulk, chunk_rows, args.delete_missing, not args.restart),
+                           args.jobs)
+    print_summary(results, time.perf_counter() - started)
+    failed = any(result['status'] != 'ok' for result in results.values())
 
     print("\n" + "=" * 60)
-    print("ИМПОРТ ЗАВЕРШЕН!")
+    print("ИМПОРТ ЗАВЕРШЕН С ОШИБКАМИ!" if failed else "ИМПОРТ ЗАВЕРШЕН!")
     print("=" * 60)
+    if failed:
+        sys.exit(1)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,2 @@
+# importer/__init__.py
+"""Загрузка данных из файлов в базу данных (используется import_from_excel.py)"""
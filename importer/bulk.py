@@ -0,0 +1,196 @@
+import io
+
+
+# Описания массовой загрузки для каждой таблицы:
+#   stage    - имя временной таблицы
+#   columns  - столбцы временной таблицы (имя, тип) в порядке значений строки
+#   key      - столбец естественного ключа строки
+#   reject   - условие отбраковки строк временной таблицы (или None)
+#   upsert   - перенос строк в целевую таблицу; должен вернуть признак
+#              inserted для каждой добавленной/обновленной строки
+#   delete   - удаление строк, ключей которых нет во временной таблице
+#              import_keys (необязательно, см. delete_missing)
+BULK_TARGETS = {
+    'pickup_points': {
+        'stage': 'stage_pickup_points',
+        'columns': [('full_address', 'TEXT')],
+        'key': 'full_address',
+        'reject': "full_address IS NULL OR full_address = ''",
+        'upsert': """
+            INSERT INTO pickup_points (full_address)
+            SELECT DISTINCT full_address FROM stage_pickup_points
+            ON CONFLICT DO NOTHING
+            RETURNING TRUE AS inserted
+        """,
+    },
+    'users': {
+        'stage': 'stage_users',
+        'columns': [('role', 'TEXT'), ('full_name', 'TEXT'), ('login', 'TEXT'), ('password', 'TEXT')],
+        'key': 'login',
+        'reject': "login IS NULL OR login = '' OR full_name IS NULL OR full_name = ''",
+        'upsert': """
+            INSERT INTO users (role, full_name, login, password)
+            SELECT DISTINCT ON (login) role, full_name, login, password
+            FROM stage_users
+            ORDER BY login, line DESC
+            ON CONFLICT (login) DO UPDATE SET
+                full_name = EXCLUDED.full_name,
+                role = EXCLUDED.role,
+                password = EXCLUDED.password
+            RETURNING (xmax = 0) AS inserted
+        """,
+    },
+    'products': {
+        'stage': 'stage_products',
+        'columns': [
+            ('article', 'TEXT'), ('name', 'TEXT'), ('unit_of_measurement', 'TEXT'),
+            ('price', 'NUMERIC'), ('provider', 'TEXT'), ('category', 'TEXT'),
+            ('discount', 'INTEGER'), ('count', 'INTEGER'), ('description', 'TEXT'),
+            ('image', 'TEXT'),
+        ],
+        'key': 'article',
+        'reject': "article IS NULL OR article = ''",
+        'upsert': """
+            INSERT INTO products
+            (article, name, unit_of_measurement, price, provider, category,
+             discount, count, description, image)
+            SELECT DISTINCT ON (article)
+                article, name, unit_of_measurement, price, provider, category,
+                discount, count, description, image
+            FROM stage_products
+            ORDER BY article, line DESC
+            ON CONFLICT (article) DO UPDATE SET
+                name = EXCLUDED.name,
+                unit_of_measurement = EXCLUDED.unit_of_measurement,
+                price = EXCLUDED.price,
+                provider = EXCLUDED.provider,
+                category = EXCLUDED.category,
+                discount = EXCLUDED.discount,
+                count = EXCLUDED.count,
+                description = EXCLUDED.description,
+                image = EXCLUDED.image
+            -- Строки без изменений не перезаписываются (хэш - миграция 007)
+            WHERE products.content_hash IS DISTINCT FROM products_content_hash(
+                EXCLUDED.article, EXCLUDED.name, EXCLUDED.unit_of_measurement, EXCLUDED.price,
+                EXCLUDED.provider, EXCLUDED.category, EXCLUDED.discount, EXCLUDED.count,
+                EXCLUDED.description, EXCLUDED.image)
+            RETURNING (xmax = 0) AS inserted
+        """,
+        # Товары, на которые ссылаются заказы, не удаляются
+        'delete': """
+            DELETE FROM products p
+            WHERE NOT EXISTS (SELECT 1 FROM import_keys k WHERE k.key = p.article)
+              AND NOT EXISTS (SELECT 1 FROM order_items i WHERE i.goods_id = p.id)
+        """,
+    },
+}
+
+
+def copy_value(value):
+    """Значение в текстовом формате COPY"""
+    if value is None:
+        return '\\N'
+    return (str(value).replace('\\', '\\\\').replace('\t', '\\t')
+            .replace('\n', '\\n').replace('\r', '\\r'))
+
+
+def copy_rows(cursor, table, columns, rows):
+    """
+    Загрузить строки в таблицу через COPY FROM STDIN
+
+    Args:
+        cursor: Курсор psycopg2
+        table: Имя таблицы
+        columns: Имена столбцов
+        rows: Итерируемые кортежи значений в порядке columns
+    """
+    buffer = io.StringIO()
+    for row in rows:
+        buffer.write('\t'.join(copy_value(value) for value in row))
+        buffer.write('\n')
+    buffer.seek(0)
+    cursor.copy_expert(f"COPY {table} ({', '.join(columns)}) FROM STDIN", buffer)
+
+
+def bulk_upsert(conn, target, rows):
+    """
+    Массовая загрузка строк: COPY во временную таблицу и один INSERT ... SELECT
+
+    Args:
+        conn: Соединение psycopg2 (транзакцию фиксирует вызывающий код)
+        target: Ключ BULK_TARGETS
+        rows: Список кортежей значений в порядке столбцов описания
+
+    Returns:
+        Словарь со счетчиками inserted, updated, unchanged (строки уже
+        есть в таблице без изменений), skipped (повторы ключа в файле),
+        rejected
+    """
+    spec = BULK_TARGETS[target]
+    stage = spec['stage']
+    columns = [name for name, _ in spec['columns']]
+
+    with conn.cursor() as cursor:
+        column_defs = ', '.join(f'{name} {type_}' for name, type_ in spec['columns'])
+        cursor.execute(f"DROP TABLE IF EXISTS {stage}")
+        cursor.execute(f"CREATE TEMP TABLE {stage} (line INTEGER, {column_defs}) ON COMMIT DROP")
+
+        copy_rows(cursor, stage, ['line'] + columns,
+                  ((line,) + tuple(row) for line, row in enumerate(rows)))
+
+        rejected = 0
+        if spec['reject']:
+            cursor.execute(f"DELETE FROM {stage} WHERE {spec['reject']}")
+            rejected = cursor.rowcount
+
+        cursor.execute(f"SELECT COUNT(*), COUNT(DISTINCT {spec['key']}) FROM {stage}")
+        staged, distinct = cursor.fetchone()
+
+        cursor.execute(f"""
+            WITH upserted AS ({spec['upsert']})
+            SELECT
+                COUNT(*) FILTER (WHERE inserted) AS inserted,
+                COUNT(*) FILTER (WHERE NOT inserted) AS updated
+            FROM upserted
+        """)
+        inserted, updated = cursor.fetchone()
+
+    return {
+        'inserted': inserted,
+        'updated': updated,
+        'unchanged': distinct - inserted - updated,
+        'skipped': staged - distinct,
+        'rejected': rejected,
+    }
+
+
+def delete_missing(conn, target, keys):
+    """
+    Удалить из таблицы строки, ключей которых нет в загруженном файле
+
+    Args:
+        conn: Соединение psycopg2 (транзакцию фиксирует вызывающий код)
+        target: Ключ BULK_TARGETS (с описанием delete)
+        keys: Ключи всех строк файла
+
+    Returns:
+        (удалено строк, оставлено строк без ключа в файле - на них есть ссылки)
+    """
+    spec = BULK_TARGETS[target]
+
+    with conn.cursor() as cursor:
+        cursor.execute("DROP TABLE IF EXISTS import_keys")
+        cursor.execute("CREATE TEMP TABLE import_keys (key TEXT PRIMARY KEY) ON COMMIT DROP")
+        copy_rows(cursor, 'import_keys', ['key'], ((key,) for key in keys))
+        cursor.execute("ANALYZE import_keys")
+
+        cursor.execute(spec['delete'])
+        deleted = cursor.rowcount
+
+        cursor.execute(f"""
+            SELECT COUNT(*) FROM {target} t
+            WHERE NOT EXISTS (SELECT 1 FROM import_keys k WHERE k.key = t.{spec['key']})
+        """)
+        kept = cursor.fetchone()[0]
+
+    return deleted, kept
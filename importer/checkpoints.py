@@ -0,0 +1,68 @@
+"""
+Контрольные точки импорта больших файлов
+
+Номер последней загруженной строки файла записывается в таблицу
+import_checkpoints в той же транзакции, что и сами строки, поэтому после
+сбоя повторный запуск продолжает импорт с первой незафиксированной
+строки. Файл определяется отпечатком содержимого: для измененного файла
+импорт начинается сначала.
+"""
+import hashlib
+import os
+
+
+def file_fingerprint(file_path, block_size=1 << 20):
+    """Отпечаток файла: размер и SHA-256 содержимого"""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return f"{os.path.getsize(file_path)}:{digest.hexdigest()}"
+
+
+def load_checkpoint(cursor, target, fingerprint):
+    """
+    Контрольная точка импорта файла
+
+    Returns:
+        (номер последней загруженной строки, завершен ли импорт)
+        или (0, False), если файл еще не импортировался
+    """
+    cursor.execute("""
+        SELECT last_line, completed_at IS NOT NULL
+        FROM import_checkpoints
+        WHERE target = %s AND fingerprint = %s
+    """, (target, fingerprint))
+    row = cursor.fetchone()
+    return (row[0], row[1]) if row else (0, False)
+
+
+def save_checkpoint(cursor, target, fingerprint, last_line, completed=False):
+    """Записать контрольную точку (фиксируется вместе с загруженными строками)"""
+    cursor.execute("""
+        INSERT INTO import_checkpoints (target, fingerprint, last_line, completed_at)
+        VALUES (%s, %s, %s, CASE WHEN %s THEN NOW() END)
+        ON CONFLICT (target, fingerprint) DO UPDATE SET
+            last_line = EXCLUDED.last_line,
+            completed_at = EXCLUDED.completed_at,
+            updated_at = NOW()
+    """, (target, fingerprint, last_line, completed))
+
+
+def skip_loaded(chunks, last_line, header=True):
+    """
+    Пропустить строки листа до контрольной точки включительно
+
+    Args:
+        chunks: DataFrame листа (см. importer.readers.read_sheet)
+        last_line: Номер последней загруженной строки файла
+        header: Есть ли в первой строке заголовок
+
+    Yields:
+        Части листа без уже загруженных строк
+    """
+    offset = 2 if header else 1
+    for df in chunks:
+        if len(df) and df.index[-1] + offset <= last_line:
+            continue
+        yield df[df.index + offset > last_line]
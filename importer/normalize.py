@@ -0,0 +1,226 @@
+"""
+Нормализация листов перед загрузкой в базу данных
+
+Каждая функция принимает DataFrame в том виде, в котором его прочитал
+pandas, преобразует столбцы целиком (без перебора строк) и возвращает
+пару (valid, rejects):
+    valid   - строки, готовые к загрузке, со столбцами из *_COLUMNS
+    rejects - отклоненные строки: line (номер строки в файле) и reason
+"""
+import numpy as np
+import pandas as pd
+from config import RESOURCES
+
+
+PICKUP_POINT_COLUMNS = ['full_address']
+USER_COLUMNS = ['role', 'full_name', 'login', 'password']
+PRODUCT_COLUMNS = ['article', 'name', 'unit_of_measurement', 'price', 'provider', 'category',
+                   'discount', 'count', 'description', 'image']
+ORDER_COLUMNS = ['order_number', 'order_date', 'delivery_date', 'pickup_point_id',
+                 'client_name', 'receive_code', 'status', 'items']
+
+
+def line_numbers(df, header=True):
+    """Номера строк в файле (с учетом строки заголовка)"""
+    return pd.Series(df.index + (2 if header else 1), index=df.index)
+
+
+def text(series, default=''):
+    """Текстовый столбец: пропуски заменяются значением по умолчанию"""
+    return series.astype(object).where(series.notna(), default).astype(str).str.strip()
+
+
+def whole_numbers(values):
+    """Целые числа строками ('' для пропусков)"""
+    return pd.Series(np.trunc(values), index=values.index).astype('Int64').astype('string').fillna('')
+
+
+def number(series, default):
+    """
+    Числовой столбец
+
+    Returns:
+        (значения с default вместо пропусков, маска нечисловых значений)
+    """
+    values = pd.to_numeric(series, errors='coerce')
+    invalid = values.isna() & series.notna()
+    return values.fillna(default), invalid
+
+
+def dates(series):
+    """
+    Даты столбцом целиком: даты Excel, строки "дд.мм.гггг" (в том числе
+    со временем) и "гггг-мм-дд" (ISO 8601)
+
+    Каждое значение разбирается независимо от соседних: формат не
+    угадывается по первой строке, поэтому результат не зависит от порядка
+    строк и от размера части листа при потоковом чтении.
+
+    Returns:
+        Строки "гггг-мм-дд" или None для нераспознанных значений
+    """
+    if pd.api.types.is_datetime64_any_dtype(series):
+        parsed = series
+    else:
+        # Даты Excel в столбце со смешанными значениями - строками ISO
+        values = text(series)
+        parsed = pd.to_datetime(values, format='%d.%m.%Y', errors='coerce')
+
+        iso = parsed.isna() & values.str.match(r'\d{4}-\d')
+        if iso.any():
+            parsed[iso] = pd.to_datetime(values[iso], format='ISO8601', errors='coerce')
+
+        rest = parsed.isna() & ~iso & (values != '')
+        if rest.any():
+            parsed[rest] = pd.to_datetime(values[rest], format='mixed', dayfirst=True, errors='coerce')
+
+    result = parsed.dt.strftime('%Y-%m-%d')
+    return result.where(parsed.notna(), None)
+
+
+def reject(rejects, lines, mask, reason):
+    """Добавить отклоненные по маске строки с причиной"""
+    if mask.any():
+        rejects.append(pd.DataFrame({'line': lines[mask], 'reason': reason}))
+    return ~mask
+
+
+def finish(valid, rejects, columns):
+    """Собрать итоговые DataFrame корректных и отклоненных строк"""
+    if rejects:
+        rejected = pd.concat(rejects, ignore_index=True)
+        rejected = rejected.drop_duplicates('line').sort_values('line', ignore_index=True)
+    else:
+        rejected = pd.DataFrame({'line': pd.Series(dtype=int), 'reason': pd.Series(dtype=object)})
+
+    valid = valid[['line'] + columns].reset_index(drop=True)
+    return valid, rejected
+
+
+def normalize_pickup_points(df):
+    """Пункты выдачи: адрес в первом столбце листа без заголовка"""
+    lines = line_numbers(df, header=False)
+    address = text(df.iloc[:, 0])
+    rejects = []
+
+    keep = reject(rejects, lines, address == '', 'пустой адрес')
+    keep &= reject(rejects, lines, keep & ~address.str.contains('г.', regex=False), 'адрес без города')
+
+    valid = pd.DataFrame({'line': lines, 'full_address': address})[keep]
+    return finish(valid, rejects, PICKUP_POINT_COLUMNS)
+
+
+def normalize_users(df):
+    """Пользователи: роль, ФИО, логин, пароль"""
+    lines = line_numbers(df)
+    valid = pd.DataFrame({
+        'line': lines,
+        'role': text(df.iloc[:, 0]),
+        'full_name': text(df.iloc[:, 1]),
+        'login': text(df.iloc[:, 2]),
+        'password': text(df.iloc[:, 3]),
+    })
+    rejects = []
+
+    keep = reject(rejects, lines, valid['login'] == '', 'не указан логин')
+    keep &= reject(rejects, lines, keep & (valid['full_name'] == ''), 'не указано ФИО')
+
+    return finish(valid[keep], rejects, USER_COLUMNS)
+
+
+def normalize_products(df):
+    """Товары: столбцы листа products.xlsx (столбец производителя не используется)"""
+    lines = line_numbers(df)
+    price, bad_price = number(df.iloc[:, 3], 0)
+    discount, bad_discount = number(df.iloc[:, 7], 0)
+    count, bad_count = number(df.iloc[:, 8], 0)
+
+    image = text(df.iloc[:, 10])
+    empty_image = image.isin(['', 'nan'])
+    needs_prefix = ~empty_image & ~image.str.startswith('resources/')
+    image = image.where(~needs_prefix, RESOURCES['products_folder'] + image)
+    image = image.where(~empty_image, None)
+
+    valid = pd.DataFrame({
+        'line': lines,
+        'article': text(df.iloc[:, 0]),
+        'name': text(df.iloc[:, 1]),
+        'unit_of_measurement': text(df.iloc[:, 2], 'шт'),
+        'price': price.astype(float),
+        'provider': text(df.iloc[:, 4]),
+        'category': text(df.iloc[:, 6]),
+        'discount': np.trunc(discount).astype(int),
+        'count': np.trunc(count).astype(int),
+        'description': text(df.iloc[:, 9]),
+        'image': image,
+    })
+    rejects = []
+
+    keep = reject(rejects, lines, valid['article'] == '', 'не указан артикул')
+    keep &= reject(rejects, lines, keep & bad_price, 'некорректная цена')
+    keep &= reject(rejects, lines, keep & bad_discount, 'некорректная скидка')
+    keep &= reject(rejects, lines, keep & bad_count, 'некорректное количество')
+
+    return finish(valid[keep], rejects, PRODUCT_COLUMNS)
+
+
+def parse_order_items(value):
+    """
+    Состав заказа из ячейки вида "А112Т4, 2, F635R4, 2"
+
+    Returns:
+        Список пар (артикул, количество)
+    """
+    if value is None or (isinstance(value, float) and np.isnan(value)):
+        return []
+
+    parts = [part.strip() for part in str(value).split(',')]
+    items = []
+    for i in range(0, len(parts) - 1, 2):
+        article, quantity = parts[i], parts[i + 1]
+        if article and quantity:
+            items.append((article, int(float(quantity))))
+    return items
+
+
+def safe_order_items(value):
+    """Состав заказа или None, если ячейку не удалось разобрать"""
+    try:
+        return parse_order_items(value)
+    except ValueError:
+        return None
+
+
+def normalize_orders(df):
+    """Заказы: столбцы листа orders.xlsx"""
+    lines = line_numbers(df)
+    # Нечисловые номер заказа и код получения считаются пустыми,
+    # неизвестный пункт выдачи заменяется при разрешении ссылок
+    order_number = pd.to_numeric(df.iloc[:, 0], errors='coerce')
+    pickup_point_id = pd.to_numeric(df.iloc[:, 4], errors='coerce').fillna(1)
+    receive_code = pd.to_numeric(df.iloc[:, 6], errors='coerce')
+    items = df.iloc[:, 1].map(safe_order_items)
+
+    valid = pd.DataFrame({
+        'line': lines,
+        'order_number': whole_numbers(order_number),
+        'order_date': dates(df.iloc[:, 2]),
+        'delivery_date': dates(df.iloc[:, 3]),
+        'pickup_point_id': np.trunc(pickup_point_id).astype(int),
+        'client_name': text(df.iloc[:, 5]),
+        'receive_code': whole_numbers(receive_code),
+        'status': text(df.iloc[:, 7], 'Новый'),
+        'items': items,
+    })
+    rejects = []
+
+    bad_dates = valid['order_date'].isna() | valid['delivery_date'].isna()
+    keep = reject(rejects, lines, bad_dates, 'некорректные даты')
+    keep &= reject(rejects, lines, keep & items.isna(), 'некорректный состав заказа')
+
+    return finish(valid[keep], rejects, ORDER_COLUMNS)
+
+
+def records(frame, columns):
+    """Кортежи значений строк с типами Python (для psycopg2)"""
+    return list(frame[columns].astype(object).itertuples(index=False, name=None))
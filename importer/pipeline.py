@@ -0,0 +1,146 @@
+"""
+Параллельное выполнение этапов импорта по графу зависимостей
+
+Этап запускается, как только завершены все этапы, от которых он зависит,
+поэтому независимые листы читаются и загружаются одновременно, а общее
+время импорта приближается ко времени самой долгой ветви графа. Этапы
+выполняются в отдельных процессах: разбор файлов не упирается в GIL,
+а каждый этап работает через собственное соединение с базой.
+"""
+import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+
+class Stage:
+    """Этап импорта"""
+
+    def __init__(self, name, func, args=(), kwargs=None, depends=()):
+        """
+        Args:
+            name: Имя этапа
+            func: Функция этапа (уровня модуля - передается в другой процесс)
+            args: Позиционные аргументы функции
+            kwargs: Именованные аргументы функции
+            depends: Имена этапов, которые должны завершиться раньше
+        """
+        self.name = name
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs or {}
+        self.depends = tuple(depends)
+
+
+def run_stage(func, args, kwargs):
+    """Выполнить функцию этапа и вернуть время выполнения (с)"""
+    started = time.perf_counter()
+    func(*args, **kwargs)
+    return time.perf_counter() - started
+
+
+def check_graph(stages):
+    """Проверка зависимостей: неизвестные этапы и циклы"""
+    names = {stage.name for stage in stages}
+    for stage in stages:
+        unknown = set(stage.depends) - names
+        if unknown:
+            raise ValueError(f"Этап {stage.name} зависит от неизвестных этапов: {', '.join(sorted(unknown))}")
+
+    done = set()
+    pending = list(stages)
+    while pending:
+        ready = [stage for stage in pending if set(stage.depends) <= done]
+        if not ready:
+            raise ValueError(f"Циклическая зависимость этапов: {', '.join(s.name for s in pending)}")
+        done.update(stage.name for stage in ready)
+        pending = [stage for stage in pending if stage.name not in done]
+
+
+def run_pipeline(stages, max_workers=None):
+    """
+    Выполнить этапы с учетом зависимостей
+
+    Если этап завершился исключением, зависящие от него этапы
+    не запускаются. Функции этапов сами выводят свои ошибки, поэтому
+    текст исключения попадает только в результат (см. print_summary).
+
+    Args:
+        stages: Список Stage
+        max_workers: Число процессов (None - по числу этапов,
+                     1 - по порядку в текущем процессе)
+
+    Returns:
+        Словарь имя этапа -> {'status': 'ok'|'failed'|'skipped',
+        'seconds': время выполнения, 'finished_at': время от начала импорта,
+        'error': текст исключения или None}
+    """
+    check_graph(stages)
+    results = {}
+    started = time.perf_counter()
+
+    def finish(stage, status, seconds=0.0, error=None):
+        results[stage.name] = {
+            'status': status,
+            'seconds': seconds,
+            'finished_at': time.perf_counter() - started,
+            'error': error,
+        }
+
+    def blocked(stage):
+        return any(results.get(name, {}).get('status') in ('failed', 'skipped')
+                   for name in stage.depends)
+
+    if max_workers == 1:
+        remaining = list(stages)
+        while remaining:
+            stage = next(s for s in remaining if all(name in results for name in s.depends))
+            remaining.remove(stage)
+            if blocked(stage):
+                finish(stage, 'skipped')
+                continue
+            try:
+                finish(stage, 'ok', run_stage(stage.func, stage.args, stage.kwargs))
+            except Exception as e:
+                finish(stage, 'failed', error=str(e))
+        return results
+
+    pending = list(stages)
+    running = {}
+    with ProcessPoolExecutor(max_workers=max_workers or len(stages)) as executor:
+        while pending or running:
+            for stage in list(pending):
+                if not all(name in results for name in stage.depends):
+                    continue
+                pending.remove(stage)
+                if blocked(stage):
+                    finish(stage, 'skipped')
+                    continue
+                future = executor.submit(run_stage, stage.func, stage.args, stage.kwargs)
+                running[future] = stage
+
+            if not running:
+                continue
+
+            completed, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in completed:
+                stage = running.pop(future)
+                try:
+                    finish(stage, 'ok', future.result())
+                except Exception as e:
+                    finish(stage, 'failed', error=str(e))
+
+    return results
+
+
+def print_summary(results, total):
+    """Вывод времени этапов и общего времени импорта"""
+    print("\nВремя этапов импорта:")
+    for name, result in sorted(results.items(), key=lambda item: item[1]['finished_at']):
+        if result['status'] == 'ok':
+            print(f"  {name:<15} {result['seconds']:>8.2f} с  (завершен через {result['finished_at']:.2f} с)")
+        elif result['status'] == 'failed':
+            print(f"  {name:<15} ошибка: {result['error']}")
+        else:
+            print(f"  {name:<15} пропущен (не выполнены этапы, от которых зависит)")
+
+    stages_sum = sum(result['seconds'] for result in results.values())
+    print(f"Общее время: {total:.2f} с (сумма этапов {stages_sum:.2f} с)")
@@ -0,0 +1,191 @@
+"""
+Чтение листов для импорта
+
+Формат файла определяется расширением: Excel (.xlsx), CSV (.csv) или
+Parquet (.parquet). Столбцы во всех форматах идут в том же порядке, что
+и в листах Excel, поэтому нормализация (importer/normalize.py) от
+формата не зависит.
+
+Лист читается целиком или потоково - частями по chunk_rows строк
+(Excel - через режим только для чтения openpyxl, CSV - через
+pd.read_csv с chunksize, Parquet - по пакетам строк pyarrow). Каждая
+часть - DataFrame с индексом, продолжающим нумерацию строк листа,
+поэтому в отклонениях указываются те же номера строк файла, что и при
+чтении целиком.
+"""
+import csv
+import os
+import pandas as pd
+
+
+# Размер части листа при потоковом чтении (строк)
+CHUNK_ROWS = 5000
+
+# Поддерживаемые расширения файлов (в порядке предпочтения, если в папке
+# есть один и тот же лист в нескольких форматах)
+INPUT_FORMATS = {
+    '.parquet': 'parquet',
+    '.csv': 'csv',
+    '.xlsx': 'excel',
+    '.xlsm': 'excel',
+}
+
+# Кодировка CSV и допустимые разделители (определяются по первой строке)
+CSV_ENCODING = 'utf-8-sig'
+CSV_DELIMITERS = ',;\t'
+
+
+def input_format(file_path):
+    """Формат файла по расширению"""
+    extension = os.path.splitext(file_path)[1].lower()
+    if extension not in INPUT_FORMATS:
+        raise ValueError(f"Неподдерживаемый формат файла: {file_path} "
+                         f"(поддерживаются {', '.join(INPUT_FORMATS)})")
+    return INPUT_FORMATS[extension]
+
+
+def find_input(directory, name):
+    """
+    Файл листа name в папке directory в любом поддерживаемом формате
+
+    Returns:
+        Путь к файлу (Excel, если файла нет ни в одном формате)
+    """
+    for extension in INPUT_FORMATS:
+        path = os.path.join(directory, name + extension)
+        if os.path.exists(path):
+            return path
+    return os.path.join(directory, name + '.xlsx')
+
+
+def read_sheet(file_path, header=True, chunk_rows=None):
+    """
+    Прочитать первый лист файла Excel, файл CSV или Parquet
+
+    Args:
+        file_path: Путь к файлу (формат - по расширению)
+        header: Есть ли в первой строке заголовок (для Parquet не
+                используется: имена столбцов хранятся в файле)
+        chunk_rows: Размер части для потокового чтения; None - лист целиком
+
+    Returns:
+        Итератор DataFrame (при чтении целиком - из одного элемента)
+    """
+    file_format = input_format(file_path)
+
+    if file_format == 'csv':
+        return read_csv_chunks(file_path, header, chunk_rows)
+
+    if file_format == 'parquet':
+        if chunk_rows is None:
+            return iter([pd.read_parquet(file_path)])
+        return read_parquet_chunks(file_path, chunk_rows)
+
+    if chunk_rows is None:
+        return iter([pd.read_excel(file_path, header=0 if header else None)])
+    return read_excel_chunks(file_path, header, chunk_rows)
+
+
+def csv_delimiter(file_path):
+    """Разделитель столбцов CSV по первой строке файла"""
+    with open(file_path, encoding=CSV_ENCODING, newline='') as f:
+        sample = f.readline()
+    try:
+        return csv.Sniffer().sniff(sample, delimiters=CSV_DELIMITERS).delimiter
+    except csv.Error:
+        return ','
+
+
+def read_csv_chunks(file_path, header=True, chunk_rows=None):
+    """
+    Чтение CSV (целиком или частями) парсером pandas на C
+
+    Значения читаются строками (как записаны в файле: артикулы
+    не теряют ведущие нули), числа и даты разбирает нормализация.
+    Пустые строки не пропускаются, чтобы номера строк совпадали с файлом.
+    """
+    options = {
+        'header': 0 if header else None,
+        'sep': csv_delimiter(file_path),
+        'encoding': CSV_ENCODING,
+        'dtype': str,
+        'skip_blank_lines': False,
+    }
+    if chunk_rows is None:
+        yield pd.read_csv(file_path, **options)
+        return
+
+    with pd.read_csv(file_path, chunksize=chunk_rows, **options) as reader:
+        yield from reader
+
+
+def read_parquet_chunks(file_path, chunk_rows=CHUNK_ROWS):
+    """Чтение Parquet пакетами строк (в памяти - один пакет столбцов Arrow)"""
+    import pyarrow.parquet as pq
+
+    parquet_file = pq.ParquetFile(file_path)
+    start = 0
+    for batch in parquet_file.iter_batches(batch_size=chunk_rows):
+        frame = batch.to_pandas()
+        frame.index = pd.RangeIndex(start, start + len(frame))
+        start += len(frame)
+        yield frame
+
+
+def read_excel_chunks(file_path, header=True, chunk_rows=CHUNK_ROWS):
+    """
+    Потоковое чтение первого листа частями
+
+    В памяти одновременно находится только одна часть листа: openpyxl
+    в режиме read_only разбирает XML листа по мере чтения строк.
+
+    Args:
+        file_path: Путь к файлу .xlsx
+        header: Есть ли в первой строке заголовок
+        chunk_rows: Строк в одной части
+
+    Yields:
+        DataFrame очередной части листа
+    """
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        sheet = workbook.worksheets[0]
+        rows = sheet.iter_rows(values_only=True)
+
+        columns = None
+        if header:
+            first = next(rows, None)
+            if first is None:
+                return
+            columns = [f'Unnamed: {i}' if name is None else name for i, name in enumerate(first)]
+
+        start = 0
+        chunk = []
+        # Пустые строки в конце листа pd.read_excel пропускает, а в середине
+        # оставляет (номера следующих строк не сдвигаются)
+        blank = 0
+        for row in rows:
+            if all(value is None for value in row):
+                blank += 1
+                continue
+            chunk.extend([()] * blank)
+            blank = 0
+            chunk.append(row)
+            if len(chunk) >= chunk_rows:
+                yield make_frame(chunk, columns, start)
+                start += len(chunk)
+                chunk = []
+
+        if chunk:
+            yield make_frame(chunk, columns, start)
+    finally:
+        workbook.close()
+
+
+def make_frame(rows, columns, start):
+    """DataFrame части листа (короткие и пустые строки дополняются пустыми ячейками)"""
+    width = len(columns) if columns is not None else max(len(row) for row in rows)
+    rows = [row[:width] + (None,) * (width - len(row)) for row in rows]
+    return pd.DataFrame(rows, columns=columns, index=pd.RangeIndex(start, start + len(rows)))
@@ -3,6 +3,8 @@ from PyQt6.QtWidgets import QApplication, QMessageBox
 from PyQt6.QtGui import QIcon
 from views.login_window import LoginWindow
 from database.connection import db
+from database.migrations import apply_migrations
+from utils.change_listener import change_listener
 
 
 def main():
@@ -26,6 +28,8 @@ def main():
     # Проверка подключения к базе данных
     try:
         db.connect()
+        apply_migrations()
+        change_listener.start()
         print('Приложение успешно запущено')
         print('Подключение к базе данных установлено')
     except Exception as e:
@@ -46,6 +50,7 @@ def main():
 
     exit_code = app.exec()
 
+    change_listener.stop()
     db.disconnect()
     print('Приложение завершено')
 
@@ -0,0 +1,42 @@
+"""Общие фикстуры тестов"""
+import psycopg2
+import pytest
+
+import database.queries as queries
+from config import DB_CONFIG
+from database.cache import query_cache
+from database.connection import SQLiteDatabase
+
+
+@pytest.fixture
+def sqlite_db(tmp_path, monkeypatch):
+    """Встроенная база SQLite во временной папке вместо database.connection.db для запросов"""
+    monkeypatch.setitem(DB_CONFIG, 'sqlite_path', str(tmp_path / 'shop.db'))
+    db = SQLiteDatabase()
+    db.connect()
+    monkeypatch.setattr(queries, 'db', db)
+    query_cache.clear()
+
+    yield db
+
+    db.disconnect()
+    query_cache.clear()
+
+
+@pytest.fixture
+def postgres_conn():
+    """
+    Соединение с PostgreSQL (DB_CONFIG) в транзакции, которая откатывается
+    после теста (тест пропускается, если сервер недоступен)
+    """
+    try:
+        conn = psycopg2.connect(host=DB_CONFIG['host'], port=DB_CONFIG['port'],
+                                database=DB_CONFIG['database'], user=DB_CONFIG['user'],
+                                password=DB_CONFIG['password'], connect_timeout=3)
+    except psycopg2.OperationalError as e:
+        pytest.skip(f"PostgreSQL недоступен: {e}")
+
+    yield conn
+
+    conn.rollback()
+    conn.close()
@@ -0,0 +1,71 @@
+"""Массовая загрузка через COPY и пропуск неизмененных товаров (importer/bulk.py)"""
+import pytest
+
+from importer.bulk import bulk_upsert, copy_rows, copy_value
+
+
+class CopyCursor:
+    def copy_expert(self, sql, buffer):
+        self.sql = sql
+        self.data = buffer.read()
+
+
+def test_copy_value_escapes_text_format():
+    assert copy_value(None) == '\\N'
+    assert copy_value(15) == '15'
+    assert copy_value('a\tb\nc\rd\\e') == 'a\\tb\\nc\\rd\\\\e'
+
+
+def test_copy_rows():
+    cursor = CopyCursor()
+
+    copy_rows(cursor, 'stage_users', ['line', 'login'], [(0, 'ivanov'), (1, None)])
+
+    assert cursor.sql == "COPY stage_users (line, login) FROM STDIN"
+    assert cursor.data == '0\tivanov\n1\t\\N\n'
+
+
+def product_row(article, price=100, name='Ботинки'):
+    return (article, name, 'шт.', price, 'Kari', 'Обувь', 0, 5, 'Описание', '')
+
+
+@pytest.fixture
+def products_conn(postgres_conn):
+    with postgres_conn.cursor() as cursor:
+        cursor.execute("""
+            SELECT 1 FROM information_schema.columns
+            WHERE table_name = 'products' AND column_name = 'content_hash'
+        """)
+        if cursor.fetchone() is None:
+            pytest.skip("миграция 007_products_content_hash не применена")
+    return postgres_conn
+
+
+def test_unchanged_products_are_not_rewritten(products_conn):
+    rows = [product_row('TEST-BULK-1'), product_row('TEST-BULK-2')]
+
+    first = bulk_upsert(products_conn, 'products', rows)
+    assert (first['inserted'], first['updated'], first['unchanged']) == (2, 0, 0)
+
+    again = bulk_upsert(products_conn, 'products', rows)
+    assert (again['inserted'], again['updated'], again['unchanged']) == (0, 0, 2)
+
+    changed = bulk_upsert(products_conn, 'products', [product_row('TEST-BULK-1', price=120), rows[1]])
+    assert (changed['inserted'], changed['updated'], changed['unchanged']) == (0, 1, 1)
+
+    with products_conn.cursor() as cursor:
+        cursor.execute("SELECT price FROM products WHERE article = 'TEST-BULK-1'")
+        assert cursor.fetchone()[0] == 120
+
+
+def test_last_duplicate_wins_and_empty_keys_are_rejected(products_conn):
+    stats = bulk_upsert(products_conn, 'products', [
+        product_row('TEST-BULK-3', name='Первый'),
+        product_row('', name='Без артикула'),
+        product_row('TEST-BULK-3', name='Второй'),
+    ])
+
+    assert stats == {'inserted': 1, 'updated': 0, 'unchanged': 0, 'skipped': 1, 'rejected': 1}
+    with products_conn.cursor() as cursor:
+        cursor.execute("SELECT name FROM products WHERE article = 'TEST-BULK-3'")
+        assert cursor.fetchone()[0] == 'Второй'
@@ -0,0 +1,129 @@
+"""Кэш результатов запросов и его инвалидация (database/cache.py)"""
+import pytest
+
+import database.maintenance as maintenance
+from database import sqlite
+from database.cache import BUMP_VERSION, MISSING, make_key, query_cache, tables_read, tables_written
+from database.queries import OrderQueries, UserQueries
+
+
+def test_tables_read_and_written():
+    assert tables_read('SELECT * FROM "order" o JOIN users u ON u.id = o.user_id') == {'order', 'users'}
+    assert tables_written('INSERT INTO products (article) VALUES (%s) '
+                          'ON CONFLICT (article) DO UPDATE SET name = EXCLUDED.name') == {'products'}
+    assert tables_written('UPDATE "order" SET status = %s') == {'order'}
+    assert tables_written('DELETE FROM order_items WHERE order_id = %s') == {'order_items'}
+    assert tables_written('SELECT * FROM products') == frozenset()
+
+
+def test_invalidate_removes_tagged_entries():
+    query_cache.clear()
+    users = make_key('SELECT * FROM users', None)
+    points = make_key('SELECT * FROM pickup_points WHERE id = ANY(%s)', ([1, 2],))
+    for key, tables in ((users, {'users'}), (points, {'pickup_points'})):
+        _, version = query_cache.get(key)
+        query_cache.put(key, [{'id': 1}], frozenset(tables), version)
+
+    query_cache.invalidate(frozenset({'users'}))
+
+    assert query_cache.get(users)[0] is MISSING
+    assert query_cache.get(points)[0] == [{'id': 1}]
+    query_cache.clear()
+
+
+def test_result_read_before_write_is_not_stored():
+    query_cache.clear()
+    key = make_key('SELECT * FROM users', None)
+    _, version = query_cache.get(key)
+
+    query_cache.invalidate(frozenset({'users'}))
+    query_cache.put(key, [{'id': 1}], frozenset({'users'}), version)
+
+    assert query_cache.get(key)[0] is MISSING
+
+
+def add_point(db, address):
+    db.execute_query("INSERT INTO pickup_points (full_address) VALUES (%s)", (address,), fetch=False)
+
+
+def addresses():
+    return [row['full_address'] for row in OrderQueries.get_all_pickup_points()]
+
+
+def test_write_through_execute_query_invalidates(sqlite_db):
+    add_point(sqlite_db, 'ул. Ленина, 1')
+    assert addresses() == ['ул. Ленина, 1']
+
+    add_point(sqlite_db, 'ул. Мира, 2')
+
+    assert addresses() == ['ул. Ленина, 1', 'ул. Мира, 2']
+
+
+@pytest.fixture
+def other_process(sqlite_db, tmp_path, monkeypatch):
+    """Отдельное соединение с файлом базы - запись из другого процесса (импорт)"""
+    monkeypatch.setattr(query_cache, 'sync_interval', 0)
+    conn = sqlite.connect(str(tmp_path / 'shop.db'))
+    yield conn
+    conn.close()
+
+
+def test_write_from_other_process_invalidates_after_bump(other_process, sqlite_db):
+    add_point(sqlite_db, 'ул. Ленина, 1')
+    sqlite_db.execute_query("INSERT INTO users (role, full_name, login, password) "
+                            "VALUES ('Клиент', 'Иванов Иван', 'ivanov', '1')", fetch=False)
+    assert addresses() == ['ул. Ленина, 1']
+    assert len(UserQueries.get_all_users()) == 1
+
+    other_process.execute("INSERT INTO pickup_points (full_address) VALUES ('ул. Мира, 2')")
+    other_process.commit()
+    # Без отметки о записи результат берется из кэша
+    assert addresses() == ['ул. Ленина, 1']
+
+    with other_process.cursor() as cursor:
+        cursor.execute(BUMP_VERSION, ('pickup_points',))
+    other_process.commit()
+    hits = query_cache.hits
+
+    assert addresses() == ['ул. Ленина, 1', 'ул. Мира, 2']
+    # Результаты других таблиц остаются в кэше
+    assert len(UserQueries.get_all_users()) == 1
+    assert query_cache.hits == hits + 1
+
+
+def test_versions_are_checked_once_per_interval(other_process, sqlite_db, monkeypatch):
+    add_point(sqlite_db, 'ул. Ленина, 1')
+    assert addresses() == ['ул. Ленина, 1']
+    monkeypatch.setattr(query_cache, 'sync_interval', 3600)
+    addresses()
+
+    other_process.execute("INSERT INTO pickup_points (full_address) VALUES ('ул. Мира, 2')")
+    with other_process.cursor() as cursor:
+        cursor.execute(BUMP_VERSION, ('pickup_points',))
+    other_process.commit()
+
+    assert addresses() == ['ул. Ленина, 1']
+    monkeypatch.setattr(query_cache, 'synced_at', None)
+    assert addresses() == ['ул. Ленина, 1', 'ул. Мира, 2']
+
+
+def test_maintenance_fix_invalidates_orders(other_process, sqlite_db, monkeypatch):
+    monkeypatch.setattr(maintenance, 'db', sqlite_db)
+    add_point(sqlite_db, 'ул. Ленина, 1')
+    sqlite_db.execute_query("INSERT INTO users (id, role, full_name, login, password) "
+                            "VALUES (1, 'Клиент', 'Иванов Иван', 'ivanov', '1')", fetch=False)
+    sqlite_db.execute_query("""INSERT INTO "order" (id, user_id, pick_up_id, created_at, full_name,
+                                   recipient_code, status, items_count, total_amount)
+                               VALUES (1, 1, 1, '2025-03-01', 'Иванов Иван', 1, 'Новый', 3, 100)""",
+                            fetch=False)
+    key = make_key('SELECT id, items_count FROM "order"', None)
+    _, version = query_cache.get(key)
+    query_cache.put(key, [{'id': 1, 'items_count': 3}], frozenset({'order'}), version)
+
+    mismatches = maintenance.check_order_totals(fix=True)
+
+    assert [row['order_id'] for row in mismatches] == [1]
+    assert maintenance.check_order_totals() == []
+    assert query_cache.get(key)[0] is MISSING
+    versions = other_process.execute("SELECT table_name, version FROM cache_versions").fetchall()
+    assert versions == [{'table_name': 'order', 'version': 1}]
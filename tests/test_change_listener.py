@@ -0,0 +1,73 @@
+"""Разбор уведомлений об изменениях таблиц (utils/change_listener.py)"""
+import json
+
+import pytest
+
+pytest.importorskip('PyQt6.QtCore')
+
+from psycopg2.extensions import Notify
+from PyQt6.QtCore import QCoreApplication, QTimer
+
+from utils.change_listener import CHANNEL, ChangeListener
+
+
+class NotifyConnection:
+    """Соединение с уже полученными уведомлениями (вместо LISTEN на сервере)"""
+
+    closed = False
+
+    def __init__(self, payloads):
+        self.notifies = [Notify(1, CHANNEL, json.dumps(payload)) for payload in payloads]
+
+    def poll(self):
+        pass
+
+
+@pytest.fixture
+def listener():
+    app = QCoreApplication.instance() or QCoreApplication([])
+    listener = ChangeListener()
+    listener.flush_timer = QTimer()
+    listener.flush_timer.setSingleShot(True)
+    yield listener
+    listener.flush_timer.stop()
+
+
+def receive(listener, payloads):
+    changed, reloaded = [], []
+    listener.changed.connect(lambda table, ids: changed.append((table, ids)))
+    listener.reloaded.connect(reloaded.append)
+    listener.conn = NotifyConnection(payloads)
+    listener.on_activated()
+    listener.flush()
+    return changed, reloaded
+
+
+def test_statement_notifications_are_merged(listener):
+    changed, reloaded = receive(listener, [
+        {'table': 'products', 'op': 'UPDATE', 'ids': [3, 1]},
+        {'table': 'products', 'op': 'INSERT', 'ids': [2, 3]},
+        {'table': 'order_items', 'op': 'INSERT', 'ids': [10]},
+    ])
+
+    assert changed == [('products', [1, 2, 3]), ('order_items', [10])]
+    assert reloaded == []
+
+
+def test_bulk_change_reloads_table(listener):
+    changed, reloaded = receive(listener, [
+        {'table': 'products', 'op': 'UPDATE', 'ids': [1]},
+        {'table': 'products', 'op': 'INSERT', 'ids': None},
+        {'table': 'products', 'op': 'UPDATE', 'ids': [2]},
+        {'table': 'order', 'op': 'UPDATE', 'ids': [5]},
+    ])
+
+    assert changed == [('order', [5])]
+    assert reloaded == ['products']
+
+
+def test_malformed_notification_is_skipped(listener, capsys):
+    changed, reloaded = receive(listener, [{'table': 'products', 'id': 1}])
+
+    assert changed == [] and reloaded == []
+    assert 'Некорректное уведомление' in capsys.readouterr().out
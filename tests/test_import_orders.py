@@ -0,0 +1,70 @@
+"""Повторный импорт заказов: контрольные точки и сопоставление заказов без номера"""
+from datetime import date
+
+import pandas as pd
+import pytest
+
+from import_from_excel import order_match_key
+from importer.checkpoints import file_fingerprint, load_checkpoint, save_checkpoint, skip_loaded
+from importer.normalize import normalize_orders
+from importer.readers import read_sheet
+
+
+def test_match_key_of_file_row_equals_stored_order():
+    df = pd.DataFrame([(7, 'A1, 1', '01.03.2025', '2025-03-05', 1, 'Иванов Иван', None, 'Новый')])
+    order = normalize_orders(df)[0].iloc[0]
+
+    file_key = order_match_key(order['order_date'], order['delivery_date'], order['client_name'],
+                               order['receive_code'])
+    # Строка, загруженная раньше без номера (код получения - пустой или NULL)
+    assert file_key == order_match_key(date(2025, 3, 1), date(2025, 3, 5), 'Иванов Иван', '')
+    assert file_key == order_match_key(date(2025, 3, 1), date(2025, 3, 5), 'Иванов Иван', None)
+    assert file_key != order_match_key(date(2025, 3, 1), date(2025, 3, 6), 'Иванов Иван', None)
+
+
+def test_skip_loaded_resumes_after_checkpoint():
+    chunks = [pd.DataFrame({'n': range(i, i + 3)}, index=pd.RangeIndex(i, i + 3)) for i in (0, 3, 6)]
+
+    # Строка файла = индекс + 2 (заголовок); загружены строки до 6-й включительно
+    rest = list(skip_loaded(iter(chunks), 6))
+
+    assert [list(df['n']) for df in rest] == [[5], [6, 7, 8]]
+    assert [list(df['n']) for df in skip_loaded(iter(chunks), 0)] == [[0, 1, 2], [3, 4, 5], [6, 7, 8]]
+
+
+@pytest.mark.parametrize('header', [True, False])
+@pytest.mark.parametrize('chunk_rows', [None, 1, 3, 4])
+def test_resume_from_file_loads_each_line_once(tmp_path, header, chunk_rows):
+    path = tmp_path / 'orders.csv'
+    pd.DataFrame({'Номер заказа': range(1, 11)}).to_csv(path, index=False, header=header)
+    offset = 2 if header else 1
+
+    for last_line in (0, offset, 5, offset + 9):
+        chunks = read_sheet(str(path), header=header, chunk_rows=chunk_rows)
+        rest = [int(n) for df in skip_loaded(chunks, last_line, header) for n in df.iloc[:, 0]]
+
+        # Строки файла после контрольной точки - ровно один раз
+        assert rest == [n for n in range(1, 11) if n + offset - 1 > last_line]
+
+
+def test_checkpoint_round_trip(postgres_conn):
+    with postgres_conn.cursor() as cursor:
+        assert load_checkpoint(cursor, 'orders', 'test:fingerprint') == (0, False)
+
+        save_checkpoint(cursor, 'orders', 'test:fingerprint', 500)
+        assert load_checkpoint(cursor, 'orders', 'test:fingerprint') == (500, False)
+
+        save_checkpoint(cursor, 'orders', 'test:fingerprint', 734, completed=True)
+        assert load_checkpoint(cursor, 'orders', 'test:fingerprint') == (734, True)
+        # Другой файл импортируется сначала
+        assert load_checkpoint(cursor, 'orders', 'test:other') == (0, False)
+
+
+def test_fingerprint_changes_with_content(tmp_path):
+    path = tmp_path / 'orders.csv'
+    path.write_text('1,2\n')
+    first = file_fingerprint(str(path))
+    assert file_fingerprint(str(path)) == first
+
+    path.write_text('1,3\n')
+    assert file_fingerprint(str(path)) != first
@@ -0,0 +1,108 @@
+"""Нормализация листов импорта (importer/normalize.py)"""
+import itertools
+from datetime import date, datetime
+
+import pandas as pd
+import pytest
+
+from importer.normalize import dates, normalize_orders, normalize_products, normalize_users
+
+
+# Значение ячейки -> ожидаемая дата
+DATE_VALUES = {
+    '2025-03-01': '2025-03-01',
+    '2025-03-17': '2025-03-17',
+    '2025-12-05 14:30': '2025-12-05',
+    '05.12.2025': '2025-12-05',
+    '1.3.2025': '2025-03-01',
+    '01.03.2025 10:00': '2025-03-01',
+    '17.03.2025': '2025-03-17',
+}
+
+
+@pytest.mark.parametrize('values', list(itertools.permutations(DATE_VALUES, 4))[::37])
+def test_dates_do_not_depend_on_row_order(values):
+    assert list(dates(pd.Series(values))) == [DATE_VALUES[value] for value in values]
+
+
+def test_dates_from_review_examples():
+    assert list(dates(pd.Series(['2025-03-01', '2025-03-17', '2025-12-05']))) == \
+        ['2025-03-01', '2025-03-17', '2025-12-05']
+    assert list(dates(pd.Series(['01.03.2025 10:00', '2025-03-17']))) == ['2025-03-01', '2025-03-17']
+
+
+def test_dates_excel_values_and_invalid():
+    series = pd.Series([pd.Timestamp('2025-04-02'), datetime(2025, 4, 3, 12, 0), date(2025, 4, 4),
+                        '04.04.2025', None, '', 'завтра', '31.02.2025', '2025-13-01'])
+    assert list(dates(series)) == ['2025-04-02', '2025-04-03', '2025-04-04', '2025-04-04',
+                                   None, None, None, None, None]
+
+
+def test_dates_datetime_column():
+    series = pd.Series(pd.to_datetime(['2025-01-02', None]))
+    assert list(dates(series)) == ['2025-01-02', None]
+
+
+def orders_frame(rows):
+    return pd.DataFrame(rows, columns=['Номер заказа', 'Артикул заказа', 'Дата заказа', 'Дата доставки',
+                                       'Адрес пункта выдачи', 'ФИО', 'Код для получения', 'Статус заказа'])
+
+
+def test_normalize_orders_rejects():
+    df = orders_frame([
+        (1, 'A1, 2, B2, 1', '2025-03-01', '05.03.2025', 2, 'Иванов Иван', 901, 'Новый'),
+        (2, 'A1, 1', 'вчера', '05.03.2025', 1, 'Петров Петр', 902, 'Новый'),
+        (3, 'A1, много', '01.03.2025', '05.03.2025', 1, 'Сидоров Сидор', 903, None),
+        ('', 'A1, 1', '2025-03-17', '2025-03-20', 'нет', 'Орлов Олег', None, 'Завершен'),
+    ])
+
+    valid, rejects = normalize_orders(df)
+
+    assert list(valid['line']) == [2, 5]
+    assert list(valid['order_number']) == ['1', '']
+    assert list(valid['order_date']) == ['2025-03-01', '2025-03-17']
+    assert list(valid['delivery_date']) == ['2025-03-05', '2025-03-20']
+    assert list(valid['pickup_point_id']) == [2, 1]
+    assert list(valid['receive_code']) == ['901', '']
+    assert valid['items'][0] == [('A1', 2), ('B2', 1)]
+    assert rejects.to_dict('records') == [
+        {'line': 3, 'reason': 'некорректные даты'},
+        {'line': 4, 'reason': 'некорректный состав заказа'},
+    ]
+
+
+def test_normalize_products_rejects():
+    df = pd.DataFrame([
+        ('A1', 'Ботинки', 'шт.', '1500.5', 'Kari', 'Kari', 'Обувь', 10, 5, 'Описание', '1.jpg'),
+        ('', 'Без артикула', 'шт.', 100, 'Kari', 'Kari', 'Обувь', 0, 1, '', None),
+        ('A3', 'Туфли', None, 'дорого', 'Kari', 'Kari', 'Обувь', 0, 1, '', None),
+        ('A4', 'Сапоги', 'пара', 900, 'Obuv', 'Obuv', 'Обувь', 'нет', 1, '', None),
+    ])
+
+    valid, rejects = normalize_products(df)
+
+    assert valid.to_dict('records') == [{
+        'line': 2, 'article': 'A1', 'name': 'Ботинки', 'unit_of_measurement': 'шт.', 'price': 1500.5,
+        'provider': 'Kari', 'category': 'Обувь', 'discount': 10, 'count': 5,
+        'description': 'Описание', 'image': 'resources/products/1.jpg',
+    }]
+    assert rejects.to_dict('records') == [
+        {'line': 3, 'reason': 'не указан артикул'},
+        {'line': 4, 'reason': 'некорректная цена'},
+        {'line': 5, 'reason': 'некорректная скидка'},
+    ]
+
+
+def test_normalize_users_rejects():
+    df = pd.DataFrame([
+        ('Клиент', ' Иванов Иван ', 'ivanov', '1'),
+        ('Клиент', 'Без логина', None, '2'),
+        ('Менеджер', '', 'manager', '3'),
+    ])
+
+    valid, rejects = normalize_users(df)
+
+    assert valid.to_dict('records') == [
+        {'line': 2, 'role': 'Клиент', 'full_name': 'Иванов Иван', 'login': 'ivanov', 'password': '1'},
+    ]
+    assert list(rejects['reason']) == ['не указан логин', 'не указано ФИО']
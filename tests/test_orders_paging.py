@@ -0,0 +1,65 @@
+"""Постраничная загрузка заказов при NULL в столбце сортировки (встроенная база SQLite)"""
+from datetime import date, timedelta
+
+import pytest
+
+from database.queries import OrderQueries
+
+
+ORDERS_COUNT = 12
+# Заказы без даты доставки и кода получения (в том числе на границах страниц)
+NULL_ORDERS = {1, 3, 4, 8, 12}
+
+
+@pytest.fixture
+def orders_db(sqlite_db):
+    db = sqlite_db
+    db.execute_query("INSERT INTO pickup_points (id, full_address) VALUES (1, 'г. Москва')", fetch=False)
+    db.execute_query("""
+        INSERT INTO users (id, role, full_name, login, password)
+        VALUES (1, 'Клиент', 'Иванов Иван', 'ivanov', '1')
+    """, fetch=False)
+
+    start = date(2024, 1, 1)
+    for order_id in range(1, ORDERS_COUNT + 1):
+        has_values = order_id not in NULL_ORDERS
+        db.execute_query("""
+            INSERT INTO "order"
+            (id, user_id, pick_up_id, created_at, delivered_at, full_name, recipient_code, status)
+            VALUES (%s, 1, 1, %s, %s, 'Иванов Иван', %s, 'Новый')
+        """, (order_id, start, start + timedelta(days=order_id % 4) if has_values else None,
+              str(100 + order_id % 3) if has_values else None), fetch=False)
+
+    return db
+
+
+def expected_order(orders, sort, descending):
+    """Порядок заказов: NULL больше любого значения, при равенстве - по ID"""
+    present = [o for o in orders if o[sort] is not None]
+    missing = [o for o in orders if o[sort] is None]
+    present.sort(key=lambda o: (o[sort], o['order_id']), reverse=descending)
+    missing.sort(key=lambda o: o['order_id'], reverse=descending)
+    ordered = missing + present if descending else present + missing
+    return [o['order_id'] for o in ordered]
+
+
+def load_all_pages(sort, descending, limit):
+    ids = []
+    after = None
+    while True:
+        orders, after = OrderQueries.get_orders_page(after, limit, sort, descending)
+        ids.extend(order['order_id'] for order in orders)
+        if after is None:
+            return ids
+
+
+@pytest.mark.parametrize('sort', ['delivery_date', 'recipient_code'])
+@pytest.mark.parametrize('descending', [False, True])
+@pytest.mark.parametrize('limit', [1, 2, 3, 5])
+def test_pages_cover_null_keys(orders_db, sort, descending, limit):
+    all_orders = OrderQueries.get_orders_page(None, ORDERS_COUNT + 1, sort, descending)[0]
+    assert len(all_orders) == ORDERS_COUNT
+
+    ids = load_all_pages(sort, descending, limit)
+
+    assert ids == expected_order(all_orders, sort, descending)
@@ -0,0 +1,152 @@
+"""Подготовленные запросы (database/prepared.py)"""
+import pytest
+from psycopg2 import errors
+
+from database.prepared import PreparedStatements, to_positional
+
+
+class Connection:
+    autocommit = False
+
+
+class Cursor:
+    """Курсор, запоминающий выполненные команды"""
+
+    def __init__(self, connection=None, fail=None):
+        self.connection = connection or Connection()
+        self.fail = fail or {}
+        self.commands = []
+
+    def execute(self, query, params=None):
+        for prefix, error in self.fail.items():
+            if query.startswith(prefix):
+                raise error
+        self.commands.append((query, params))
+
+
+QUERY = "SELECT * FROM products WHERE id = %s AND count > %s"
+
+
+def test_to_positional():
+    assert to_positional("SELECT %s, %s") == ("SELECT $1, $2", [0, 1])
+    assert to_positional("SELECT * FROM t WHERE a = %(a)s OR b = %(b)s OR c = %(a)s") == \
+        ("SELECT * FROM t WHERE a = $1 OR b = $2 OR c = $1", ['a', 'b'])
+    assert to_positional("SELECT * FROM t WHERE name LIKE '100%%' AND id = %s") == \
+        ("SELECT * FROM t WHERE name LIKE '100%' AND id = $1", [0])
+
+
+def test_prepared_from_threshold():
+    statements = PreparedStatements(threshold=2)
+    cursor = Cursor()
+
+    statements.execute(cursor, QUERY, (1, 0))
+    assert cursor.commands == [(QUERY, (1, 0))]
+
+    cursor.commands.clear()
+    statements.execute(cursor, QUERY, (2, 5))
+    assert cursor.commands == [
+        ("SAVEPOINT prepare_statement", None),
+        ("PREPARE stmt_1 AS SELECT * FROM products WHERE id = $1 AND count > $2", None),
+        ("RELEASE SAVEPOINT prepare_statement", None),
+        ("EXECUTE stmt_1 (%s, %s)", [2, 5]),
+    ]
+
+    cursor.commands.clear()
+    statements.execute(cursor, QUERY, (3, 1))
+    assert cursor.commands == [("EXECUTE stmt_1 (%s, %s)", [3, 1])]
+    assert statements.stats()['prepared'] == 1
+    assert statements.stats()['reused'] == 1
+
+
+def test_named_parameters_in_prepare_order():
+    statements = PreparedStatements(threshold=1)
+    cursor = Cursor()
+    query = "SELECT * FROM products WHERE name > %(name)s OR (name = %(name)s AND id > %(id)s)"
+
+    statements.execute(cursor, query, {'id': 7, 'name': 'Туфли'})
+
+    assert cursor.commands[-1] == ("EXECUTE stmt_1 (%s, %s)", ['Туфли', 7])
+
+
+def test_prepared_per_connection():
+    statements = PreparedStatements(threshold=2)
+    first = Cursor()
+    statements.execute(first, QUERY, (1, 0))
+    statements.execute(first, QUERY, (1, 0))
+
+    # На другом соединении запрос подготавливается сразу: повторы уже учтены
+    second = Cursor()
+    statements.execute(second, QUERY, (1, 0))
+    assert [query for query, _ in second.commands if query.startswith('PREPARE')] == \
+        ["PREPARE stmt_2 AS SELECT * FROM products WHERE id = $1 AND count > $2"]
+
+    statements.forget(second.connection)
+    assert statements.stats()['connections'] == 1
+
+
+def test_unpreparable_query_runs_directly():
+    statements = PreparedStatements(threshold=1)
+    cursor = Cursor(fail={'PREPARE': errors.SyntaxError('syntax error')})
+
+    statements.execute(cursor, QUERY, (1, 0))
+    statements.execute(cursor, QUERY, (2, 0))
+
+    assert cursor.commands == [
+        ("SAVEPOINT prepare_statement", None),
+        ("ROLLBACK TO SAVEPOINT prepare_statement", None),
+        (QUERY, (1, 0)),
+        (QUERY, (2, 0)),
+    ]
+
+
+def test_commands_that_cannot_be_prepared():
+    statements = PreparedStatements(threshold=1)
+    cursor = Cursor()
+
+    statements.execute(cursor, "SAVEPOINT order_row")
+    statements.execute(cursor, "SAVEPOINT order_row")
+
+    assert cursor.commands == [("SAVEPOINT order_row", None)] * 2
+
+
+def test_disabled():
+    statements = PreparedStatements(threshold=1, enabled=False)
+    cursor = Cursor()
+
+    statements.execute(cursor, QUERY, (1, 0))
+
+    assert cursor.commands == [(QUERY, (1, 0))]
+
+
+def test_least_recently_used_are_deallocated():
+    statements = PreparedStatements(threshold=1, max_per_connection=1)
+    cursor = Cursor()
+    cursor.connection.autocommit = True
+
+    statements.execute(cursor, QUERY, (1, 0))
+    statements.execute(cursor, "SELECT * FROM users WHERE id = %s", (1,))
+
+    assert ("DEALLOCATE stmt_1", None) in cursor.commands
+    assert statements.stats()['deallocated'] == 1
+
+    # Освобожденный запрос подготавливается заново
+    cursor.commands.clear()
+    statements.execute(cursor, QUERY, (1, 0))
+    assert cursor.commands[0][0].startswith("PREPARE stmt_3 AS")
+
+
+def test_reset_statements_are_prepared_again():
+    statements = PreparedStatements(threshold=1)
+    cursor = Cursor()
+    statements.execute(cursor, QUERY, (1, 0))
+
+    # DISCARD ALL на сервере: подготовленного запроса больше нет
+    cursor.fail = {'EXECUTE': errors.InvalidSqlStatementName('stmt_1')}
+    with pytest.raises(errors.InvalidSqlStatementName):
+        statements.execute(cursor, QUERY, (1, 0))
+
+    cursor.fail = {}
+    cursor.commands.clear()
+    statements.execute(cursor, QUERY, (1, 0))
+    assert [query for query, _ in cursor.commands if query.startswith('PREPARE')] == \
+        ["PREPARE stmt_2 AS SELECT * FROM products WHERE id = $1 AND count > $2"]
@@ -0,0 +1,126 @@
+"""Фильтрация каталога в памяти и обновление отдельных товаров в списке (views/product_catalog.py)"""
+import pytest
+
+pytest.importorskip('PyQt6.QtWidgets')
+
+from utils.query_runner import QueryRunner
+from utils.search_index import ProductSearchIndex
+from views.product_catalog import CatalogFilterSignals, CatalogFilterTask, ProductListModel
+from views.products_window import ProductsWindow
+from tests.test_search_index import product
+
+
+def catalog():
+    # Порядок сервера (ORDER BY name по правилам сравнения базы) не совпадает
+    # с порядком списка: регистр и "ё" сравниваются иначе
+    return [product(1, 'ботинки', quantity=3), product(2, 'Ёлочка', quantity=1),
+            product(3, 'Туфли', quantity=3), product(4, 'Елка', quantity=0),
+            product(5, 'Ботинки', quantity=1)]
+
+
+def run_filter(index, search_text=None, supplier=None, sort=None):
+    signals = CatalogFilterSignals()
+    results = []
+    signals.finished.connect(lambda generation, products: results.append(products))
+    CatalogFilterTask(1, index, search_text, supplier, ProductsWindow.sort_key(sort), signals).run()
+    return results[0]
+
+
+def ids(products):
+    return [p['product_id'] for p in products]
+
+
+@pytest.mark.parametrize('sort', [None, 'quantity_asc', 'quantity_desc'])
+def test_filter_result_follows_sort_key(sort):
+    index = ProductSearchIndex(catalog())
+
+    products = run_filter(index, sort=sort)
+
+    assert products == sorted(catalog(), key=ProductsWindow.sort_key(sort))
+
+
+@pytest.mark.parametrize('sort', [None, 'quantity_asc', 'quantity_desc'])
+def test_filter_after_upsert_keeps_order(sort):
+    index = ProductSearchIndex(catalog())
+    index.upsert(product(6, 'Адидас', quantity=3))
+    index.upsert(product(3, 'Бахилы', quantity=1))
+    index.remove(1)
+
+    products = run_filter(index, sort=sort)
+
+    key = ProductsWindow.sort_key(sort)
+    assert products == sorted(products, key=key)
+    assert set(ids(products)) == {2, 3, 4, 5, 6}
+
+
+def test_filter_by_search_and_supplier():
+    index = ProductSearchIndex(catalog() + [product(6, 'Ботинки зимние', supplier='Obuv')])
+
+    assert ids(run_filter(index, 'ботинки')) == [1, 5, 6]
+    assert ids(run_filter(index, 'ботинки', 'Obuv')) == [6]
+
+
+def test_changes_after_filter_are_inserted_in_place():
+    index = ProductSearchIndex(catalog())
+    key = ProductsWindow.sort_key(None)
+    model = ProductListModel(QueryRunner())
+    model.set_products(run_filter(index))
+
+    renamed = product(3, 'Аэлита', quantity=3)
+    added = product(6, 'Мокасины')
+    index.upsert(renamed)
+    index.upsert(added)
+    model.apply_changes([renamed, added], sort_key=key)
+
+    assert model.products == sorted(model.products, key=key)
+    # Повторная фильтрация дает тот же список
+    assert ids(run_filter(index)) == ids(model.products)
+
+
+def add_products(db, names):
+    for product_id, name in names:
+        db.execute_query("INSERT INTO products (id, article, name, count) VALUES (%s, %s, %s, 1)",
+                         (product_id, f'A{product_id:03d}', name), fetch=False)
+
+
+def test_server_mode_inserts_by_server_order(sqlite_db):
+    from database.queries import ProductQueries
+
+    # Встроенная база сравнивает строки побайтно: заглавные раньше строчных
+    add_products(sqlite_db, [(1, 'Apple'), (2, 'Cherry'), (3, 'banana'), (4, 'date')])
+    page, after = ProductQueries.get_products_page(limit=3)
+    model = ProductListModel(QueryRunner())
+    model.set_products(page)
+    model.has_more = True
+    assert ids(model.products) == [1, 2, 3]
+
+    add_products(sqlite_db, [(5, 'Dog'), (6, 'egg')])
+    added = ProductQueries.get_products_by_ids([5, 6])
+    unplaced = model.apply_changes(added, sort_key=ProductsWindow.server_sort_key(None), insert=False)
+    assert ids(unplaced) == [5, 6]
+
+    places = ProductQueries.get_next_in_order(unplaced, ids(model.products))
+    assert places == {5: 3, 6: None}
+    model.insert_before(unplaced, places)
+
+    # Товар после всех загруженных придет со следующей страницей
+    assert ids(model.products) == [1, 2, 5, 3]
+    next_page, _ = ProductQueries.get_products_page(after, 10)
+    assert ids(model.products) + ids(next_page) == ids(ProductQueries.get_products_page(limit=10)[0])
+
+
+def test_server_mode_moves_renamed_product(sqlite_db):
+    from database.queries import ProductQueries
+
+    add_products(sqlite_db, [(1, 'Apple'), (2, 'Cherry'), (3, 'banana')])
+    model = ProductListModel(QueryRunner())
+    model.set_products(ProductQueries.get_products_page(limit=10)[0])
+
+    sqlite_db.execute_query("UPDATE products SET name = 'cherry' WHERE id = 1", fetch=False)
+    renamed = ProductQueries.get_products_by_ids([1])
+    unplaced = model.apply_changes(renamed, sort_key=ProductsWindow.server_sort_key(None), insert=False)
+    assert ids(model.products) == [2, 3]
+
+    model.insert_before(unplaced, ProductQueries.get_next_in_order(unplaced, ids(model.products)))
+
+    assert ids(model.products) == [2, 3, 1]
@@ -0,0 +1,44 @@
+"""Диалог редактирования товара берет данные с сервера, а не из списка (views/product_edit_dialog.py)"""
+import os
+
+import pytest
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+pytest.importorskip('PyQt6.QtWidgets')
+
+from PyQt6.QtCore import QCoreApplication, QDeadlineTimer, QThread
+from PyQt6.QtWidgets import QApplication
+
+import utils.query_runner
+from views.product_edit_dialog import ProductEditDialog
+
+
+@pytest.fixture
+def app():
+    return QApplication.instance() or QApplication([])
+
+
+def wait_loaded(dialog, timeout_ms=5000):
+    deadline = QDeadlineTimer(timeout_ms)
+    while not dialog.save_btn.isEnabled() and not deadline.hasExpired():
+        QCoreApplication.processEvents()
+        QThread.msleep(10)
+    assert dialog.save_btn.isEnabled()
+
+
+def test_dialog_loads_current_row(app, sqlite_db, monkeypatch):
+    monkeypatch.setattr(utils.query_runner, 'db', sqlite_db)
+    sqlite_db.execute_query("""
+        INSERT INTO products (id, article, name, unit_of_measurement, price, provider, category, count)
+        VALUES (1, 'A001', 'Ботинки', 'шт.', 1000, 'Kari', 'Обувь', 5)
+    """, fetch=False)
+    # Строка в списке (локальной копии каталога) устарела: на сервере
+    # товар уже изменили с другого рабочего места
+    sqlite_db.execute_query("UPDATE products SET name = 'Ботинки зимние', count = 7 WHERE id = 1", fetch=False)
+
+    dialog = ProductEditDialog(1)
+    wait_loaded(dialog)
+
+    assert dialog.name_input.text() == 'Ботинки зимние'
+    assert dialog.quantity_input.value() == 7
+    dialog.done(0)
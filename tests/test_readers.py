@@ -0,0 +1,138 @@
+"""Чтение листов Excel, CSV и Parquet (importer/readers.py): одинаковый результат нормализации"""
+import pandas as pd
+import pytest
+
+from importer.normalize import normalize_orders, normalize_pickup_points, normalize_products
+from importer.readers import read_sheet
+
+
+ORDERS = pd.DataFrame([
+    (1, 'A001, 2, B002, 1', '2025-03-01', '2025-03-17', 2, 'Иванов Иван', 901, 'Новый'),
+    (2, 'A001, 1', '17.03.2025', '2025-12-05', 1, 'Петров Петр', 902, 'Завершен'),
+    (3, 'A001, 1', 'вчера', '05.03.2025', 1, 'Сидоров Сидор', 903, 'Новый'),
+    (4, 'B002, 3', '2025-12-05 14:30', '01.03.2025 10:00', 3, 'Орлов Олег', None, None),
+    (5, 'A001, много', '2025-03-01', '2025-03-02', 1, 'Ким Анна', 905, 'Новый'),
+    (6, 'B002, 1', '05.12.2025', '2025-03-01', 1, 'Лебедева Ольга', 906, 'Новый'),
+    (7, 'A001, 4', '2025-03-17', '2025-03-20', 2, 'Жуков Павел', 907, 'Новый'),
+], columns=['Номер заказа', 'Артикул заказа', 'Дата заказа', 'Дата доставки',
+            'Адрес пункта выдачи', 'ФИО', 'Код для получения', 'Статус заказа'])
+
+PRODUCTS = pd.DataFrame([
+    ('001', 'Ботинки', 'шт.', 1500.5, 'Kari', 'Kari', 'Обувь', 10, 5, 'Описание', '1.jpg'),
+    ('', 'Без артикула', 'шт.', 100.0, 'Kari', 'Kari', 'Обувь', 0, 1, '', ''),
+    ('A3', 'Туфли', 'пара', 900.0, 'Obuv', 'Obuv', 'Обувь', 0, 0, '', ''),
+], columns=['Артикул', 'Наименование', 'Единица измерения', 'Цена', 'Поставщик', 'Производитель',
+            'Категория', 'Скидка', 'Количество', 'Описание', 'Фото'])
+
+CHUNK_SIZES = [None, 1, 2, 3, 5]
+
+
+def write_formats(df, directory, name):
+    paths = {
+        'excel': directory / f'{name}.xlsx',
+        'csv': directory / f'{name}.csv',
+        'parquet': directory / f'{name}.parquet',
+    }
+    df.to_excel(paths['excel'], index=False)
+    df.to_csv(paths['csv'], index=False)
+    if importable('pyarrow'):
+        df.to_parquet(paths['parquet'], index=False)
+    else:
+        del paths['parquet']
+    return paths
+
+
+def importable(module):
+    try:
+        __import__(module)
+    except ImportError:
+        return False
+    return True
+
+
+def normalize_file(path, normalize, chunk_rows):
+    """Нормализация по частям, как при импорте (import_from_excel.normalized_chunks)"""
+    valid, rejects = zip(*(normalize(df) for df in read_sheet(str(path), chunk_rows=chunk_rows)))
+    return pd.concat(valid, ignore_index=True), pd.concat(rejects, ignore_index=True)
+
+
+@pytest.mark.parametrize('sheet, normalize', [(ORDERS, normalize_orders), (PRODUCTS, normalize_products)])
+def test_formats_and_chunks_normalize_identically(tmp_path, sheet, normalize):
+    expected_valid, expected_rejects = normalize(sheet)
+
+    for file_format, path in write_formats(sheet, tmp_path, 'sheet').items():
+        for chunk_rows in CHUNK_SIZES:
+            valid, rejects = normalize_file(path, normalize, chunk_rows)
+            context = f'{file_format}, chunk_rows={chunk_rows}'
+            assert valid.astype(object).to_dict('records') == \
+                expected_valid.astype(object).to_dict('records'), context
+            assert rejects.to_dict('records') == expected_rejects.to_dict('records'), context
+
+
+def test_orders_dates_from_csv(tmp_path):
+    path = write_formats(ORDERS, tmp_path, 'orders')['csv']
+
+    valid, rejects = normalize_file(path, normalize_orders, 2)
+
+    assert list(valid['order_date']) == ['2025-03-01', '2025-03-17', '2025-12-05', '2025-12-05', '2025-03-17']
+    assert list(valid['delivery_date']) == ['2025-03-17', '2025-12-05', '2025-03-01', '2025-03-01',
+                                            '2025-03-20']
+    assert rejects.to_dict('records') == [
+        {'line': 4, 'reason': 'некорректные даты'},
+        {'line': 6, 'reason': 'некорректный состав заказа'},
+    ]
+
+
+def test_csv_keeps_leading_zeros(tmp_path):
+    path = write_formats(PRODUCTS, tmp_path, 'products')['csv']
+
+    valid, _ = normalize_file(path, normalize_products, None)
+
+    assert list(valid['article']) == ['001', 'A3']
+
+
+def write_workbook(path, rows):
+    """Лист с пустыми строками в середине и оформленными пустыми строками в конце"""
+    from openpyxl import Workbook
+
+    workbook = Workbook()
+    sheet = workbook.active
+    for row in rows:
+        sheet.append(row)
+    # Ячейки с форматом без значений: строки есть в XML листа
+    for row in range(len(rows) + 1, len(rows) + 4):
+        sheet.cell(row=row, column=1).number_format = '0.00'
+    workbook.save(path)
+
+
+def cells(df):
+    """Заголовок и строки листа с номерами (пустые ячейки - None)"""
+    values = df.astype(object).where(df.notna(), None)
+    return list(df.columns), [[index] + row for index, row in zip(df.index, values.values.tolist())]
+
+
+@pytest.mark.parametrize('header', [True, False])
+def test_excel_streaming_matches_whole_sheet(tmp_path, header):
+    path = tmp_path / 'sheet.xlsx'
+    rows = [('Адрес', 'Индекс'), ('ул. Ленина, 1', 420000), (None, None), ('ул. Мира, 2',),
+            (None, None), (None, None), ('ул. Гагарина, 3', 420003)]
+    write_workbook(path, rows)
+    expected = cells(next(read_sheet(str(path), header=header)))
+
+    for chunk_rows in CHUNK_SIZES[1:]:
+        streamed = [cells(df) for df in read_sheet(str(path), header=header, chunk_rows=chunk_rows)]
+        assert (streamed[0][0], sum((part for _, part in streamed), [])) == expected, chunk_rows
+
+
+def test_pickup_points_without_header(tmp_path):
+    path = tmp_path / 'pickup_points.xlsx'
+    write_workbook(path, [('ул. Ленина, 1',), (None,), ('  ул. Мира, 2 ',), ('ул. Ленина, 1',)])
+    expected_valid, expected_rejects = normalize_pickup_points(next(read_sheet(str(path), header=False)))
+
+    for chunk_rows in CHUNK_SIZES:
+        chunks = read_sheet(str(path), header=False, chunk_rows=chunk_rows)
+        valid, rejects = zip(*(normalize_pickup_points(df) for df in chunks))
+        assert pd.concat(valid, ignore_index=True).to_dict('records') == \
+            expected_valid.to_dict('records')
+        assert pd.concat(rejects, ignore_index=True).to_dict('records') == \
+            expected_rejects.to_dict('records')
@@ -0,0 +1,66 @@
+"""Поисковый индекс каталога в памяти (utils/search_index.py)"""
+from utils.search_index import ProductSearchIndex
+
+
+def product(product_id, name, supplier='Kari', quantity=1, article=None):
+    return {
+        'product_id': product_id,
+        'product_name': name,
+        'article': article or f'A{product_id:03d}',
+        'description': '',
+        'supplier_name': supplier,
+        'category_name': 'Обувь',
+        'quantity_in_stock': quantity,
+    }
+
+
+def catalog():
+    return [product(1, 'Ботинки мужские'), product(2, 'Туфли'), product(3, 'Ботинки женские')]
+
+
+def found_ids(index, query):
+    return [index.products[position]['product_id'] for position in index.search(query)]
+
+
+def test_search_with_and_without_postings():
+    index = ProductSearchIndex(catalog())
+    assert found_ids(index, 'БОТИН') == [1, 3]
+    assert found_ids(index, 'a002') == [2]
+
+    index.build_postings()
+    assert found_ids(index, 'ботин') == [1, 3]
+    assert found_ids(index, 'ботинки ж') == [3]
+    assert found_ids(index, 'сапоги') == []
+    assert found_ids(index, '') == [1, 2, 3]
+
+
+def test_upsert_and_remove_update_results():
+    index = ProductSearchIndex(catalog())
+    index.build_postings()
+    assert found_ids(index, 'ботин') == [1, 3]
+
+    index.upsert(product(4, 'Ботинки детские'))
+    index.upsert(product(2, 'Ботинки зимние'))
+    index.remove(1)
+
+    # Запомненные результаты прошлых запросов не используются
+    assert found_ids(index, 'ботин') == [2, 3, 4]
+    assert found_ids(index, '') == [2, 3, 4]
+    assert found_ids(index, 'туфли') == []
+
+
+def test_changes_during_postings_build_are_indexed():
+    index = ProductSearchIndex(catalog())
+    index.upsert(product(4, 'Сапоги'))
+    index.upsert(product(2, 'Сапоги летние'))
+
+    index.build_postings()
+
+    assert found_ids(index, 'сапог') == [2, 4]
+    assert not index.changed_positions
+
+
+def test_remove_unknown_product():
+    index = ProductSearchIndex(catalog())
+    index.remove(42)
+    assert found_ids(index, '') == [1, 2, 3]
@@ -0,0 +1,107 @@
+"""Перевод запросов PostgreSQL на диалект встроенной базы (database/sqlite.py)"""
+import pytest
+
+from database import sqlite
+from database.sqlite import search_terms, translate, ts_match, ts_rank
+
+
+def test_parameters():
+    assert translate("SELECT * FROM users WHERE login = %s AND password = %s", ('a', 'b')) == \
+        ("SELECT * FROM users WHERE login = ? AND password = ?", ['a', 'b'])
+    assert translate("SELECT %(id)s, %(name)s, %(id)s", {'name': 'x', 'id': 1}) == \
+        ("SELECT ?, ?, ?", [1, 'x', 1])
+    # %% - знак процента только в запросе с параметрами (как в psycopg2)
+    assert translate("SELECT '100%%', %s", (1,)) == ("SELECT '100%', ?", [1])
+    assert translate("SELECT '100%'") == ("SELECT '100%'", [])
+
+
+def test_any_expands_to_in():
+    assert translate("SELECT * FROM products WHERE id = ANY(%s)", ([1, 2, 3],)) == \
+        ("SELECT * FROM products WHERE id IN (?, ?, ?)", [1, 2, 3])
+    assert translate("SELECT * FROM products WHERE id = ANY (%(ids)s) AND id <> %(id)s",
+                     {'ids': [], 'id': 1}) == \
+        ("SELECT * FROM products WHERE id IN (NULL) AND id <> ?", [1])
+
+
+def test_like_ilike_and_casts():
+    assert translate("SELECT * FROM \"order\" o WHERE o.full_name ILIKE %(client)s", {'client': '%ив%'}) == \
+        ("SELECT * FROM \"order\" o WHERE LOWER(o.full_name) LIKE LOWER(?) ESCAPE '\\'", ['%ив%'])
+    assert translate("SELECT * FROM products WHERE search_text LIKE LOWER(%(search)s)", {'search': 'x'}) == \
+        ("SELECT * FROM products WHERE search_text LIKE LOWER(?) ESCAPE '\\'", ['x'])
+    assert translate("SELECT reltuples::bigint FROM pg_class WHERE oid = 'products'::regclass") == \
+        ("SELECT reltuples FROM pg_class WHERE oid = 'products'", [])
+
+
+def test_fulltext_functions():
+    query, values = translate("SELECT * FROM products "
+                              "WHERE search_vector @@ websearch_to_tsquery('russian', %(query)s)",
+                              {'query': 'ботинки'})
+    assert query == ("SELECT * FROM products "
+                     "WHERE ts_match(search_vector, websearch_to_tsquery('russian', ?))")
+    assert values == ['ботинки']
+
+    assert search_terms('Ботинки -женские or "туфли"') == \
+        [[('ботинки', False), ('женские', True)], [('туфли', False)]]
+    vector = 'ботинки мужские\na001\nобувь kari\nкожаные ботинки'
+    assert ts_match(vector, 'ботинки -женские')
+    assert not ts_match(vector, 'ботинки -мужские')
+    assert ts_match(vector, 'туфли or kari')
+    # Совпадение в названии весит больше, чем в описании
+    assert ts_rank(vector, 'мужские') > ts_rank(vector, 'кожаные')
+
+
+def add_product(db, product_id, name, description='', provider='Kari'):
+    db.execute_query("INSERT INTO products (id, article, name, description, provider, category) "
+                     "VALUES (%s, %s, %s, %s, %s, 'Обувь')",
+                     (product_id, f'A{product_id:03d}', name, description, provider), fetch=False)
+
+
+def test_product_queries(sqlite_db):
+    from database.queries import ProductQueries
+
+    add_product(sqlite_db, 1, 'Ботинки мужские', 'Скидка 50%')
+    add_product(sqlite_db, 2, 'Туфли', 'Ботинки в комплект не входят', provider='Obuv')
+    add_product(sqlite_db, 3, 'Сапоги_зимние')
+
+    def ids(products):
+        return [p['product_id'] for p in products]
+
+    assert ids(ProductQueries.get_products_by_ids([3, 1])) == [1, 3]
+    assert ids(ProductQueries.get_products_by_ids([])) == []
+    # Регистр кириллицы не учитывается, % и _ ищутся как обычные символы
+    assert ids(ProductQueries.search_products('БОТИНКИ')) == [1, 2]
+    assert ids(ProductQueries.search_products('50%')) == [1]
+    assert ids(ProductQueries.search_products('и_з')) == [3]
+    assert ids(ProductQueries.search_products('ботинки', 'Obuv')) == [2]
+    assert ids(ProductQueries.search_products('ботинки -туфли', mode='fulltext')) == [1]
+    assert ids(ProductQueries.search_products('ботинки', mode='fulltext')) == [1, 2]
+
+
+def test_returning_without_native_support(sqlite_db, monkeypatch):
+    monkeypatch.setattr(sqlite, 'NATIVE_RETURNING', False)
+
+    with sqlite_db.connection() as conn:
+        with conn.cursor() as cursor:
+            cursor.execute("INSERT INTO pickup_points (full_address) VALUES (%s) RETURNING id, full_address",
+                           ('ул. Ленина, 1',))
+            assert cursor.fetchone() == {'id': 1, 'full_address': 'ул. Ленина, 1'}
+
+            cursor.execute("UPDATE pickup_points SET full_address = %s WHERE id = %s RETURNING full_address",
+                           ('ул. Мира, 2', 1))
+            assert cursor.fetchone() == {'full_address': 'ул. Мира, 2'}
+
+            cursor.execute("UPDATE pickup_points SET full_address = %s WHERE id = %s RETURNING id",
+                           ('ул. Мира, 3', 42))
+            assert cursor.fetchone() is None
+        conn.commit()
+
+
+@pytest.mark.parametrize('query', [
+    "SELECT * FROM products WHERE name = %s",
+    "SELECT * FROM products WHERE id = ANY(%s) AND name ILIKE %s",
+])
+def test_rewrite_is_cached(query):
+    sqlite.rewrite.cache_clear()
+    translate(query, ('x', 'y'))
+    translate(query, ('z', 'w'))
+    assert sqlite.rewrite.cache_info().hits == 1
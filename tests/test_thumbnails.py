@@ -0,0 +1,81 @@
+"""Миниатюры фото товаров: заглушки и сброс после замены фото (utils/thumbnails.py)"""
+import os
+
+import pytest
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+pytest.importorskip('PyQt6.QtGui')
+
+from PyQt6.QtCore import QCoreApplication, QDeadlineTimer, QThread
+from PyQt6.QtGui import QColor, QImage, QPixmapCache
+from PyQt6.QtWidgets import QApplication
+
+from config import APP_CONFIG
+from utils.thumbnails import ThumbnailService
+
+
+@pytest.fixture
+def service(tmp_path, monkeypatch):
+    app = QApplication.instance() or QApplication([])
+    monkeypatch.setitem(APP_CONFIG, 'thumbnail_cache_dir', str(tmp_path / 'cache'))
+    QPixmapCache.clear()
+    service = ThumbnailService(20, 20)
+    yield service
+    service.shutdown()
+    QPixmapCache.clear()
+
+
+def save_photo(path, color):
+    image = QImage(40, 40, QImage.Format.Format_RGB32)
+    image.fill(QColor(color))
+    assert image.save(str(path), 'PNG')
+
+
+def wait_thumbnail(service, path, timeout_ms=5000):
+    """Миниатюра после построения в фоне (None - осталась заглушка)"""
+    service.thumbnail(path)
+    deadline = QDeadlineTimer(timeout_ms)
+    while path in service.pending and not deadline.hasExpired():
+        QCoreApplication.processEvents()
+        QThread.msleep(5)
+    assert path not in service.pending
+    return QPixmapCache.find(service.cache_key(path))
+
+
+def color(pixmap):
+    return pixmap.toImage().pixelColor(5, 5).name()
+
+
+def test_missing_photo_is_not_cached_as_placeholder(service, tmp_path):
+    path = str(tmp_path / 'photo.png')
+    assert service.thumbnail(path) is service.placeholder
+    assert QPixmapCache.find(service.cache_key(path)) is None
+
+    # Фото сохранено позже (например, диалогом редактирования)
+    save_photo(path, '#ff0000')
+    assert color(wait_thumbnail(service, path)) == '#ff0000'
+
+
+def test_invalidate_after_photo_replaced(service, tmp_path):
+    path = str(tmp_path / 'photo.png')
+    save_photo(path, '#ff0000')
+    assert color(wait_thumbnail(service, path)) == '#ff0000'
+
+    save_photo(path, '#0000ff')
+    assert color(service.thumbnail(path)) == '#ff0000'
+    service.invalidate(path)
+
+    assert color(wait_thumbnail(service, path)) == '#0000ff'
+
+
+def test_unreadable_photo_retried_after_change(service, tmp_path):
+    path = tmp_path / 'photo.png'
+    path.write_bytes(b'not an image')
+
+    assert wait_thumbnail(service, str(path)) is None
+    # Пока файл не изменился, повторно не читается
+    assert service.thumbnail(str(path)) is service.placeholder
+    assert str(path) not in service.pending
+
+    save_photo(path, '#00ff00')
+    assert color(wait_thumbnail(service, str(path))) == '#00ff00'
@@ -0,0 +1,2 @@
+# utils/__init__.py
+"""Вспомогательные утилиты"""
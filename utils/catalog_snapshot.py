@@ -0,0 +1,182 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+from decimal import Decimal
+from config import APP_CONFIG, DB_CONFIG
+from database.connection import db
+from database.queries import PRODUCT_COLUMNS
+
+
+# Версия формата файла: при изменении старые копии не используются
+SNAPSHOT_FORMAT = 1
+
+# Поля товара с типом NUMERIC (в JSON хранятся строкой)
+DECIMAL_FIELDS = ('price', 'price_with_discount')
+
+SCHEMA = """
+    CREATE TABLE IF NOT EXISTS meta (
+        key TEXT PRIMARY KEY,
+        value TEXT NOT NULL
+    );
+    CREATE TABLE IF NOT EXISTS products (
+        product_id INTEGER PRIMARY KEY,
+        position INTEGER NOT NULL,
+        data TEXT NOT NULL
+    );
+"""
+
+
+def encode_product(product):
+    return json.dumps(product, ensure_ascii=False, default=str)
+
+
+def decode_product(data):
+    product = json.loads(data)
+    for field in DECIMAL_FIELDS:
+        if product.get(field) is not None:
+            product[field] = Decimal(product[field])
+    return product
+
+
+class CatalogSnapshot:
+    """
+    Локальная копия каталога товаров (файл SQLite)
+
+    Каталог при входе показывается сразу из копии, затем с сервера
+    загружаются только товары, измененные после отметки синхронизации
+    (ProductQueries.get_products_changed_since). Товары хранятся в
+    порядке поискового индекса (position): новые - в конце.
+
+    Копия относится к конкретной базе и набору полей товара: если база
+    в DB_CONFIG или PRODUCT_COLUMNS изменились, копия не используется.
+    """
+
+    def __init__(self, path, enabled=True):
+        self.path = path
+        self._enabled = enabled
+        self.lock = threading.Lock()
+
+    @property
+    def enabled(self):
+        """Используется ли копия (синхронизация есть только для PostgreSQL)"""
+        return self._enabled and db.dialect == 'postgresql'
+
+    @staticmethod
+    def source():
+        """Идентификатор базы и набора полей, из которых сделана копия"""
+        columns = hashlib.sha1(' '.join(PRODUCT_COLUMNS.split()).encode()).hexdigest()[:12]
+        return f"{DB_CONFIG['host']}:{DB_CONFIG['port']}/{DB_CONFIG['database']}#{columns}"
+
+    def connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.executescript(SCHEMA)
+        return conn
+
+    def load(self):
+        """
+        Прочитать копию каталога
+
+        Returns:
+            (товары, отметка синхронизации) или None, если копии нет
+            или она сделана из другой базы
+        """
+        if not self.enabled or not os.path.exists(self.path):
+            return None
+
+        with self.lock:
+            try:
+                conn = self.connect()
+                try:
+                    meta = dict(conn.execute("SELECT key, value FROM meta"))
+                    if (meta.get('format') != str(SNAPSHOT_FORMAT)
+                            or meta.get('source') != self.source() or 'watermark' not in meta):
+                        return None
+                    rows = conn.execute("SELECT data FROM products ORDER BY position").fetchall()
+                finally:
+                    conn.close()
+            except (sqlite3.Error, ValueError) as e:
+                print(f"Не удалось прочитать локальную копию каталога: {e}")
+                return None
+
+        try:
+            products = [decode_product(data) for data, in rows]
+        except (ValueError, ArithmeticError) as e:
+            print(f"Локальная копия каталога повреждена: {e}")
+            return None
+        return products, int(meta['watermark'])
+
+    def save(self, products, watermark):
+        """Заменить копию полным каталогом"""
+        if not self.enabled:
+            return
+
+        rows = [(p['product_id'], position, encode_product(p)) for position, p in enumerate(products)]
+        with self.lock:
+            try:
+                directory = os.path.dirname(self.path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                conn = self.connect()
+                try:
+                    with conn:
+                        conn.execute("DELETE FROM products")
+                        conn.executemany("INSERT INTO products (product_id, position, data) VALUES (?, ?, ?)",
+                                         rows)
+                        self.write_meta(conn, watermark)
+                finally:
+                    conn.close()
+            except (OSError, sqlite3.Error) as e:
+                print(f"Не удалось сохранить локальную копию каталога: {e}")
+
+    def apply(self, changed, removed_ids, watermark):
+        """Внести в копию измененные, добавленные и удаленные товары"""
+        if not self.enabled or not os.path.exists(self.path):
+            return
+
+        with self.lock:
+            try:
+                conn = self.connect()
+                try:
+                    with conn:
+                        conn.executemany("DELETE FROM products WHERE product_id = ?",
+                                         [(product_id,) for product_id in removed_ids])
+                        # Новые товары - в конец, измененные остаются на своих местах
+                        next_position = conn.execute(
+                            "SELECT COALESCE(MAX(position), -1) + 1 FROM products").fetchone()[0]
+                        for product in changed:
+                            cursor = conn.execute("UPDATE products SET data = ? WHERE product_id = ?",
+                                                  (encode_product(product), product['product_id']))
+                            if cursor.rowcount == 0:
+                                conn.execute("INSERT INTO products (product_id, position, data) VALUES (?, ?, ?)",
+                                             (product['product_id'], next_position, encode_product(product)))
+                                next_position += 1
+                        self.write_meta(conn, watermark)
+                finally:
+                    conn.close()
+            except sqlite3.Error as e:
+                print(f"Не удалось обновить локальную копию каталога: {e}")
+
+    def write_meta(self, conn, watermark):
+        conn.executemany("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", [
+            ('format', str(SNAPSHOT_FORMAT)),
+            ('source', self.source()),
+            ('watermark', str(watermark)),
+        ])
+
+    def clear(self):
+        """Удалить копию (например, каталог стал слишком большим для памяти)"""
+        with self.lock:
+            try:
+                os.remove(self.path)
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                print(f"Не удалось удалить локальную копию каталога: {e}")
+
+
+catalog_snapshot = CatalogSnapshot(
+    APP_CONFIG.get('catalog_snapshot_path', 'cache/catalog_snapshot.db'),
+    enabled=APP_CONFIG.get('catalog_snapshot', True),
+)
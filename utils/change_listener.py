@@ -0,0 +1,155 @@
+import json
+import psycopg2
+from psycopg2.extensions import ISOLATION_LEVEL_AUTOCOMMIT
+from PyQt6.QtCore import QObject, QSocketNotifier, QTimer, pyqtSignal
+from config import DB_CONFIG
+from database.cache import query_cache
+from database.connection import db
+
+
+# Канал уведомлений триггеров (см. миграцию 003_change_notifications)
+CHANNEL = 'table_changes'
+
+
+class ChangeListener(QObject):
+    """
+    Уведомления об изменениях таблиц (LISTEN/NOTIFY)
+
+    Слушает канал на отдельном соединении в режиме autocommit. Сокет
+    соединения отслеживается QSocketNotifier, поэтому уведомления
+    обрабатываются в цикле событий Qt без отдельного потока. Триггеры
+    отправляют одно уведомление на оператор (см. миграцию
+    009_statement_change_notifications), а уведомления, пришедшие почти
+    одновременно, объединяются: окна получают одну пачку ID на таблицу.
+    """
+
+    # Имя таблицы и список ID измененных строк
+    changed = pyqtSignal(str, list)
+    # Имя таблицы, измененной массово (ID строк не переданы) - перезагрузить
+    reloaded = pyqtSignal(str)
+    # Соединение восстановлено после обрыва - уведомления могли быть потеряны
+    resynced = pyqtSignal()
+
+    def __init__(self, parent=None, delay_ms=100, reconnect_ms=5000):
+        super().__init__(parent)
+        self.delay_ms = delay_ms
+        self.reconnect_ms = reconnect_ms
+        self.conn = None
+        self.notifier = None
+        self.pending = {}
+        self.lost = False
+        # Таймеры создаются в start(), когда приложение Qt уже запущено
+        self.flush_timer = None
+        self.reconnect_timer = None
+
+    @property
+    def active(self):
+        """Подключен ли слушатель (изменения приходят уведомлениями)"""
+        return self.conn is not None and not self.conn.closed
+
+    def start(self):
+        """Подключиться к БД и подписаться на канал уведомлений"""
+        # Уведомления (LISTEN/NOTIFY) есть только в PostgreSQL
+        if db.dialect != 'postgresql':
+            return False
+
+        if self.flush_timer is None:
+            self.flush_timer = QTimer(self)
+            self.flush_timer.setSingleShot(True)
+            self.flush_timer.setInterval(self.delay_ms)
+            self.flush_timer.timeout.connect(self.flush)
+
+            self.reconnect_timer = QTimer(self)
+            self.reconnect_timer.setSingleShot(True)
+            self.reconnect_timer.setInterval(self.reconnect_ms)
+            self.reconnect_timer.timeout.connect(self.start)
+
+        if self.active:
+            return True
+
+        try:
+            conn = psycopg2.connect(
+                host=DB_CONFIG['host'],
+                port=DB_CONFIG['port'],
+                database=DB_CONFIG['database'],
+                user=DB_CONFIG['user'],
+                password=DB_CONFIG['password']
+            )
+            conn.set_isolation_level(ISOLATION_LEVEL_AUTOCOMMIT)
+            with conn.cursor() as cursor:
+                cursor.execute(f"LISTEN {CHANNEL}")
+        except psycopg2.Error as e:
+            print(f"Не удалось подписаться на изменения БД: {e}")
+            self.lost = True
+            self.reconnect_timer.start()
+            return False
+
+        self.conn = conn
+        self.notifier = QSocketNotifier(conn.fileno(), QSocketNotifier.Type.Read, self)
+        self.notifier.activated.connect(self.on_activated)
+
+        if self.lost:
+            self.lost = False
+            query_cache.clear()
+            self.resynced.emit()
+        return True
+
+    def stop(self):
+        """Отписаться от уведомлений и закрыть соединение"""
+        if self.reconnect_timer is not None:
+            self.reconnect_timer.stop()
+        self.close_connection()
+
+    def close_connection(self):
+        if self.notifier is not None:
+            self.notifier.setEnabled(False)
+            self.notifier.deleteLater()
+            self.notifier = None
+        if self.conn is not None:
+            try:
+                self.conn.close()
+            except psycopg2.Error:
+                pass
+            self.conn = None
+
+    def on_activated(self, *args):
+        """Данные на сокете соединения: разбор уведомлений"""
+        try:
+            self.conn.poll()
+        except (psycopg2.OperationalError, psycopg2.InterfaceError) as e:
+            print(f"Соединение для уведомлений потеряно: {e}")
+            self.close_connection()
+            self.lost = True
+            self.reconnect_timer.start()
+            return
+
+        while self.conn.notifies:
+            notify = self.conn.notifies.pop(0)
+            try:
+                payload = json.loads(notify.payload)
+                table, ids = payload['table'], payload['ids']
+            except (ValueError, KeyError, TypeError):
+                print(f"Некорректное уведомление: {notify.payload}")
+                continue
+            if ids is None or self.pending.get(table, ()) is None:
+                # Изменено слишком много строк: таблица перезагружается целиком
+                self.pending[table] = None
+            else:
+                self.pending.setdefault(table, set()).update(ids)
+
+        if self.pending and not self.flush_timer.isActive():
+            self.flush_timer.start()
+
+    def flush(self):
+        """Передать накопленные изменения окнам"""
+        pending, self.pending = self.pending, {}
+        for table, ids in pending.items():
+            query_cache.invalidate(frozenset({table}))
+            if ids is None:
+                self.reloaded.emit(table)
+            else:
+                self.changed.emit(table, sorted(ids))
+
+
+# Глобальный слушатель изменений (запускается в main.py)
+change_listener = ChangeListener()
@@ -0,0 +1,157 @@
+import threading
+import psycopg2
+from PyQt6.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+from database.connection import db
+
+
+class QuerySignals(QObject):
+    """Сигналы фонового запроса"""
+
+    finished = pyqtSignal(object)
+    failed = pyqtSignal(str)
+    # Задача завершилась (в том числе после отмены или ошибки)
+    done = pyqtSignal()
+
+
+class QueryTask(QRunnable):
+    """
+    Выполнение функции доступа к данным в фоновом потоке
+
+    Функция выполняется на отдельном соединении из пула (см.
+    db.connection()), поэтому отмена прерывает именно этот запрос на
+    сервере через соединение (аналог pg_cancel_backend).
+    """
+
+    def __init__(self, func, args, kwargs):
+        super().__init__()
+        self.setAutoDelete(False)
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self.signals = QuerySignals()
+        self.cancelled = False
+        self.connection = None
+        self.lock = threading.Lock()
+
+    def cancel(self):
+        """Отменить задачу и прервать выполняющийся запрос"""
+        with self.lock:
+            self.cancelled = True
+            conn = self.connection
+            if conn is not None and not conn.closed:
+                try:
+                    conn.cancel()
+                except psycopg2.Error as e:
+                    print(f"Ошибка отмены запроса: {e}")
+
+    def run(self):
+        try:
+            if self.cancelled:
+                return
+
+            try:
+                with db.connection() as conn:
+                    with self.lock:
+                        self.connection = conn
+                    try:
+                        if self.cancelled:
+                            return
+                        result = self.func(*self.args, **self.kwargs)
+                    finally:
+                        with self.lock:
+                            self.connection = None
+            except Exception as e:
+                if not self.cancelled:
+                    self.signals.failed.emit(str(e))
+                return
+
+            if not self.cancelled:
+                self.signals.finished.emit(result)
+        finally:
+            self.signals.done.emit()
+
+
+class QueryRunner(QObject):
+    """
+    Запуск запросов к БД в фоновых потоках
+
+    Каждый запрос запускается под ключом: новый запрос с тем же ключом
+    отменяет предыдущий, а результат отмененного запроса не доставляется.
+    Результаты и ошибки приходят в поток интерфейса через сигналы.
+    """
+
+    # Есть ли выполняющиеся запросы (для индикации загрузки)
+    busy_changed = pyqtSignal(bool)
+
+    def __init__(self, parent=None, max_threads=4):
+        super().__init__(parent)
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(max_threads)
+        self.tasks = {}
+        self.running = set()
+
+    def run(self, key, func, *args, on_result=None, on_error=None, **kwargs):
+        """
+        Выполнить func(*args, **kwargs) в фоновом потоке
+
+        Args:
+            key: Ключ запроса (предыдущий запрос с этим ключом отменяется)
+            func: Функция доступа к данным
+            on_result: Обработчик результата (в потоке интерфейса)
+            on_error: Обработчик текста ошибки (в потоке интерфейса)
+        """
+        self.cancel(key)
+
+        task = QueryTask(func, args, kwargs)
+        task.signals.finished.connect(lambda result: self.on_finished(key, task, result, on_result))
+        task.signals.failed.connect(lambda error: self.on_failed(key, task, error, on_error))
+        task.signals.done.connect(lambda: self.on_done(task))
+
+        was_busy = self.is_busy()
+        self.tasks[key] = task
+        self.running.add(task)
+        self.pool.start(task)
+        if not was_busy:
+            self.busy_changed.emit(True)
+        return task
+
+    def cancel(self, key):
+        """Отменить запрос с указанным ключом"""
+        task = self.tasks.pop(key, None)
+        if task is not None:
+            task.cancel()
+            self.update_busy()
+
+    def cancel_all(self):
+        """Отменить все запросы (например, при закрытии окна)"""
+        for key in list(self.tasks):
+            self.cancel(key)
+        self.pool.clear()
+
+    def is_busy(self):
+        return bool(self.tasks)
+
+    def update_busy(self):
+        if not self.tasks:
+            self.busy_changed.emit(False)
+
+    def on_finished(self, key, task, result, handler):
+        if self.tasks.get(key) is not task:
+            return
+        del self.tasks[key]
+        self.update_busy()
+        if handler is not None:
+            handler(result)
+
+    def on_failed(self, key, task, error, handler):
+        if self.tasks.get(key) is not task:
+            return
+        del self.tasks[key]
+        self.update_busy()
+        if handler is not None:
+            handler(error)
+        else:
+            print(f"Ошибка фонового запроса: {error}")
+
+    def on_done(self, task):
+        self.running.discard(task)
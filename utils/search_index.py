@@ -0,0 +1,184 @@
+import threading
+from array import array
+from collections import OrderedDict
+
+
+# Поля товара, по которым выполняется поиск
+SEARCH_FIELDS = ('product_name', 'article', 'description', 'supplier_name', 'category_name')
+
+# Как часто проверять отмену при переборе кандидатов
+CANCEL_CHECK_EVERY = 4096
+
+
+def normalize(text):
+    """Приведение текста к виду для поиска без учета регистра"""
+    return str(text).casefold() if text is not None else ''
+
+
+def trigrams(text):
+    """Множество триграмм строки"""
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def product_text(product):
+    """Нормализованный текст всех полей поиска товара"""
+    return '\n'.join(normalize(product.get(field)) for field in SEARCH_FIELDS)
+
+
+class ProductSearchIndex:
+    """
+    Поисковый индекс товаров в памяти
+
+    Для каждого товара заранее хранится нормализованный текст всех полей
+    поиска (поля разделены переводом строки, поэтому совпадение не может
+    пересечь границу поля). Списки товаров по триграммам позволяют
+    проверять подстроку только у кандидатов, а результаты последних
+    запросов - сужать поиск по мере ввода: совпадения запроса "ботин"
+    всегда входят в совпадения запроса "боти".
+
+    Измененные товары обновляются на месте (upsert/remove): удаленный
+    товар остается пустой позицией, а новые триграммы измененного
+    товара дописываются в списки (лишние кандидаты отсеиваются проверкой
+    подстроки).
+    """
+
+    def __init__(self, products, history_size=32):
+        self.products = products
+        self.texts = [product_text(p) for p in products]
+        self.positions = {p['product_id']: i for i, p in enumerate(products)}
+        self.postings = None
+        # Позиции, измененные во время построения списков
+        self.changed_positions = set()
+        self.history = OrderedDict()
+        self.history_size = history_size
+        # Увеличивается при изменении товаров: результат поиска, начатого
+        # до изменения, не запоминается
+        self.version = 0
+        self.lock = threading.Lock()
+
+    def build_postings(self):
+        """Построить списки товаров по триграммам (можно вызывать в фоновом потоке)"""
+        postings = {}
+        for position, text in enumerate(self.texts):
+            self.add_postings(postings, position, text)
+
+        with self.lock:
+            for position in self.changed_positions:
+                self.add_postings(postings, position, self.texts[position])
+            self.changed_positions.clear()
+            self.postings = postings
+
+    @staticmethod
+    def add_postings(postings, position, text):
+        for gram in trigrams(text):
+            ids = postings.get(gram)
+            if ids is None:
+                ids = postings[gram] = array('I')
+            ids.append(position)
+
+    def upsert(self, product):
+        """Добавить новый или заменить измененный товар (в потоке интерфейса)"""
+        text = product_text(product)
+        with self.lock:
+            position = self.positions.get(product['product_id'])
+            if position is None:
+                position = len(self.products)
+                self.positions[product['product_id']] = position
+                self.products.append(product)
+                self.texts.append(text)
+            else:
+                self.products[position] = product
+                self.texts[position] = text
+
+            if self.postings is None:
+                self.changed_positions.add(position)
+            else:
+                self.add_postings(self.postings, position, text)
+            self.history.clear()
+            self.version += 1
+
+    def remove(self, product_id):
+        """Удалить товар из индекса"""
+        with self.lock:
+            position = self.positions.pop(product_id, None)
+            if position is None:
+                return
+            self.products[position] = None
+            self.texts[position] = ''
+            self.history.clear()
+            self.version += 1
+
+    def search(self, query, cancelled=None):
+        """
+        Найти товары, содержащие строку запроса в любом из полей
+
+        Args:
+            query: Текст запроса
+            cancelled: Функция без аргументов, возвращающая True, если
+                       поиск больше не нужен
+
+        Returns:
+            Список позиций товаров (в исходном порядке) или None при отмене
+        """
+        query = normalize(query).strip()
+        if not query:
+            # positions меняется в потоке интерфейса (upsert/remove)
+            with self.lock:
+                positions = list(self.positions.values())
+            return sorted(positions)
+
+        with self.lock:
+            cached = self.history.get(query)
+            if cached is not None:
+                self.history.move_to_end(query)
+                return cached
+            candidates = self.narrowest_previous(query)
+            version = self.version
+
+        if candidates is None:
+            candidates = self.trigram_candidates(query)
+
+        texts = self.texts
+        result = []
+        for checked, position in enumerate(candidates):
+            if cancelled is not None and checked % CANCEL_CHECK_EVERY == 0 and cancelled():
+                return None
+            if query in texts[position]:
+                result.append(position)
+
+        with self.lock:
+            if version != self.version:
+                return result
+            self.history[query] = result
+            while len(self.history) > self.history_size:
+                self.history.popitem(last=False)
+        return result
+
+    def narrowest_previous(self, query):
+        """Самый узкий результат прошлого запроса, являющегося подстрокой текущего"""
+        best = None
+        for previous, result in self.history.items():
+            if previous in query and (best is None or len(result) < len(best)):
+                best = result
+        return best
+
+    def trigram_candidates(self, query):
+        """Кандидаты по триграммам запроса (или все товары, если индекса нет)"""
+        postings = self.postings
+        if postings is None or len(query) < 3:
+            return range(len(self.texts))
+
+        lists = []
+        for gram in trigrams(query):
+            ids = postings.get(gram)
+            if ids is None:
+                return []
+            lists.append(ids)
+
+        lists.sort(key=len)
+        candidates = set(lists[0])
+        for ids in lists[1:]:
+            if len(candidates) < 64:
+                break
+            candidates.intersection_update(ids)
+        return sorted(candidates)
@@ -0,0 +1,193 @@
+import hashlib
+import os
+import tempfile
+from PyQt6.QtCore import (Qt, QObject, QRunnable, QThreadPool, QBuffer, QByteArray,
+                          QIODevice, pyqtSignal)
+from PyQt6.QtGui import QImage, QImageReader, QPixmap, QPixmapCache
+from config import APP_CONFIG, RESOURCES
+
+
+class ThumbnailSignals(QObject):
+    """Сигналы фоновой задачи (QRunnable не может иметь собственных сигналов)"""
+
+    # Путь к фото, готовая миниатюра (пустая при ошибке)
+    loaded = pyqtSignal(str, QImage)
+
+
+class ThumbnailTask(QRunnable):
+    """Чтение, уменьшение и сохранение в дисковый кэш одного фото"""
+
+    def __init__(self, photo_path, width, height, cache_dir, signals):
+        super().__init__()
+        self.photo_path = photo_path
+        self.width = width
+        self.height = height
+        self.cache_dir = cache_dir
+        self.signals = signals
+
+    def run(self):
+        try:
+            image = self.load_thumbnail()
+        except Exception as e:
+            print(f"Ошибка загрузки миниатюры '{self.photo_path}': {e}")
+            image = QImage()
+        self.signals.loaded.emit(self.photo_path, image)
+
+    def load_thumbnail(self):
+        """Взять миниатюру из дискового кэша или построить ее заново"""
+        with open(self.photo_path, 'rb') as f:
+            data = f.read()
+
+        # Ключ кэша зависит от содержимого файла и размера миниатюры
+        digest = hashlib.sha1(data)
+        digest.update(f'{self.width}x{self.height}'.encode())
+        name = digest.hexdigest()
+        cache_path = os.path.join(self.cache_dir, name[:2], f'{name}.png')
+
+        if os.path.exists(cache_path):
+            image = QImage(cache_path)
+            if not image.isNull():
+                return image
+
+        buffer = QBuffer()
+        buffer.setData(QByteArray(data))
+        buffer.open(QIODevice.OpenModeFlag.ReadOnly)
+        reader = QImageReader(buffer)
+
+        # JPEG умеет декодироваться сразу в уменьшенном размере
+        source_size = reader.size()
+        if source_size.isValid():
+            target = source_size.scaled(self.width, self.height, Qt.AspectRatioMode.KeepAspectRatio)
+            if target.width() < source_size.width():
+                reader.setScaledSize(target)
+
+        image = reader.read()
+        if image.isNull():
+            return image
+
+        if image.width() > self.width or image.height() > self.height:
+            image = image.scaled(self.width, self.height, Qt.AspectRatioMode.KeepAspectRatio,
+                                 Qt.TransformationMode.SmoothTransformation)
+
+        # Уникальный временный файл: одинаковые фото (один ключ кэша) могут
+        # обрабатываться в нескольких потоках одновременно
+        directory = os.path.dirname(cache_path)
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(suffix='.tmp', dir=directory)
+        os.close(fd)
+        try:
+            if image.save(tmp_path, 'PNG'):
+                os.replace(tmp_path, cache_path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+        return image
+
+
+class ThumbnailService(QObject):
+    """
+    Миниатюры фото товаров
+
+    Фото декодируются и уменьшаются в пуле потоков, готовые миниатюры
+    хранятся в дисковом кэше и в QPixmapCache. Пока миниатюра не готова,
+    возвращается заглушка, а по готовности испускается thumbnail_ready.
+
+    Заглушка в QPixmapCache под ключом фото не попадает: отсутствующий
+    файл проверяется заново при следующем обращении, а файл, который не
+    удалось прочитать, - после изменения (размер и время изменения).
+    После замены фото миниатюру нужно сбросить через invalidate().
+    """
+
+    # Миниатюра для фото готова (путь к фото)
+    thumbnail_ready = pyqtSignal(str)
+
+    def __init__(self, width, height, parent=None):
+        super().__init__(parent)
+        self.width = width
+        self.height = height
+        self.cache_dir = APP_CONFIG['thumbnail_cache_dir']
+        self.pending = set()
+        # Фото, миниатюры которых сброшены во время построения
+        self.outdated = set()
+        # Путь -> (время изменения, размер) файла, который не удалось прочитать
+        self.failed = {}
+
+        QPixmapCache.setCacheLimit(APP_CONFIG['thumbnail_memory_kb'])
+
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(max(1, QThreadPool.globalInstance().maxThreadCount() - 1))
+
+        self.signals = ThumbnailSignals(self)
+        self.signals.loaded.connect(self.on_loaded)
+
+        self.placeholder = QPixmap(RESOURCES['placeholder_image'])
+        if not self.placeholder.isNull():
+            self.placeholder = self.placeholder.scaled(width, height, Qt.AspectRatioMode.KeepAspectRatio,
+                                                       Qt.TransformationMode.SmoothTransformation)
+
+    def cache_key(self, photo_path):
+        """Ключ миниатюры в QPixmapCache"""
+        return f'thumb:{self.width}x{self.height}:{photo_path}'
+
+    def thumbnail(self, photo_path):
+        """
+        Получить миниатюру фото
+
+        Returns:
+            Готовая миниатюра или заглушка, если миниатюра еще загружается
+        """
+        if not photo_path:
+            return self.placeholder
+
+        pixmap = QPixmapCache.find(self.cache_key(photo_path))
+        if pixmap is not None:
+            return pixmap
+
+        if photo_path not in self.pending:
+            try:
+                signature = self.file_signature(photo_path)
+            except OSError:
+                return self.placeholder
+            if self.failed.get(photo_path) == signature:
+                return self.placeholder
+
+            self.pending.add(photo_path)
+            self.pool.start(ThumbnailTask(photo_path, self.width, self.height,
+                                          self.cache_dir, self.signals))
+        return self.placeholder
+
+    @staticmethod
+    def file_signature(photo_path):
+        stat = os.stat(photo_path)
+        return stat.st_mtime_ns, stat.st_size
+
+    def invalidate(self, photo_path):
+        """Забыть миниатюру в памяти (например, после замены фото)"""
+        if not photo_path:
+            return
+        QPixmapCache.remove(self.cache_key(photo_path))
+        self.failed.pop(photo_path, None)
+        if photo_path in self.pending:
+            # Строящаяся миниатюра может быть сделана из старого файла
+            self.outdated.add(photo_path)
+
+    def on_loaded(self, photo_path, image):
+        """Миниатюра построена в фоновом потоке"""
+        self.pending.discard(photo_path)
+        if photo_path in self.outdated:
+            # Карточки перерисуются и запросят миниатюру заново
+            self.outdated.discard(photo_path)
+        elif image.isNull():
+            try:
+                self.failed[photo_path] = self.file_signature(photo_path)
+            except OSError:
+                pass
+        else:
+            QPixmapCache.insert(self.cache_key(photo_path), QPixmap.fromImage(image))
+        self.thumbnail_ready.emit(photo_path)
+
+    def shutdown(self):
+        """Отменить ожидающие задачи и дождаться выполняющихся"""
+        self.pool.clear()
+        self.pool.waitForDone()
@@ -3,6 +3,7 @@ from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel,
 from PyQt6.QtCore import Qt, pyqtSignal
 from PyQt6.QtGui import QPixmap, QIcon
 from database.queries import UserQueries
+from utils.query_runner import QueryRunner
 from views.products_window import ProductsWindow
 
 
@@ -12,6 +13,7 @@ class LoginWindow(QWidget):
     def __init__(self):
         super().__init__()
         self.current_user = None
+        self.runner = QueryRunner(self)
         self.init_ui()
 
     def init_ui(self):
@@ -131,26 +133,39 @@ class LoginWindow(QWidget):
             )
             return
 
-        try:
-            user = UserQueries.authenticate(login, password)
-
-            if user:
-                self.current_user = user
-                self.open_products_window()
-            else:
-                QMessageBox.warning(
-                    self,
-                    'Ошибка авторизации',
-                    'Неверный логин или пароль!'
-                )
-                self.password_input.clear()
-
-        except Exception as e:
-            QMessageBox.critical(
+        self.set_loading(True)
+        self.runner.run('authenticate', UserQueries.authenticate, login, password,
+                        on_result=self.on_authenticated, on_error=self.on_login_failed)
+
+    def set_loading(self, loading):
+        """Блокировка кнопок входа на время проверки"""
+        self.login_button.setEnabled(not loading)
+        self.guest_button.setEnabled(not loading)
+        self.login_button.setText('Вход...' if loading else 'Войти')
+
+    def on_authenticated(self, user):
+        """Результат проверки логина и пароля"""
+        self.set_loading(False)
+
+        if user:
+            self.current_user = user
+            self.open_products_window()
+        else:
+            QMessageBox.warning(
                 self,
-                'Ошибка',
-                f'Ошибка подключения к базе данных:\n{str(e)}'
+                'Ошибка авторизации',
+                'Неверный логин или пароль!'
             )
+            self.password_input.clear()
+
+    def on_login_failed(self, error):
+        """Ошибка при проверке логина и пароля"""
+        self.set_loading(False)
+        QMessageBox.critical(
+            self,
+            'Ошибка',
+            f'Ошибка подключения к базе данных:\n{error}'
+        )
 
     def login_as_guest(self):
         """Вход как гость"""
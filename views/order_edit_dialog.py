@@ -3,6 +3,7 @@ from PyQt6.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QLabel,
                              QMessageBox, QFormLayout, QGroupBox)
 from PyQt6.QtCore import Qt, QDate
 from database.queries import OrderQueries, UserQueries
+from utils.query_runner import QueryRunner
 
 
 class OrderEditDialog(QDialog):
@@ -12,14 +13,10 @@ class OrderEditDialog(QDialog):
         super().__init__(parent)
         self.order_id = order_id
         self.order_data = None
-
-        if order_id:
-            self.order_data = OrderQueries.get_order_by_id(order_id)
+        self.runner = QueryRunner(self)
 
         self.init_ui()
-
-        if self.order_data:
-            self.load_order_data()
+        self.load_data()
 
     def init_ui(self):
         """Инициализация интерфейса"""
@@ -64,12 +61,10 @@ class OrderEditDialog(QDialog):
 
         # Пункт выдачи
         self.pickup_point_combo = QComboBox()
-        self.load_pickup_points()
         form_layout.addRow('Пункт выдачи*:', self.pickup_point_combo)
 
         # Клиент
         self.client_combo = QComboBox()
-        self.load_clients()
         form_layout.addRow('Клиент*:', self.client_combo)
 
         # Код получения
@@ -102,20 +97,27 @@ class OrderEditDialog(QDialog):
 
         layout.addStretch()
 
+        # Индикатор загрузки данных
+        self.loading_label = QLabel('Загрузка...')
+        self.loading_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        self.loading_label.setStyleSheet('color: #666; font-style: italic;')
+        layout.addWidget(self.loading_label)
+
         # Кнопки управления
         buttons_layout = QHBoxLayout()
 
-        save_btn = QPushButton('Сохранить')
-        save_btn.setMinimumHeight(40)
-        save_btn.clicked.connect(self.save_order)
-        buttons_layout.addWidget(save_btn)
+        self.save_btn = QPushButton('Сохранить')
+        self.save_btn.setMinimumHeight(40)
+        self.save_btn.clicked.connect(self.save_order)
+        buttons_layout.addWidget(self.save_btn)
 
+        self.delete_btn = None
         if self.order_id:
-            delete_btn = QPushButton('Удалить')
-            delete_btn.setObjectName('deleteButton')
-            delete_btn.setMinimumHeight(40)
-            delete_btn.clicked.connect(self.delete_order)
-            buttons_layout.addWidget(delete_btn)
+            self.delete_btn = QPushButton('Удалить')
+            self.delete_btn.setObjectName('deleteButton')
+            self.delete_btn.setMinimumHeight(40)
+            self.delete_btn.clicked.connect(self.delete_order)
+            buttons_layout.addWidget(self.delete_btn)
 
         cancel_btn = QPushButton('Отмена')
         cancel_btn.setMinimumHeight(40)
@@ -126,24 +128,63 @@ class OrderEditDialog(QDialog):
 
         self.setLayout(layout)
 
-    def load_pickup_points(self):
-        """Загрузка пунктов выдачи"""
-        try:
-            points = OrderQueries.get_all_pickup_points()
-            for point in points:
-                self.pickup_point_combo.addItem(point['full_address'], point['point_id'])
-        except Exception as e:
-            QMessageBox.critical(self, 'Ошибка', f'Ошибка загрузки пунктов выдачи: {e}')
+    def set_loading(self, loading):
+        """Блокировка кнопок на время загрузки данных"""
+        self.loading_label.setVisible(loading)
+        self.save_btn.setEnabled(not loading)
+        if self.delete_btn is not None:
+            self.delete_btn.setEnabled(not loading)
+
+    def load_data(self):
+        """Загрузка справочников и данных заказа (в фоне)"""
+        self.set_loading(True)
+        self.runner.run('dialog_data', self.fetch_data, self.order_id,
+                        on_result=self.on_data_loaded, on_error=self.on_data_failed)
+
+    @staticmethod
+    def fetch_data(order_id):
+        """Запросы справочников и заказа (выполняется в фоновом потоке)"""
+        return {
+            'pickup_points': OrderQueries.get_all_pickup_points(),
+            'users': UserQueries.get_all_users(),
+            'order': OrderQueries.get_order_by_id(order_id) if order_id else None,
+        }
+
+    def on_data_loaded(self, data):
+        """Заполнение формы загруженными данными"""
+        self.load_pickup_points(data['pickup_points'])
+        self.load_clients(data['users'])
 
-    def load_clients(self):
-        """Загрузка клиентов"""
-        try:
-            users = UserQueries.get_all_users()
-            for user in users:
-                display_text = f"{user['full_name']} ({user['role_name']})"
-                self.client_combo.addItem(display_text, user['user_id'])
-        except Exception as e:
-            QMessageBox.critical(self, 'Ошибка', f'Ошибка загрузки клиентов: {e}')
+        if self.order_id:
+            if not data['order']:
+                QMessageBox.warning(self, 'Ошибка', 'Заказ не найден (возможно, он был удален)!')
+                self.reject()
+                return
+            self.order_data = data['order']
+            self.load_order_data()
+
+        self.set_loading(False)
+
+    def on_data_failed(self, error):
+        """Ошибка загрузки данных формы"""
+        self.loading_label.setText('Не удалось загрузить данные')
+        QMessageBox.critical(self, 'Ошибка', f'Ошибка загрузки данных заказа:\n{error}')
+
+    def load_pickup_points(self, points):
+        """Заполнение списка пунктов выдачи"""
+        for point in points:
+            self.pickup_point_combo.addItem(point['full_address'], point['point_id'])
+
+    def load_clients(self, users):
+        """Заполнение списка клиентов"""
+        for user in users:
+            display_text = f"{user['full_name']} ({user['role_name']})"
+            self.client_combo.addItem(display_text, user['user_id'])
+
+    def done(self, result):
+        """Отмена фоновой загрузки при закрытии диалога"""
+        self.runner.cancel_all()
+        super().done(result)
 
     def load_statuses(self):
         """Загрузка статусов заказов"""
@@ -0,0 +1,231 @@
+from PyQt6.QtCore import Qt, QAbstractTableModel, QModelIndex, pyqtSignal
+from database.queries import OrderQueries
+
+
+# Столбцы таблицы заказов: (заголовок, поле строки заказа)
+ORDER_COLUMNS = [
+    ('ID', 'order_id'),
+    ('Дата заказа', 'order_date'),
+    ('Дата доставки', 'delivery_date'),
+    ('Пункт выдачи', 'pickup_address'),
+    ('Клиент', 'client_name'),
+    ('Статус', 'status_name'),
+    ('Код получения', 'recipient_code'),
+]
+
+# Поля с датами (в таблице показывается только дата без времени)
+DATE_FIELDS = ('order_date', 'delivery_date')
+
+# Цвет фона ячейки статуса
+STATUS_COLORS = {
+    'Новый': Qt.GlobalColor.lightGray,
+    'Завершен': Qt.GlobalColor.green,
+}
+
+
+def date_text(value):
+    """Дата в виде ГГГГ-ММ-ДД (пустая строка для пропуска)"""
+    return str(value).split()[0] if value else ''
+
+
+class OrderTableModel(QAbstractTableModel):
+    """
+    Модель таблицы заказов с постраничной подгрузкой в фоне
+
+    Сортировка (клик по заголовку) и фильтры выполняются на сервере:
+    при их изменении список загружается заново с первой страницы.
+    """
+
+    OrderRole = Qt.ItemDataRole.UserRole + 1
+
+    # Страница загружена (в том числе пустая)
+    page_loaded = pyqtSignal()
+    # Ошибка загрузки страницы (текст ошибки)
+    load_failed = pyqtSignal(str)
+
+    def __init__(self, runner, page_size=100, parent=None):
+        super().__init__(parent)
+        self.runner = runner
+        self.page_size = page_size
+        self.orders = []
+        self.sort_field = 'order_date'
+        self.descending = True
+        self.filters = {}
+        self.next_page_key = None
+        self.has_more = False
+        self.loading = False
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self.orders)
+
+    def columnCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(ORDER_COLUMNS)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or index.row() >= len(self.orders):
+            return None
+
+        order = self.orders[index.row()]
+        field = ORDER_COLUMNS[index.column()][1]
+
+        if role == self.OrderRole:
+            return order
+        if role == Qt.ItemDataRole.DisplayRole:
+            value = order.get(field)
+            if field in DATE_FIELDS:
+                return date_text(value)
+            return '' if value is None else str(value)
+        if role == Qt.ItemDataRole.TextAlignmentRole:
+            return Qt.AlignmentFlag.AlignCenter
+        if role == Qt.ItemDataRole.BackgroundRole and field == 'status_name':
+            return STATUS_COLORS.get(order['status_name'])
+        return None
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if (orientation == Qt.Orientation.Horizontal and role == Qt.ItemDataRole.DisplayRole
+                and 0 <= section < len(ORDER_COLUMNS)):
+            return ORDER_COLUMNS[section][0]
+        return super().headerData(section, orientation, role)
+
+    def order_at(self, row):
+        """Заказ в строке таблицы (или None)"""
+        if 0 <= row < len(self.orders):
+            return self.orders[row]
+        return None
+
+    def sort(self, column, order=Qt.SortOrder.AscendingOrder):
+        """Сортировка по столбцу (выполняется на сервере)"""
+        field = ORDER_COLUMNS[column][1]
+        descending = order == Qt.SortOrder.DescendingOrder
+        # Повторная установка той же сортировки не перезагружает список
+        if (field, descending) == (self.sort_field, self.descending) and (self.orders or self.loading):
+            return
+        self.sort_field = field
+        self.descending = descending
+        self.reload()
+
+    def set_filters(self, filters):
+        """
+        Установить фильтры списка и загрузить его заново
+
+        Args:
+            filters: Словарь фильтров OrderQueries.get_orders_page
+        """
+        self.filters = {key: value for key, value in filters.items() if value}
+        self.reload()
+
+    def reload(self):
+        """Загрузить список заново с первой страницы"""
+        self.runner.cancel('orders_page')
+        self.beginResetModel()
+        self.orders = []
+        self.next_page_key = None
+        self.has_more = True
+        self.loading = False
+        self.endResetModel()
+        self.fetchMore(QModelIndex())
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and self.has_more and not self.loading
+
+    def fetchMore(self, parent=QModelIndex()):
+        if not self.canFetchMore(parent):
+            return
+
+        self.loading = True
+        self.runner.run('orders_page', OrderQueries.get_orders_page, self.next_page_key,
+                        self.page_size, self.sort_field, self.descending, self.filters,
+                        on_result=self.on_page_loaded, on_error=self.on_page_failed)
+
+    def on_page_failed(self, error):
+        """Ошибка загрузки страницы"""
+        self.loading = False
+        self.has_more = False
+        self.load_failed.emit(error)
+
+    def on_page_loaded(self, page):
+        """Страница загружена в фоне"""
+        orders, self.next_page_key = page
+        self.loading = False
+        self.has_more = self.next_page_key is not None
+        if orders:
+            start = len(self.orders)
+            self.beginInsertRows(QModelIndex(), start, start + len(orders) - 1)
+            self.orders.extend(orders)
+            self.endInsertRows()
+        self.page_loaded.emit()
+
+    def matches(self, order):
+        """Подходит ли заказ под текущие фильтры"""
+        filters = self.filters
+        if 'status' in filters and order['status_name'] != filters['status']:
+            return False
+        if 'pickup_point_id' in filters and order['pickup_point_id'] != filters['pickup_point_id']:
+            return False
+        order_date = date_text(order.get('order_date'))
+        if 'date_from' in filters and order_date < str(filters['date_from']):
+            return False
+        if 'date_to' in filters and order_date > str(filters['date_to']):
+            return False
+        if 'client' in filters:
+            if filters['client'].casefold() not in (order['client_name'] or '').casefold():
+                return False
+        return True
+
+    def goes_before(self, order, other):
+        """Должен ли заказ стоять в списке раньше other при текущей сортировке"""
+        value, other_value = order.get(self.sort_field), other.get(self.sort_field)
+        if value is None or other_value is None or value == other_value:
+            # NULL больше любого значения (см. OrderQueries.get_orders_page)
+            key = (value is None, order['order_id'])
+            other_key = (other_value is None, other['order_id'])
+        else:
+            key, other_key = value, other_value
+        return key > other_key if self.descending else key < other_key
+
+    def apply_changes(self, changed, removed_ids=()):
+        """
+        Обновить, добавить или удалить отдельные заказы без сброса модели
+
+        Args:
+            changed: Актуальные строки измененных и добавленных заказов
+            removed_ids: ID удаленных заказов
+        """
+        removed = set(removed_ids)
+        rows = {order['order_id']: row for row, order in enumerate(self.orders)}
+        inserted = []
+
+        for order in changed:
+            order_id = order['order_id']
+            row = rows.get(order_id)
+            if not self.matches(order):
+                removed.add(order_id)
+            elif row is None:
+                inserted.append(order)
+            elif self.orders[row].get(self.sort_field) != order.get(self.sort_field):
+                # Заказ сменил место в порядке сортировки
+                removed.add(order_id)
+                inserted.append(order)
+            else:
+                self.orders[row] = order
+                self.dataChanged.emit(self.index(row, 0), self.index(row, len(ORDER_COLUMNS) - 1))
+
+        for row in sorted((rows[i] for i in removed if i in rows), reverse=True):
+            self.beginRemoveRows(QModelIndex(), row, row)
+            del self.orders[row]
+            self.endRemoveRows()
+
+        for order in inserted:
+            row = 0
+            while row < len(self.orders) and not self.goes_before(order, self.orders[row]):
+                row += 1
+            if row == len(self.orders) and self.has_more:
+                # Заказ попадет в одну из следующих страниц
+                continue
+            self.beginInsertRows(QModelIndex(), row, row)
+            self.orders.insert(row, order)
+            self.endInsertRows()
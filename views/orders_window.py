@@ -1,10 +1,14 @@
 from PyQt6.QtWidgets import (QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
-                             QPushButton, QTableWidget, QTableWidgetItem,
-                             QHeaderView, QMessageBox, QLabel)
-from PyQt6.QtCore import Qt
+                             QPushButton, QTableView, QHeaderView, QMessageBox,
+                             QLabel, QLineEdit, QComboBox, QDateEdit, QCheckBox)
+from PyQt6.QtCore import Qt, QDate, QTimer
 from PyQt6.QtGui import QIcon
+from config import APP_CONFIG
 from database.queries import OrderQueries
+from utils.change_listener import change_listener
+from utils.query_runner import QueryRunner
 from views.order_edit_dialog import OrderEditDialog
+from views.order_table import OrderTableModel
 
 
 class OrdersWindow(QMainWindow):
@@ -15,8 +19,24 @@ class OrdersWindow(QMainWindow):
         self.current_user = user
         self.parent_window = parent
         self.edit_dialog = None
+        self.runner = QueryRunner(self)
+        self.orders_model = OrderTableModel(self.runner, APP_CONFIG['orders_page_size'], self)
+
+        # Фильтр по клиенту применяется после паузы в наборе текста
+        self.client_timer = QTimer(self)
+        self.client_timer.setSingleShot(True)
+        self.client_timer.setInterval(APP_CONFIG['search_debounce_ms'])
+        self.client_timer.timeout.connect(self.apply_filters)
+
+        # Изменения заказов с этого и других рабочих мест приходят уведомлениями
+        self.pending_order_ids = set()
+        change_listener.changed.connect(self.on_tables_changed)
+        change_listener.reloaded.connect(self.on_table_reloaded)
+        change_listener.resynced.connect(self.load_orders)
+
+        # Первая страница загружается при включении сортировки таблицы
         self.init_ui()
-        self.load_orders()
+        self.load_filter_options()
 
     def init_ui(self):
         """Инициализация интерфейса"""
@@ -57,13 +77,53 @@ class OrdersWindow(QMainWindow):
             add_order_btn.clicked.connect(self.add_order)
             main_layout.addWidget(add_order_btn)
 
-        # Таблица заказов
-        self.orders_table = QTableWidget()
-        self.orders_table.setColumnCount(7)
-        self.orders_table.setHorizontalHeaderLabels([
-            'ID', 'Дата заказа', 'Дата доставки',
-            'Пункт выдачи', 'Клиент', 'Статус', 'Код получения'
-        ])
+        # Фильтры (выполняются на сервере)
+        filter_panel = QHBoxLayout()
+
+        filter_panel.addWidget(QLabel('Статус:'))
+        self.status_combo = QComboBox()
+        self.status_combo.addItem('Все статусы', None)
+        self.status_combo.currentIndexChanged.connect(self.apply_filters)
+        filter_panel.addWidget(self.status_combo, 1)
+
+        filter_panel.addWidget(QLabel('Пункт выдачи:'))
+        self.pickup_combo = QComboBox()
+        self.pickup_combo.addItem('Все пункты выдачи', None)
+        self.pickup_combo.currentIndexChanged.connect(self.apply_filters)
+        filter_panel.addWidget(self.pickup_combo, 2)
+
+        filter_panel.addWidget(QLabel('Клиент:'))
+        self.client_input = QLineEdit()
+        self.client_input.setPlaceholderText('ФИО клиента...')
+        self.client_input.textChanged.connect(lambda text: self.client_timer.start())
+        filter_panel.addWidget(self.client_input, 1)
+
+        self.period_check = QCheckBox('Дата заказа с')
+        self.period_check.toggled.connect(self.on_period_toggled)
+        filter_panel.addWidget(self.period_check)
+
+        self.date_from_input = QDateEdit()
+        self.date_from_input.setCalendarPopup(True)
+        self.date_from_input.setDisplayFormat('dd.MM.yyyy')
+        self.date_from_input.setDate(QDate.currentDate().addMonths(-1))
+        self.date_from_input.setEnabled(False)
+        self.date_from_input.dateChanged.connect(self.on_period_changed)
+        filter_panel.addWidget(self.date_from_input)
+
+        filter_panel.addWidget(QLabel('по'))
+        self.date_to_input = QDateEdit()
+        self.date_to_input.setCalendarPopup(True)
+        self.date_to_input.setDisplayFormat('dd.MM.yyyy')
+        self.date_to_input.setDate(QDate.currentDate())
+        self.date_to_input.setEnabled(False)
+        self.date_to_input.dateChanged.connect(self.on_period_changed)
+        filter_panel.addWidget(self.date_to_input)
+
+        main_layout.addLayout(filter_panel)
+
+        # Таблица заказов: строки подгружаются страницами при прокрутке
+        self.orders_table = QTableView()
+        self.orders_table.setModel(self.orders_model)
 
         # Настройка таблицы
         header = self.orders_table.horizontalHeader()
@@ -75,9 +135,19 @@ class OrdersWindow(QMainWindow):
         header.setSectionResizeMode(5, QHeaderView.ResizeMode.ResizeToContents)
         header.setSectionResizeMode(6, QHeaderView.ResizeMode.ResizeToContents)
 
-        self.orders_table.setSelectionBehavior(QTableWidget.SelectionBehavior.SelectRows)
-        self.orders_table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        self.orders_table.setSelectionBehavior(QTableView.SelectionBehavior.SelectRows)
+        self.orders_table.setSelectionMode(QTableView.SelectionMode.SingleSelection)
+        self.orders_table.setEditTriggers(QTableView.EditTrigger.NoEditTriggers)
         self.orders_table.setAlternatingRowColors(True)
+        self.orders_table.verticalHeader().setVisible(False)
+
+        # Сортировка кликом по заголовку (по умолчанию - новые заказы первыми)
+        header.setSortIndicator(1, Qt.SortOrder.DescendingOrder)
+        self.orders_table.setSortingEnabled(True)
+
+        self.orders_model.load_failed.connect(self.on_load_failed)
+        self.orders_table.verticalScrollBar().valueChanged.connect(self.load_more_if_needed)
+        self.orders_model.page_loaded.connect(self.load_more_if_needed)
 
         # Двойной клик для редактирования (только администратор)
         if self.current_user['role_name'] == 'Администратор':
@@ -85,6 +155,14 @@ class OrdersWindow(QMainWindow):
 
         main_layout.addWidget(self.orders_table)
 
+        # Индикатор фоновой загрузки
+        self.loading_label = QLabel('Загрузка...')
+        self.loading_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        self.loading_label.setStyleSheet('color: #666; font-style: italic;')
+        self.loading_label.hide()
+        main_layout.addWidget(self.loading_label)
+        self.runner.busy_changed.connect(self.loading_label.setVisible)
+
         # Кнопки управления (только для администратора)
         if self.current_user['role_name'] == 'Администратор':
             buttons_layout = QHBoxLayout()
@@ -125,32 +203,112 @@ class OrdersWindow(QMainWindow):
         self.move(x, y)
 
     def load_orders(self):
-        """Загрузка заказов из БД"""
-        try:
-            orders = OrderQueries.get_all_orders()
-            self.orders_table.setRowCount(len(orders))
-
-            for row, order in enumerate(orders):
-                self.orders_table.setItem(row, 0, QTableWidgetItem(str(order['order_id'])))
-                self.orders_table.setItem(row, 1, QTableWidgetItem(str(order['order_date']).split()[0] if order.get('order_date') else ''))
-                self.orders_table.setItem(row, 2, QTableWidgetItem(str(order['delivery_date']).split()[0] if order.get('delivery_date') else ''))
-                self.orders_table.setItem(row, 3, QTableWidgetItem(order['pickup_address']))
-                self.orders_table.setItem(row, 4, QTableWidgetItem(order['client_name']))
-                status_item = QTableWidgetItem(order['status_name'])
-                if order['status_name'] == 'Новый':
-                    status_item.setBackground(Qt.GlobalColor.lightGray)
-                elif order['status_name'] == 'Завершен':
-                    status_item.setBackground(Qt.GlobalColor.green)
-                self.orders_table.setItem(row, 5, status_item)
-                self.orders_table.setItem(row, 6, QTableWidgetItem(order.get('recipient_code', '')))
-
-                for col in range(7):
-                    item = self.orders_table.item(row, col)
-                    if item:
-                        item.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
-
-        except Exception as e:
-            QMessageBox.critical(self, 'Ошибка', f'Ошибка загрузки заказов:\n{str(e)}')
+        """Загрузка заказов из БД (первая страница, в фоне)"""
+        self.orders_model.reload()
+
+    def load_filter_options(self):
+        """Загрузка статусов и пунктов выдачи для фильтров (в фоне)"""
+        self.runner.run('statuses', OrderQueries.get_all_statuses,
+                        on_result=self.on_statuses_loaded,
+                        on_error=lambda error: print(f'Ошибка загрузки статусов: {error}'))
+        self.runner.run('pickup_points', OrderQueries.get_all_pickup_points,
+                        on_result=self.on_pickup_points_loaded,
+                        on_error=lambda error: print(f'Ошибка загрузки пунктов выдачи: {error}'))
+
+    def on_statuses_loaded(self, statuses):
+        """Заполнение фильтра статусов"""
+        for status in statuses:
+            self.status_combo.addItem(status['status_name'], status['status_name'])
+
+    def on_pickup_points_loaded(self, points):
+        """Заполнение фильтра пунктов выдачи"""
+        for point in points:
+            self.pickup_combo.addItem(point['full_address'], point['point_id'])
+
+    def on_period_toggled(self, checked):
+        """Включение фильтра по дате заказа"""
+        self.date_from_input.setEnabled(checked)
+        self.date_to_input.setEnabled(checked)
+        self.apply_filters()
+
+    def on_period_changed(self, *args):
+        """Изменение дат периода (применяется, только если фильтр включен)"""
+        if self.period_check.isChecked():
+            self.apply_filters()
+
+    def current_filters(self):
+        """Текущие фильтры списка заказов"""
+        filters = {
+            'status': self.status_combo.currentData(),
+            'pickup_point_id': self.pickup_combo.currentData(),
+            'client': self.client_input.text().strip() or None,
+        }
+        if self.period_check.isChecked():
+            filters['date_from'] = self.date_from_input.date().toPyDate()
+            filters['date_to'] = self.date_to_input.date().toPyDate()
+        return filters
+
+    def apply_filters(self, *args):
+        """Применение фильтров (список загружается заново)"""
+        self.client_timer.stop()
+        self.orders_model.set_filters(self.current_filters())
+
+    def load_more_if_needed(self, *args):
+        """Подгрузить страницу, если до конца прокрутки осталось меньше экрана"""
+        if not self.orders_model.canFetchMore():
+            return
+
+        scroll_bar = self.orders_table.verticalScrollBar()
+        remaining = scroll_bar.maximum() - scroll_bar.value()
+        if remaining <= self.orders_table.viewport().height():
+            self.orders_model.fetchMore()
+
+    def on_load_failed(self, error):
+        """Ошибка загрузки заказов"""
+        QMessageBox.critical(self, 'Ошибка', f'Ошибка загрузки заказов:\n{error}')
+
+    def selected_order(self):
+        """Выбранный в таблице заказ (или None)"""
+        rows = self.orders_table.selectionModel().selectedRows()
+        if not rows:
+            return None
+        return self.orders_model.order_at(rows[0].row())
+
+    def on_tables_changed(self, table, ids):
+        """Уведомление об изменении заказов или их состава"""
+        if table not in ('order', 'order_items'):
+            return
+
+        if len(ids) > APP_CONFIG['change_reload_limit']:
+            self.load_orders()
+            return
+
+        self.pending_order_ids.update(ids)
+        requested = set(self.pending_order_ids)
+        self.runner.run('order_changes', OrderQueries.get_orders_by_ids, sorted(requested),
+                        on_result=lambda orders: self.on_changed_orders_loaded(requested, orders),
+                        on_error=lambda error: print(f'Ошибка загрузки измененных заказов: {error}'))
+
+    def on_table_reloaded(self, table):
+        """Заказы изменены массово (например, импортом): загрузить список заново"""
+        if table in ('order', 'order_items'):
+            self.load_orders()
+
+    def on_changed_orders_loaded(self, requested, orders):
+        """Измененные заказы загружены (не найденные заказы удалены)"""
+        self.pending_order_ids -= requested
+        found = {order['order_id'] for order in orders}
+        self.apply_order_changes(orders, requested - found)
+
+    def apply_order_changes(self, orders, removed_ids=()):
+        """
+        Обновить отдельные строки таблицы без полной перезагрузки
+
+        Args:
+            orders: Актуальные строки измененных и добавленных заказов
+            removed_ids: ID удаленных заказов
+        """
+        self.orders_model.apply_changes(orders, removed_ids)
 
     def add_order(self):
         """Открыть диалог добавления заказа"""
@@ -165,8 +323,8 @@ class OrdersWindow(QMainWindow):
 
     def edit_selected_order(self):
         """Редактировать выбранный заказ"""
-        selected_rows = self.orders_table.selectedItems()
-        if not selected_rows:
+        order = self.selected_order()
+        if order is None:
             QMessageBox.warning(self, 'Предупреждение', 'Выберите заказ для редактирования!')
             return
 
@@ -175,23 +333,19 @@ class OrdersWindow(QMainWindow):
                               'Закройте текущее окно редактирования перед открытием нового!')
             return
 
-        row = self.orders_table.currentRow()
-        order_id = int(self.orders_table.item(row, 0).text())
-
-        self.edit_dialog = OrderEditDialog(order_id, self)
+        self.edit_dialog = OrderEditDialog(order['order_id'], self)
         self.edit_dialog.finished.connect(self.on_edit_dialog_closed)
         self.edit_dialog.exec()
 
     def delete_selected_order(self):
         """Удалить выбранный заказ"""
-        selected_rows = self.orders_table.selectedItems()
-        if not selected_rows:
+        order = self.selected_order()
+        if order is None:
             QMessageBox.warning(self, 'Предупреждение', 'Выберите заказ для удаления!')
             return
 
-        row = self.orders_table.currentRow()
-        order_id = int(self.orders_table.item(row, 0).text())
-        client_name = self.orders_table.item(row, 4).text()
+        order_id = order['order_id']
+        client_name = order['client_name']
 
         reply = QMessageBox.question(
             self,
@@ -204,11 +358,24 @@ class OrdersWindow(QMainWindow):
             try:
                 OrderQueries.delete_order(order_id)
                 QMessageBox.information(self, 'Успех', 'Заказ успешно удален!')
-                self.load_orders()
+                self.apply_order_changes([], {order_id})
             except Exception as e:
                 QMessageBox.critical(self, 'Ошибка', f'Ошибка удаления заказа:\n{str(e)}')
 
     def on_edit_dialog_closed(self):
         """Обработка закрытия диалога редактирования"""
         self.edit_dialog = None
-        self.load_orders()
+        # Изменения придут уведомлением, перезагрузка нужна только без него
+        if not change_listener.active:
+            self.load_orders()
+
+    def closeEvent(self, event):
+        """Отмена фоновых запросов при закрытии окна"""
+        try:
+            change_listener.changed.disconnect(self.on_tables_changed)
+            change_listener.reloaded.disconnect(self.on_table_reloaded)
+            change_listener.resynced.disconnect(self.load_orders)
+        except TypeError:
+            pass
+        self.runner.cancel_all()
+        super().closeEvent(event)
@@ -0,0 +1,412 @@
+from bisect import bisect_right
+from PyQt6.QtWidgets import QStyledItemDelegate, QStyle
+from PyQt6.QtCore import (Qt, QObject, QRunnable, QAbstractListModel, QModelIndex,
+                          QRect, QSize, pyqtSignal)
+from PyQt6.QtGui import QColor, QFont, QPen, QFontMetrics, QPainter
+from config import COLORS
+from utils.search_index import ProductSearchIndex
+
+
+# Размеры карточки товара в каталоге
+CARD_WIDTH = 240
+CARD_HEIGHT = 390
+CARD_SPACING = 15
+PHOTO_WIDTH = 200
+PHOTO_HEIGHT = 150
+
+
+class ProductListModel(QAbstractListModel):
+    """Модель списка товаров с постраничной подгрузкой в фоне"""
+
+    ProductRole = Qt.ItemDataRole.UserRole + 1
+
+    # Страница загружена (в том числе пустая)
+    page_loaded = pyqtSignal()
+    # Ошибка загрузки страницы (текст ошибки)
+    load_failed = pyqtSignal(str)
+
+    def __init__(self, runner, parent=None):
+        super().__init__(parent)
+        self.runner = runner
+        self.products = []
+        self.fetch_page = None
+        self.next_page_key = None
+        self.has_more = False
+        self.loading = False
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self.products)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or index.row() >= len(self.products):
+            return None
+
+        product = self.products[index.row()]
+        if role == self.ProductRole:
+            return product
+        if role == Qt.ItemDataRole.DisplayRole:
+            return product['product_name']
+        if role == Qt.ItemDataRole.ToolTipRole:
+            return product.get('description') or None
+        return None
+
+    def set_products(self, products):
+        """Заменить весь список товаров (без постраничной подгрузки)"""
+        self.runner.cancel('products_page')
+        self.beginResetModel()
+        self.products = list(products)
+        self.fetch_page = None
+        self.next_page_key = None
+        self.has_more = False
+        self.loading = False
+        self.endResetModel()
+
+    def apply_changes(self, changed, removed_ids=(), matches=None, sort_key=None, insert=True):
+        """
+        Обновить, добавить или удалить отдельные товары без сброса модели
+        (позиция прокрутки и загруженные страницы сохраняются)
+
+        Args:
+            changed: Актуальные строки измененных и добавленных товаров
+            removed_ids: ID удаленных товаров
+            matches: Функция matches(product) - подходит ли товар под
+                     текущие фильтры (None - подходит любой)
+            sort_key: Ключ текущего порядка списка; None - порядок неизвестен
+                      (например, ранжированный поиск), новые товары не добавляются
+            insert: Вставлять новые и сменившие место товары по sort_key;
+                    False - порядок задает сервер (см. insert_before)
+
+        Returns:
+            Товары, которые нужно вставить, если insert=False
+        """
+        removed = set(removed_ids)
+        rows = {product['product_id']: row for row, product in enumerate(self.products)}
+        inserted = []
+
+        for product in changed:
+            product_id = product['product_id']
+            row = rows.get(product_id)
+            if matches is not None and not matches(product):
+                removed.add(product_id)
+            elif row is None:
+                if sort_key is not None:
+                    inserted.append(product)
+            elif sort_key is not None and sort_key(self.products[row]) != sort_key(product):
+                # Товар сменил место в порядке сортировки
+                removed.add(product_id)
+                inserted.append(product)
+            else:
+                self.products[row] = product
+                index = self.index(row)
+                self.dataChanged.emit(index, index)
+
+        for row in sorted((rows[i] for i in removed if i in rows), reverse=True):
+            self.beginRemoveRows(QModelIndex(), row, row)
+            del self.products[row]
+            self.endRemoveRows()
+
+        if not insert:
+            return inserted
+
+        for product in inserted:
+            row = bisect_right(self.products, sort_key(product), key=sort_key)
+            if row == len(self.products) and self.has_more:
+                # Товар попадет в одну из следующих страниц
+                continue
+            self.beginInsertRows(QModelIndex(), row, row)
+            self.products.insert(row, product)
+            self.endInsertRows()
+        return []
+
+    def insert_before(self, products, places):
+        """
+        Вставить товары на места, найденные сервером
+
+        Args:
+            products: Товары для вставки
+            places: Словарь ID товара -> ID загруженного товара, перед которым
+                    он стоит, или None, если товар идет после всех загруженных
+                    (см. ProductQueries.get_next_in_order)
+        """
+        rows = {p['product_id']: row for row, p in enumerate(self.products)}
+        for product in products:
+            product_id = product['product_id']
+            if product_id not in places:
+                continue
+            if product_id in rows:
+                # Товар уже пришел со страницей
+                continue
+
+            next_id = places[product_id]
+            if next_id is None:
+                if self.has_more:
+                    # Товар попадет в одну из следующих страниц
+                    continue
+                row = len(self.products)
+            elif next_id in rows:
+                row = rows[next_id]
+            else:
+                continue
+            self.beginInsertRows(QModelIndex(), row, row)
+            self.products.insert(row, product)
+            self.endInsertRows()
+            rows = {p['product_id']: row for row, p in enumerate(self.products)}
+
+    def set_page_source(self, fetch_page):
+        """
+        Начать постраничную загрузку
+
+        Args:
+            fetch_page: Функция fetch_page(after) -> (товары, ключ следующей страницы),
+                        выполняется в фоновом потоке
+        """
+        self.runner.cancel('products_page')
+        self.beginResetModel()
+        self.products = []
+        self.fetch_page = fetch_page
+        self.next_page_key = None
+        self.has_more = True
+        self.loading = False
+        self.endResetModel()
+        self.fetchMore(QModelIndex())
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return (not parent.isValid() and self.has_more and not self.loading
+                and self.fetch_page is not None)
+
+    def fetchMore(self, parent=QModelIndex()):
+        if not self.canFetchMore(parent):
+            return
+
+        self.loading = True
+        self.runner.run('products_page', self.fetch_page, self.next_page_key,
+                        on_result=self.on_page_loaded, on_error=self.on_page_failed)
+
+    def on_page_failed(self, error):
+        """Ошибка загрузки страницы"""
+        self.loading = False
+        self.has_more = False
+        self.load_failed.emit(error)
+
+    def on_page_loaded(self, page):
+        """Страница загружена в фоне"""
+        products, self.next_page_key = page
+        self.loading = False
+        self.has_more = self.next_page_key is not None
+        if products:
+            start = len(self.products)
+            self.beginInsertRows(QModelIndex(), start, start + len(products) - 1)
+            self.products.extend(products)
+            self.endInsertRows()
+        self.page_loaded.emit()
+
+
+class CatalogFilterSignals(QObject):
+    """Сигналы фонового прохода фильтрации"""
+
+    # Номер прохода, отфильтрованные и отсортированные товары
+    finished = pyqtSignal(int, list)
+
+
+class CatalogFilterTask(QRunnable):
+    """
+    Поиск, фильтр по поставщику и сортировка каталога в памяти
+
+    Проход можно отменить через cancel(): отмененный проход прекращает
+    работу и не отправляет результат.
+    """
+
+    def __init__(self, generation, index, search_text, supplier, sort_key, signals):
+        """
+        Args:
+            sort_key: Ключ порядка списка (см. ProductsWindow.sort_key)
+        """
+        super().__init__()
+        self.setAutoDelete(False)
+        self.generation = generation
+        self.index = index
+        self.search_text = search_text
+        self.supplier = supplier
+        self.sort_key = sort_key
+        self.signals = signals
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+    def run(self):
+        positions = self.index.search(self.search_text or '', lambda: self.cancelled)
+        if positions is None or self.cancelled:
+            return
+
+        # Товар мог быть удален (пустая позиция) после поиска
+        products = [p for p in (self.index.products[i] for i in positions) if p is not None]
+
+        if self.supplier:
+            products = [p for p in products if p['supplier_name'] == self.supplier]
+
+        # Позиции в индексе не задают порядок списка: новые товары дописаны
+        # в конец, переименованные остаются на месте. Сортировка тем же
+        # ключом, по которому ProductListModel.apply_changes вставляет товары
+        products.sort(key=self.sort_key)
+
+        if not self.cancelled:
+            self.signals.finished.emit(self.generation, products)
+
+
+class CatalogSnapshotSignals(QObject):
+    """Сигналы фонового чтения локальной копии каталога"""
+
+    # Номер загрузки каталога, (поисковый индекс, отметка синхронизации) или None
+    loaded = pyqtSignal(int, object)
+
+
+class CatalogSnapshotTask(QRunnable):
+    """
+    Чтение локальной копии каталога и построение поискового индекса
+
+    Выполняется без обращения к серверу, поэтому каталог показывается
+    сразу, а изменения загружаются следом (см. ProductsWindow.sync_catalog).
+    """
+
+    def __init__(self, generation, snapshot, signals):
+        super().__init__()
+        self.setAutoDelete(False)
+        self.generation = generation
+        self.snapshot = snapshot
+        self.signals = signals
+
+    def run(self):
+        loaded = self.snapshot.load()
+        if loaded is not None:
+            products, watermark = loaded
+            loaded = (ProductSearchIndex(products), watermark)
+        self.signals.loaded.emit(self.generation, loaded)
+
+
+class ProductCardDelegate(QStyledItemDelegate):
+    """Отрисовка карточки товара в QListView (рисуются только видимые карточки)"""
+
+    def __init__(self, thumbnails, parent=None):
+        super().__init__(parent)
+        self.thumbnails = thumbnails
+        self.padding = 10
+
+    def sizeHint(self, option, index):
+        return QSize(CARD_WIDTH, CARD_HEIGHT)
+
+    def card_colors(self, product):
+        """Цвета фона и рамки карточки в зависимости от наличия и скидки"""
+        if product['quantity_in_stock'] == 0:
+            return QColor(COLORS['out_of_stock']), QColor(COLORS['out_of_stock'])
+        if product['current_discount'] > 15:
+            return QColor(COLORS['discount_high']), QColor(COLORS['discount_high'])
+        return QColor('#FFFFFF'), QColor('#E0E0E0')
+
+    def paint(self, painter, option, index):
+        product = index.data(ProductListModel.ProductRole)
+        if product is None:
+            return
+
+        painter.save()
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+
+        # Фон карточки
+        card = option.rect.adjusted(2, 2, -2, -2)
+        painter.setClipRect(card)
+        background, border = self.card_colors(product)
+        if option.state & QStyle.StateFlag.State_MouseOver:
+            border = QColor('#4CAF50')
+        painter.setPen(QPen(border, 1))
+        painter.setBrush(background)
+        painter.drawRoundedRect(card, 5, 5)
+
+        content = card.adjusted(self.padding, self.padding, -self.padding, -self.padding)
+        width = content.width()
+        y = content.top()
+
+        # Фото
+        pixmap = self.thumbnails.thumbnail(product.get('photo_path'))
+        if not pixmap.isNull():
+            x = content.left() + (width - pixmap.width()) // 2
+            photo_y = y + (PHOTO_HEIGHT - pixmap.height()) // 2
+            painter.drawPixmap(x, photo_y, pixmap)
+        y += PHOTO_HEIGHT + 5
+
+        base_font = QFont(option.font)
+        bold_font = QFont(base_font)
+        bold_font.setBold(True)
+        center = Qt.AlignmentFlag.AlignHCenter | Qt.AlignmentFlag.AlignTop
+
+        # Название товара (до двух строк)
+        painter.setFont(bold_font)
+        painter.setPen(QColor('#000000'))
+        metrics = QFontMetrics(bold_font)
+        name_rect = QRect(content.left(), y, width, metrics.lineSpacing() * 2)
+        painter.drawText(name_rect, center | Qt.TextFlag.TextWordWrap, product['product_name'])
+        y += name_rect.height() + 3
+
+        # Артикул, категория, поставщик
+        painter.setFont(base_font)
+        metrics = QFontMetrics(base_font)
+        line_height = metrics.lineSpacing()
+        for text in (f"Артикул: {product['article']}",
+                     f"Категория: {product['category_name']}",
+                     f"Поставщик: {product['supplier_name']}"):
+            painter.drawText(QRect(content.left(), y, width, line_height), center,
+                             metrics.elidedText(text, Qt.TextElideMode.ElideRight, width))
+            y += line_height + 2
+
+        # Цена
+        y += 2
+        if product['current_discount'] > 0:
+            old_text = f"{product['price']:.2f} ₽"
+            new_text = f"{product['price_with_discount']:.2f} ₽"
+            strike_font = QFont(base_font)
+            strike_font.setStrikeOut(True)
+            old_width = QFontMetrics(strike_font).horizontalAdvance(old_text)
+            new_width = QFontMetrics(bold_font).horizontalAdvance(new_text)
+            x = content.left() + (width - old_width - new_width - 8) // 2
+
+            painter.setFont(strike_font)
+            painter.setPen(QColor(COLORS['price_original']))
+            painter.drawText(QRect(x, y, old_width, line_height), Qt.AlignmentFlag.AlignLeft, old_text)
+
+            painter.setFont(bold_font)
+            painter.setPen(QColor(COLORS['price_discount']))
+            painter.drawText(QRect(x + old_width + 8, y, new_width, line_height),
+                             Qt.AlignmentFlag.AlignLeft, new_text)
+            y += line_height + 2
+
+            # Скидка
+            painter.setPen(QColor(COLORS['price_original']))
+            painter.drawText(QRect(content.left(), y, width, line_height), center,
+                             f"Скидка: {product['current_discount']}%")
+        else:
+            painter.setFont(bold_font)
+            painter.drawText(QRect(content.left(), y, width, line_height), center,
+                             f"{product['price']:.2f} ₽")
+        y += line_height + 2
+
+        # Количество на складе
+        painter.setFont(base_font)
+        painter.setPen(QColor('#000000'))
+        painter.drawText(QRect(content.left(), y, width, line_height), center,
+                         f"На складе: {product['quantity_in_stock']} {product['unit_name']}")
+        y += line_height + 4
+
+        # Описание (если есть)
+        description = product.get('description')
+        if description:
+            if len(description) > 100:
+                description = description[:100] + '...'
+            small_font = QFont(base_font)
+            small_font.setPixelSize(12)
+            painter.setFont(small_font)
+            painter.setPen(QColor('#666666'))
+            desc_rect = QRect(content.left(), y, width, content.bottom() - y)
+            painter.drawText(desc_rect, center | Qt.TextFlag.TextWordWrap, description)
+
+        painter.restore()
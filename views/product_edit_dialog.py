@@ -7,6 +7,7 @@ from PyQt6.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QLabel,
 from PyQt6.QtCore import Qt
 from PyQt6.QtGui import QPixmap
 from database.queries import ProductQueries
+from utils.query_runner import QueryRunner
 from PIL import Image
 
 
@@ -14,20 +15,23 @@ class ProductEditDialog(QDialog):
     """Диалог добавления/редактирования товара"""
 
     def __init__(self, product_id=None, parent=None):
+        """
+        Args:
+            product_id: ID редактируемого товара (None - добавление)
+            parent: Родительское окно
+        """
         super().__init__(parent)
         self.product_id = product_id
         self.product_data = None
+        # Результат для окна каталога: сохраненная строка товара или ID удаленного
+        self.saved_product = None
+        self.deleted_product_id = None
         self.new_photo_path = None
         self.old_photo_path = None
-
-        if product_id:
-            self.product_data = ProductQueries.get_product_by_id(product_id)
-            self.old_photo_path = self.product_data.get('photo_path')
+        self.runner = QueryRunner(self)
 
         self.init_ui()
-
-        if self.product_data:
-            self.load_product_data()
+        self.load_data()
 
     def init_ui(self):
         """Инициализация интерфейса"""
@@ -63,17 +67,14 @@ class ProductEditDialog(QDialog):
 
         # Категория
         self.category_combo = QComboBox()
-        self.load_categories()
         form_layout.addRow('Категория*:', self.category_combo)
 
         # Поставщик
         self.supplier_combo = QComboBox()
-        self.load_suppliers()
         form_layout.addRow('Поставщик*:', self.supplier_combo)
 
         # Единица измерения
         self.unit_combo = QComboBox()
-        self.load_units()
         form_layout.addRow('Ед. измерения*:', self.unit_combo)
 
         # Цена
@@ -131,20 +132,27 @@ class ProductEditDialog(QDialog):
         photo_group.setLayout(photo_layout)
         layout.addWidget(photo_group)
 
+        # Индикатор загрузки данных
+        self.loading_label = QLabel('Загрузка...')
+        self.loading_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        self.loading_label.setStyleSheet('color: #666; font-style: italic;')
+        layout.addWidget(self.loading_label)
+
         # Кнопки управления
         buttons_layout = QHBoxLayout()
 
-        save_btn = QPushButton('Сохранить')
-        save_btn.setMinimumHeight(40)
-        save_btn.clicked.connect(self.save_product)
-        buttons_layout.addWidget(save_btn)
+        self.save_btn = QPushButton('Сохранить')
+        self.save_btn.setMinimumHeight(40)
+        self.save_btn.clicked.connect(self.save_product)
+        buttons_layout.addWidget(self.save_btn)
 
+        self.delete_btn = None
         if self.product_id:
-            delete_btn = QPushButton('Удалить')
-            delete_btn.setObjectName('deleteButton')
-            delete_btn.setMinimumHeight(40)
-            delete_btn.clicked.connect(self.delete_product)
-            buttons_layout.addWidget(delete_btn)
+            self.delete_btn = QPushButton('Удалить')
+            self.delete_btn.setObjectName('deleteButton')
+            self.delete_btn.setMinimumHeight(40)
+            self.delete_btn.clicked.connect(self.delete_product)
+            buttons_layout.addWidget(self.delete_btn)
 
         cancel_btn = QPushButton('Отмена')
         cancel_btn.setMinimumHeight(40)
@@ -155,32 +163,75 @@ class ProductEditDialog(QDialog):
 
         self.setLayout(layout)
 
-    def load_categories(self):
-        """Загрузка категорий"""
-        try:
-            categories = ProductQueries.get_all_categories()
-            for cat in categories:
-                self.category_combo.addItem(cat['category_name'])
-        except Exception as e:
-            QMessageBox.critical(self, 'Ошибка', f'Ошибка загрузки категорий: {e}')
+    def set_loading(self, loading):
+        """Блокировка кнопок на время загрузки данных"""
+        self.loading_label.setVisible(loading)
+        self.save_btn.setEnabled(not loading)
+        if self.delete_btn is not None:
+            self.delete_btn.setEnabled(not loading)
+
+    def load_data(self):
+        """Загрузка справочников и данных товара (в фоне)"""
+        self.set_loading(True)
+        # Товар всегда запрашивается заново: строка в списке (из локальной
+        # копии каталога) может быть старее данных на сервере, а сохраняются
+        # все поля формы
+        self.runner.run('dialog_data', self.fetch_data, self.product_id,
+                        on_result=self.on_data_loaded, on_error=self.on_data_failed)
+
+    @staticmethod
+    def fetch_data(product_id):
+        """Запросы справочников и товара (выполняется в фоновом потоке)"""
+        return {
+            'categories': ProductQueries.get_all_categories(),
+            'suppliers': ProductQueries.get_all_suppliers(),
+            'units': ProductQueries.get_all_units(),
+            'product': ProductQueries.get_product_by_id(product_id) if product_id else None,
+        }
+
+    def on_data_loaded(self, data):
+        """Заполнение формы загруженными данными"""
+        self.load_categories(data['categories'])
+        self.load_suppliers(data['suppliers'])
+        self.load_units(data['units'])
 
-    def load_suppliers(self):
-        """Загрузка поставщиков"""
-        try:
-            suppliers = ProductQueries.get_all_suppliers()
-            for sup in suppliers:
-                self.supplier_combo.addItem(sup['supplier_name'])
-        except Exception as e:
-            QMessageBox.critical(self, 'Ошибка', f'Ошибка загрузки поставщиков: {e}')
+        if self.product_id:
+            product = data['product']
+            if not product:
+                QMessageBox.warning(self, 'Ошибка', 'Товар не найден (возможно, он был удален)!')
+                self.reject()
+                return
+            self.product_data = product
+            self.old_photo_path = self.product_data.get('photo_path')
+            self.load_product_data()
+            self.load_photo_preview()
 
-    def load_units(self):
-        """Загрузка единиц измерения"""
-        try:
-            units = ProductQueries.get_all_units()
-            for unit in units:
-                self.unit_combo.addItem(unit['unit_name'])
-        except Exception as e:
-            QMessageBox.critical(self, 'Ошибка', f'Ошибка загрузки единиц: {e}')
+        self.set_loading(False)
+
+    def on_data_failed(self, error):
+        """Ошибка загрузки данных формы"""
+        self.loading_label.setText('Не удалось загрузить данные')
+        QMessageBox.critical(self, 'Ошибка', f'Ошибка загрузки данных товара:\n{error}')
+
+    def load_categories(self, categories):
+        """Заполнение списка категорий"""
+        for cat in categories:
+            self.category_combo.addItem(cat['category_name'])
+
+    def load_suppliers(self, suppliers):
+        """Заполнение списка поставщиков"""
+        for sup in suppliers:
+            self.supplier_combo.addItem(sup['supplier_name'])
+
+    def load_units(self, units):
+        """Заполнение списка единиц измерения"""
+        for unit in units:
+            self.unit_combo.addItem(unit['unit_name'])
+
+    def done(self, result):
+        """Отмена фоновой загрузки при закрытии диалога"""
+        self.runner.cancel_all()
+        super().done(result)
 
     def load_product_data(self):
         """Загрузка данных товара в поля"""
@@ -299,10 +350,12 @@ class ProductEditDialog(QDialog):
 
             if self.product_id:
                 # Обновление товара
-                ProductQueries.update_product(
+                self.saved_product = ProductQueries.update_product(
                     self.product_id, article, name, unit, price,
                     supplier, category, discount, quantity, description, photo_path
                 )
+                if self.saved_product is None:
+                    self.deleted_product_id = self.product_id
 
                 # Удаляем старое фото если было заменено
                 if self.new_photo_path and self.old_photo_path and os.path.exists(self.old_photo_path):
@@ -314,7 +367,7 @@ class ProductEditDialog(QDialog):
                 QMessageBox.information(self, 'Успех', 'Товар успешно обновлен!')
             else:
                 # Добавление нового товара
-                ProductQueries.add_product(
+                self.saved_product = ProductQueries.add_product(
                     article, name, unit, price,
                     supplier, category, discount, quantity, description, photo_path
                 )
@@ -337,6 +390,7 @@ class ProductEditDialog(QDialog):
         if reply == QMessageBox.StandardButton.Yes:
             try:
                 ProductQueries.delete_product(self.product_id)
+                self.deleted_product_id = self.product_id
 
                 # Удаляем фото если оно есть
                 if self.old_photo_path and os.path.exists(self.old_photo_path):
@@ -1,129 +1,25 @@
-import os
+import itertools
 from PyQt6.QtWidgets import (QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
                              QLabel, QLineEdit, QPushButton, QComboBox,
-                             QScrollArea, QFrame, QGridLayout, QMessageBox)
-from PyQt6.QtCore import Qt, QSize
-from PyQt6.QtGui import QPixmap, QIcon, QFont
+                             QListView, QMessageBox)
+from PyQt6.QtCore import Qt, QSize, QTimer, QThreadPool
+from PyQt6.QtGui import QPixmap, QIcon
+from config import APP_CONFIG
 from database.queries import ProductQueries
+from views.product_catalog import (ProductListModel, ProductCardDelegate,
+                                   CatalogFilterTask, CatalogFilterSignals,
+                                   CatalogSnapshotTask, CatalogSnapshotSignals,
+                                   CARD_WIDTH, CARD_HEIGHT, CARD_SPACING,
+                                   PHOTO_WIDTH, PHOTO_HEIGHT)
+from utils.query_runner import QueryRunner
+from utils.change_listener import change_listener
+from utils.catalog_snapshot import catalog_snapshot
+from utils.search_index import ProductSearchIndex, normalize, product_text
+from utils.thumbnails import ThumbnailService
 from views.product_edit_dialog import ProductEditDialog
 from views.orders_window import OrdersWindow
 
 
-class ProductCard(QFrame):
-    """Виджет карточки товара"""
-
-    def __init__(self, product, user_role, parent=None):
-        super().__init__(parent)
-        self.product = product
-        self.user_role = user_role
-        self.parent_window = parent
-        self.init_ui()
-
-    def init_ui(self):
-        """Создание интерфейса карточки"""
-        layout = QVBoxLayout()
-        layout.setSpacing(5)
-
-        # Определяем фон карточки в зависимости от скидки и наличия
-        if self.product['quantity_in_stock'] == 0:
-            self.setObjectName('outOfStock')
-            self.setStyleSheet('QFrame#outOfStock { background-color: #87CEEB; border-radius: 5px; padding: 10px; }')
-        elif self.product['current_discount'] > 15:
-            self.setObjectName('highDiscount')
-            self.setStyleSheet('QFrame#highDiscount { background-color: #2E8B57; border-radius: 5px; padding: 10px; }')
-        else:
-            self.setObjectName('productCard')
-            self.setStyleSheet('QFrame#productCard { background-color: #FFFFFF; border: 1px solid #E0E0E0; border-radius: 5px; padding: 10px; }')
-
-        photo_label = QLabel()
-        photo_label.setFixedSize(200, 150)
-        photo_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
-
-        photo_path = self.product.get('photo_path', '')
-        if photo_path and os.path.exists(photo_path):
-            pixmap = QPixmap(photo_path)
-        else:
-            pixmap = QPixmap('resources/images/picture.png')
-
-        if not pixmap.isNull():
-            scaled_pixmap = pixmap.scaled(200, 150, Qt.AspectRatioMode.KeepAspectRatio,
-                                         Qt.TransformationMode.SmoothTransformation)
-            photo_label.setPixmap(scaled_pixmap)
-
-        layout.addWidget(photo_label)
-
-        # Название товара
-        name_label = QLabel(f"<b>{self.product['product_name']}</b>")
-        name_label.setWordWrap(True)
-        name_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        layout.addWidget(name_label)
-
-        # Артикул
-        article_label = QLabel(f"Артикул: {self.product['article']}")
-        article_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        layout.addWidget(article_label)
-
-        # Категория
-        category_label = QLabel(f"Категория: {self.product['category_name']}")
-        category_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        layout.addWidget(category_label)
-
-        # Поставщик
-        supplier_label = QLabel(f"Поставщик: {self.product['supplier_name']}")
-        supplier_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        layout.addWidget(supplier_label)
-
-        # Цена
-        price_layout = QHBoxLayout()
-        price_layout.setAlignment(Qt.AlignmentFlag.AlignCenter)
-
-        if self.product['current_discount'] > 0:
-            # Зачеркнутая старая цена
-            old_price_label = QLabel(f"{self.product['price']:.2f} ₽")
-            old_price_label.setStyleSheet('color: #FF0000; text-decoration: line-through;')
-            price_layout.addWidget(old_price_label)
-
-            # Новая цена со скидкой
-            new_price_label = QLabel(f"{self.product['price_with_discount']:.2f} ₽")
-            new_price_label.setStyleSheet('color: #000000; font-weight: bold;')
-            price_layout.addWidget(new_price_label)
-        else:
-            price_label = QLabel(f"{self.product['price']:.2f} ₽")
-            price_label.setStyleSheet('font-weight: bold;')
-            price_layout.addWidget(price_label)
-
-        layout.addLayout(price_layout)
-
-        # Скидка
-        if self.product['current_discount'] > 0:
-            discount_label = QLabel(f"Скидка: {self.product['current_discount']}%")
-            discount_label.setStyleSheet('color: #FF0000; font-weight: bold;')
-            discount_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
-            layout.addWidget(discount_label)
-
-        # Количество на складе
-        stock_label = QLabel(f"На складе: {self.product['quantity_in_stock']} {self.product['unit_name']}")
-        stock_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        layout.addWidget(stock_label)
-
-        # Описание (если есть)
-        if self.product.get('description'):
-            desc_label = QLabel(self.product['description'][:100] + '...' if len(self.product['description']) > 100 else self.product['description'])
-            desc_label.setWordWrap(True)
-            desc_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
-            desc_label.setStyleSheet('font-size: 12px; color: #666;')
-            layout.addWidget(desc_label)
-
-        self.setLayout(layout)
-
-        if self.user_role == 'Администратор':
-            self.setCursor(Qt.CursorShape.PointingHandCursor)
-
-    def mousePressEvent(self, event):
-        if self.user_role == 'Администратор':
-            self.parent_window.edit_product(self.product['product_id'])
-
-
 class ProductsWindow(QMainWindow):
     """Главное окно со списком товаров"""
 
@@ -131,11 +27,47 @@ class ProductsWindow(QMainWindow):
         super().__init__()
         self.current_user = user
         self.login_window = login_window
-        self.all_products = []
-        self.filtered_products = []
+        self.runner = QueryRunner(self)
+        self.products_model = ProductListModel(self.runner, self)
+        self.thumbnails = ThumbnailService(PHOTO_WIDTH, PHOTO_HEIGHT, self)
+        self.page_size = APP_CONFIG['products_page_size']
+
+        # Режим каталога: None - загружается, 'memory' - фильтрация в памяти
+        # по поисковому индексу, 'server' - постраничная загрузка с сервера
+        self.catalog_mode = None
+        self.search_index = None
+        self.filter_generation = 0
+        self.filter_task = None
+        self.filter_pool = QThreadPool(self)
+        self.filter_pool.setMaxThreadCount(1)
+        self.filter_signals = CatalogFilterSignals(self)
+        self.filter_signals.finished.connect(self.on_filter_finished)
+
+        # Каталог при входе показывается из локальной копии (номер загрузки
+        # отсеивает результат чтения копии, начатого до перезагрузки)
+        self.catalog_generation = 0
+        self.snapshot_task = None
+        self.snapshot_signals = CatalogSnapshotSignals(self)
+        self.snapshot_signals.loaded.connect(self.on_snapshot_loaded)
+
+        # Поиск запускается после паузы в наборе текста
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(APP_CONFIG['search_debounce_ms'])
+        self.search_timer.timeout.connect(self.apply_filters)
         self.current_sort = None
         self.current_filter = None
         self.edit_dialog = None
+
+        # Изменения товаров с этого и других рабочих мест приходят уведомлениями
+        self.pending_product_ids = set()
+        # Товары, место которых в постраничном списке определяет сервер
+        # (ID -> строка товара, см. place_products)
+        self.pending_places = {}
+        change_listener.changed.connect(self.on_tables_changed)
+        change_listener.reloaded.connect(self.on_table_reloaded)
+        change_listener.resynced.connect(self.load_products)
+
         self.init_ui()
         self.load_products()
 
@@ -189,7 +121,7 @@ class ProductsWindow(QMainWindow):
 
             self.search_input = QLineEdit()
             self.search_input.setPlaceholderText('Поиск по всем полям...')
-            self.search_input.textChanged.connect(self.apply_filters)
+            self.search_input.textChanged.connect(self.on_search_text_changed)
             control_panel.addWidget(self.search_input, 2)
 
             # Фильтр по поставщику
@@ -211,6 +143,11 @@ class ProductsWindow(QMainWindow):
             self.sort_combo.currentTextChanged.connect(self.apply_filters)
             control_panel.addWidget(self.sort_combo, 1)
 
+            # Количество найденных товаров
+            self.count_label = QLabel()
+            self.count_label.setStyleSheet('color: #666;')
+            control_panel.addWidget(self.count_label)
+
             main_layout.addLayout(control_panel)
 
         # Кнопки управления (только для администратора)
@@ -234,17 +171,50 @@ class ProductsWindow(QMainWindow):
             orders_btn.clicked.connect(self.open_orders)
             main_layout.addWidget(orders_btn)
 
-        # Область прокрутки для карточек товаров
-        scroll_area = QScrollArea()
-        scroll_area.setWidgetResizable(True)
-        scroll_area.setHorizontalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAlwaysOff)
+        # Сообщение об отсутствии товаров
+        self.no_products_label = QLabel('Товары не найдены')
+        self.no_products_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        self.no_products_label.setStyleSheet('font-size: 16px; color: #999;')
+        self.no_products_label.hide()
+        main_layout.addWidget(self.no_products_label)
+
+        # Индикатор фоновой загрузки
+        self.loading_label = QLabel('Загрузка...')
+        self.loading_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        self.loading_label.setStyleSheet('color: #666; font-style: italic;')
+        self.loading_label.hide()
+        main_layout.addWidget(self.loading_label)
+        self.runner.busy_changed.connect(self.loading_label.setVisible)
+
+        # Каталог товаров: карточки рисует делегат, только видимые
+        self.products_view = QListView()
+        self.products_view.setViewMode(QListView.ViewMode.IconMode)
+        self.products_view.setResizeMode(QListView.ResizeMode.Adjust)
+        self.products_view.setMovement(QListView.Movement.Static)
+        self.products_view.setUniformItemSizes(True)
+        self.products_view.setGridSize(QSize(CARD_WIDTH + CARD_SPACING, CARD_HEIGHT + CARD_SPACING))
+        self.products_view.setSelectionMode(QListView.SelectionMode.NoSelection)
+        self.products_view.setVerticalScrollMode(QListView.ScrollMode.ScrollPerPixel)
+        self.products_view.setHorizontalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAlwaysOff)
+        self.products_view.setMouseTracking(True)
+        self.products_view.setModel(self.products_model)
+        self.products_view.setItemDelegate(ProductCardDelegate(self.thumbnails, self.products_view))
+        main_layout.addWidget(self.products_view)
+
+        # Миниатюры фото загружаются в фоне, по готовности карточки перерисовываются
+        self.thumbnails.thumbnail_ready.connect(self.on_thumbnail_ready)
 
-        self.products_container = QWidget()
-        self.products_layout = QGridLayout(self.products_container)
-        self.products_layout.setSpacing(15)
+        if self.current_user['role_name'] == 'Администратор':
+            self.products_view.viewport().setCursor(Qt.CursorShape.PointingHandCursor)
+            self.products_view.clicked.connect(self.on_product_clicked)
 
-        scroll_area.setWidget(self.products_container)
-        main_layout.addWidget(scroll_area)
+        self.products_model.load_failed.connect(self.on_load_failed)
+        self.products_model.modelReset.connect(self.update_empty_state)
+        self.products_model.page_loaded.connect(self.update_empty_state)
+
+        # Подгрузка следующей страницы при приближении к концу списка
+        scroll_bar = self.products_view.verticalScrollBar()
+        scroll_bar.valueChanged.connect(self.load_more_if_needed)
 
         # Применяем стили
         try:
@@ -264,79 +234,370 @@ class ProductsWindow(QMainWindow):
         self.move(x, y)
 
     def load_products(self):
-        """Загрузка товаров из БД"""
-        try:
-            self.all_products = ProductQueries.get_all_products()
-            self.filtered_products = self.all_products.copy()
-            self.display_products()
-        except Exception as e:
-            QMessageBox.critical(self, 'Ошибка', f'Ошибка загрузки товаров:\n{str(e)}')
+        """
+        Загрузка товаров из БД
+
+        Небольшой каталог загружается целиком и фильтруется в памяти
+        по поисковому индексу, большой - загружается постранично.
+        Если есть локальная копия каталога, сначала показывается она,
+        а с сервера загружаются только изменения.
+        """
+        self.catalog_mode = None
+        self.search_index = None
+        self.catalog_generation += 1
+        self.runner.cancel('catalog')
+
+        if catalog_snapshot.enabled:
+            self.snapshot_task = CatalogSnapshotTask(self.catalog_generation, catalog_snapshot,
+                                                     self.snapshot_signals)
+            QThreadPool.globalInstance().start(self.snapshot_task)
+        else:
+            self.runner.run('catalog', self.fetch_catalog,
+                            on_result=self.on_catalog_loaded, on_error=self.on_load_failed)
 
-    def load_suppliers(self):
-        """Загрузка списка поставщиков"""
-        try:
-            suppliers = ProductQueries.get_all_suppliers()
-            for supplier in suppliers:
-                self.supplier_combo.addItem(supplier['supplier_name'])
-        except Exception as e:
-            print(f'Ошибка загрузки поставщиков: {e}')
+    def on_snapshot_loaded(self, generation, loaded):
+        """Локальная копия прочитана: показать ее и загрузить изменения"""
+        if generation != self.catalog_generation:
+            return
+        self.snapshot_task = None
 
-    def apply_filters(self):
-        """Применение фильтров, поиска и сортировки"""
-        # Начинаем с всех товаров
-        result = self.all_products.copy()
+        if loaded is None:
+            self.runner.run('catalog', self.fetch_catalog,
+                            on_result=self.on_catalog_loaded, on_error=self.on_load_failed)
+            return
+
+        search_index, watermark = loaded
+        self.on_catalog_loaded(search_index)
+        self.runner.run('catalog', self.sync_catalog, watermark,
+                        on_result=self.on_catalog_synced,
+                        on_error=lambda error: print(f'Ошибка синхронизации каталога: {error}'))
+
+    @staticmethod
+    def fetch_catalog():
+        """Загрузить каталог целиком, если он небольшой (в фоновом потоке)"""
+        if ProductQueries.estimate_products_count() > APP_CONFIG['in_memory_catalog_limit']:
+            catalog_snapshot.clear()
+            return None
+
+        if not catalog_snapshot.enabled:
+            return ProductSearchIndex(ProductQueries.get_all_products())
+
+        # Отметка берется до чтения: изменения, не попавшие в каталог,
+        # придут при следующей синхронизации
+        watermark = ProductQueries.get_catalog_watermark()
+        products = ProductQueries.get_all_products()
+        catalog_snapshot.save(products, watermark)
+        return ProductSearchIndex(products)
+
+    @staticmethod
+    def sync_catalog(watermark):
+        """
+        Загрузить изменения каталога после отметки локальной копии
+        (в фоновом потоке)
+
+        Returns:
+            (None, (измененные товары, ID удаленных)) или (результат
+            fetch_catalog, None), если каталог загружен заново: изменений
+            слишком много для обновления по одному товару или копия устарела
+        """
+        changes = ProductQueries.get_products_changed_since(watermark)
+        if changes is None:
+            return ProductsWindow.fetch_catalog(), None
+
+        changed, removed_ids, new_watermark = changes
+        catalog_snapshot.apply(changed, removed_ids, new_watermark)
+
+        if len(changed) + len(removed_ids) > APP_CONFIG['change_reload_limit']:
+            loaded = catalog_snapshot.load()
+            if loaded is not None:
+                return ProductSearchIndex(loaded[0]), None
+        return None, (changed, removed_ids)
+
+    def on_catalog_synced(self, result):
+        """Изменения после локальной копии загружены"""
+        search_index, changes = result
+        if changes is None:
+            self.on_catalog_loaded(search_index)
+        elif changes[0] or changes[1]:
+            self.apply_product_changes(*changes)
+
+    def on_catalog_loaded(self, search_index):
+        """Каталог загружен: выбор режима и применение фильтров"""
+        self.search_index = search_index
+        if search_index is not None:
+            self.catalog_mode = 'memory'
+            QThreadPool.globalInstance().start(search_index.build_postings)
+        else:
+            self.catalog_mode = 'server'
+        self.apply_filters()
+
+    def load_pages(self):
+        """
+        Загрузка товаров с сервера с учетом фильтров
+
+        Поиск без явной сортировки выполняется на сервере с ранжированием
+        (лучшие совпадения первыми), остальное загружается постранично.
+        """
+        search_text, supplier, sort = self.current_filters()
+
+        if search_text and sort is None:
+            self.runner.cancel('products_count')
+            self.runner.run('products_search', ProductQueries.search_products,
+                            search_text, supplier, APP_CONFIG['search_result_limit'],
+                            APP_CONFIG['server_search_mode'],
+                            on_result=self.on_search_loaded, on_error=self.on_load_failed)
+            return
+
+        self.runner.cancel('products_search')
+        self.runner.cancel('product_places')
+        self.pending_places.clear()
+        if hasattr(self, 'count_label'):
+            self.count_label.clear()
+            self.runner.run('products_count', ProductQueries.estimate_products_count,
+                            search_text, supplier, on_result=self.on_count_estimated,
+                            on_error=lambda error: print(f'Ошибка оценки количества товаров: {error}'))
+
+        def fetch_page(after):
+            return ProductQueries.get_products_page(after, self.page_size,
+                                                    search_text, supplier, sort)
+
+        self.products_model.set_page_source(fetch_page)
+
+    def on_search_loaded(self, products):
+        """Результаты поиска на сервере"""
+        self.products_model.set_products(products)
+        if hasattr(self, 'count_label'):
+            self.count_label.setText(f'Найдено: {len(products)}')
+
+    def on_count_estimated(self, estimate):
+        """Оценка количества найденных товаров"""
+        self.count_label.setText(f'Найдено: ~{estimate}')
+
+    def load_more_if_needed(self, *args):
+        """Подгрузить страницу, если до конца прокрутки осталось меньше экрана"""
+        if not self.products_model.canFetchMore():
+            return
+
+        scroll_bar = self.products_view.verticalScrollBar()
+        remaining = scroll_bar.maximum() - scroll_bar.value()
+        if remaining <= self.products_view.viewport().height():
+            self.products_model.fetchMore()
+
+    def on_load_failed(self, error):
+        """Ошибка загрузки страницы товаров"""
+        QMessageBox.critical(self, 'Ошибка', f'Ошибка загрузки товаров:\n{error}')
+
+    def update_empty_state(self, *args):
+        """Показать сообщение, если товаров нет"""
+        empty = self.products_model.rowCount() == 0 and not self.products_model.canFetchMore()
+        self.no_products_label.setVisible(empty)
+
+    def on_thumbnail_ready(self, photo_path):
+        """Миниатюра фото готова - перерисовать видимые карточки"""
+        self.products_view.viewport().update()
+
+    def on_product_clicked(self, index):
+        """Клик по карточке товара (только администратор)"""
+        product = index.data(ProductListModel.ProductRole)
+        if product:
+            self.edit_product(product['product_id'])
+
+    def load_suppliers(self):
+        """Загрузка списка поставщиков (в фоне)"""
+        self.runner.run('suppliers', ProductQueries.get_all_suppliers,
+                        on_result=self.on_suppliers_loaded,
+                        on_error=lambda error: print(f'Ошибка загрузки поставщиков: {error}'))
+
+    def on_suppliers_loaded(self, suppliers):
+        """Заполнение списка поставщиков"""
+        for supplier in suppliers:
+            self.supplier_combo.addItem(supplier['supplier_name'])
+
+    def current_filters(self):
+        """Текущие параметры поиска: (текст, поставщик, сортировка)"""
+        search_text = None
+        supplier = None
+        sort = None
 
         # Поиск (если доступен)
         if hasattr(self, 'search_input'):
-            search_text = self.search_input.text().strip()
-            if search_text:
-                result = [p for p in result if
-                         search_text.lower() in p['product_name'].lower() or
-                         search_text.lower() in p['article'].lower() or
-                         search_text.lower() in str(p.get('description', '')).lower() or
-                         search_text.lower() in str(p.get('supplier_name', '')).lower() or
-                         search_text.lower() in str(p.get('category_name', '')).lower()]
+            search_text = self.search_input.text().strip() or None
 
         # Фильтр по поставщику (если доступен)
         if hasattr(self, 'supplier_combo'):
-            supplier = self.supplier_combo.currentText()
-            if supplier != 'Все поставщики':
-                result = [p for p in result if p['supplier_name'] == supplier]
+            if self.supplier_combo.currentText() != 'Все поставщики':
+                supplier = self.supplier_combo.currentText()
 
         # Сортировка (если доступна)
         if hasattr(self, 'sort_combo'):
             sort_option = self.sort_combo.currentText()
             if sort_option == 'По количеству ↑':
-                result.sort(key=lambda x: x['quantity_in_stock'])
+                sort = 'quantity_asc'
             elif sort_option == 'По количеству ↓':
-                result.sort(key=lambda x: x['quantity_in_stock'], reverse=True)
-
-        self.filtered_products = result
-        self.display_products()
-
-    def display_products(self):
-        """Отображение товаров в виде карточек"""
-        # Очистка текущего содержимого
-        for i in reversed(range(self.products_layout.count())):
-            widget = self.products_layout.itemAt(i).widget()
-            if widget:
-                widget.deleteLater()
-
-        # Отображение товаров
-        if not self.filtered_products:
-            no_products_label = QLabel('Товары не найдены')
-            no_products_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
-            no_products_label.setStyleSheet('font-size: 16px; color: #999;')
-            self.products_layout.addWidget(no_products_label, 0, 0)
+                sort = 'quantity_desc'
+
+        return search_text, supplier, sort
+
+    def on_search_text_changed(self, text):
+        """Перезапуск таймера поиска при вводе текста"""
+        self.search_timer.start()
+
+    def apply_filters(self):
+        """Применение фильтров, поиска и сортировки"""
+        self.search_timer.stop()
+
+        # Каталог еще загружается - фильтры применятся после загрузки
+        if self.catalog_mode is None:
+            return
+
+        if self.catalog_mode == 'server':
+            self.load_pages()
             return
 
-        # Размещение карточек в сетке (4 колонки)
-        columns = 4
-        for index, product in enumerate(self.filtered_products):
-            row = index // columns
-            col = index % columns
-            card = ProductCard(product, self.current_user['role_name'], self)
-            self.products_layout.addWidget(card, row, col)
+        # Предыдущий проход фильтрации больше не нужен
+        self.filter_generation += 1
+        if self.filter_task is not None:
+            self.filter_task.cancel()
+        self.filter_pool.clear()
+
+        search_text, supplier, sort = self.current_filters()
+        self.filter_task = CatalogFilterTask(self.filter_generation, self.search_index,
+                                             search_text, supplier, self.sort_key(sort),
+                                             self.filter_signals)
+        self.filter_pool.start(self.filter_task)
+
+    def on_filter_finished(self, generation, products):
+        """Результат прохода фильтрации в памяти"""
+        if generation != self.filter_generation:
+            return
+
+        self.filter_task = None
+        self.products_model.set_products(products)
+        if hasattr(self, 'count_label'):
+            self.count_label.setText(f'Найдено: {len(products)}')
+
+    def on_tables_changed(self, table, ids):
+        """Уведомление об изменении строк: загрузить только измененные товары"""
+        if table != 'products' or self.catalog_mode is None:
+            return
+
+        if len(ids) > APP_CONFIG['change_reload_limit']:
+            self.load_products()
+            return
+
+        # Запрос с тем же ключом отменяет предыдущий, поэтому запрашиваются
+        # все еще не загруженные ID
+        self.pending_product_ids.update(ids)
+        requested = set(self.pending_product_ids)
+        self.runner.run('product_changes', ProductQueries.get_products_by_ids, sorted(requested),
+                        on_result=lambda products: self.on_changed_products_loaded(requested, products),
+                        on_error=lambda error: print(f'Ошибка загрузки измененных товаров: {error}'))
+
+    def on_table_reloaded(self, table):
+        """Товары изменены массово (например, импортом): загрузить каталог заново"""
+        if table == 'products' and self.catalog_mode is not None:
+            self.load_products()
+
+    def on_changed_products_loaded(self, requested, products):
+        """Измененные товары загружены (не найденные товары удалены)"""
+        self.pending_product_ids -= requested
+        found = {product['product_id'] for product in products}
+        self.apply_product_changes(products, requested - found)
+
+    def apply_product_changes(self, products, removed_ids=()):
+        """
+        Обновить отдельные товары в каталоге без полной перезагрузки
+
+        Args:
+            products: Актуальные строки измененных и добавленных товаров
+            removed_ids: ID удаленных товаров
+        """
+        if self.catalog_mode is None:
+            return
+
+        # Фото могло быть заменено (в том числе файлом с тем же именем)
+        for product in products:
+            self.thumbnails.invalidate(product.get('photo_path'))
+
+        if self.catalog_mode == 'memory':
+            for product_id in removed_ids:
+                self.search_index.remove(product_id)
+            for product in products:
+                self.search_index.upsert(product)
+
+            # Проход фильтрации, начатый до изменения, вернул бы устаревший список
+            if self.filter_task is not None:
+                self.apply_filters()
+                return
+
+        search_text, supplier, sort = self.current_filters()
+        # Порядок ранжированного поиска на сервере повторить нельзя: такие
+        # результаты только обновляются и удаляются
+        ranked = self.catalog_mode == 'server' and search_text and sort is None
+        query = None if ranked else normalize(search_text or '').strip()
+
+        def matches(product):
+            if supplier and product['supplier_name'] != supplier:
+                return False
+            return not query or query in product_text(product)
+
+        if self.catalog_mode == 'server' and not ranked:
+            # Страницы упорядочены по правилам сравнения строк на сервере
+            # (регистр, "ё", знаки препинания): новые и сменившие место
+            # товары вставляются на места, найденные сервером
+            for product_id in itertools.chain(removed_ids, (p['product_id'] for p in products)):
+                self.pending_places.pop(product_id, None)
+            unplaced = self.products_model.apply_changes(products, removed_ids, matches,
+                                                         self.server_sort_key(sort), insert=False)
+            self.place_products(unplaced, sort)
+        else:
+            self.products_model.apply_changes(products, removed_ids, matches,
+                                              None if ranked else self.sort_key(sort))
+
+        if self.catalog_mode == 'memory' and hasattr(self, 'count_label'):
+            self.count_label.setText(f'Найдено: {self.products_model.rowCount()}')
+        self.update_empty_state()
+
+    def place_products(self, products, sort):
+        """Найти на сервере места товаров среди загруженных строк (в фоне)"""
+        for product in products:
+            self.pending_places[product['product_id']] = product
+        if not self.pending_places:
+            return
+
+        # Запрос с тем же ключом отменяет предыдущий, поэтому запрашиваются
+        # все еще не вставленные товары
+        requested = dict(self.pending_places)
+        loaded_ids = [product['product_id'] for product in self.products_model.products]
+        self.runner.run('product_places', ProductQueries.get_next_in_order,
+                        list(requested.values()), loaded_ids, sort,
+                        on_result=lambda places: self.on_places_loaded(requested, places),
+                        on_error=lambda error: print(f'Ошибка определения места товаров: {error}'))
+
+    def on_places_loaded(self, requested, places):
+        """Места товаров найдены: вставить товары, не изменившиеся за время запроса"""
+        products = [product for product_id, product in requested.items()
+                    if self.pending_places.get(product_id) is product]
+        for product in products:
+            del self.pending_places[product['product_id']]
+        self.products_model.insert_before(products, places)
+        self.update_empty_state()
+
+    @staticmethod
+    def server_sort_key(sort):
+        """Значения столбцов порядка get_products_page (без приведения регистра)"""
+        if sort is None:
+            return lambda p: (p['product_name'], p['product_id'])
+        return lambda p: (p['quantity_in_stock'], p['product_name'], p['product_id'])
+
+    @staticmethod
+    def sort_key(sort):
+        """Ключ порядка товаров в списке для сортировки sort"""
+        if sort == 'quantity_asc':
+            return lambda p: (p['quantity_in_stock'], normalize(p['product_name']), p['product_id'])
+        if sort == 'quantity_desc':
+            return lambda p: (-p['quantity_in_stock'], normalize(p['product_name']), p['product_id'])
+        return lambda p: (normalize(p['product_name']), p['product_id'])
 
     def add_product(self):
         """Открыть диалог добавления товара"""
@@ -361,9 +622,12 @@ class ProductsWindow(QMainWindow):
         self.edit_dialog.exec()
 
     def on_edit_dialog_closed(self):
-        """Обработка закрытия диалога редактирования"""
-        self.edit_dialog = None
-        self.load_products()
+        """Обработка закрытия диалога редактирования: обновить только измененный товар"""
+        dialog, self.edit_dialog = self.edit_dialog, None
+        if dialog.saved_product is not None:
+            self.apply_product_changes([dialog.saved_product])
+        elif dialog.deleted_product_id is not None:
+            self.apply_product_changes([], {dialog.deleted_product_id})
 
     def open_orders(self):
         """Открыть окно заказов"""
@@ -374,3 +638,18 @@ class ProductsWindow(QMainWindow):
         """Выход из системы"""
         self.login_window.show_login()
         self.close()
+
+    def closeEvent(self, event):
+        """Остановка фоновых задач при закрытии окна"""
+        try:
+            change_listener.changed.disconnect(self.on_tables_changed)
+            change_listener.reloaded.disconnect(self.on_table_reloaded)
+            change_listener.resynced.disconnect(self.load_products)
+        except TypeError:
+            pass
+        if self.filter_task is not None:
+            self.filter_task.cancel()
+        self.filter_pool.clear()
+        self.runner.cancel_all()
+        self.thumbnails.shutdown()
+        super().closeEvent(event)